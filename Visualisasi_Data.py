@@ -1,8 +1,28 @@
 import streamlit as st
-import plotly.express as px
-import pandas as pd
 import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from data_loader import load_dataset, updates_path
+import settings
+from aggregates import Aggregator
+from charts import (
+    AGGREGATES,
+    CHART_AGGREGATES,
+    CHART_COLUMNS,
+    CHARTS,
+    ChartData,
+    trend_count_table,
+    trend_price_table,
+)
+from export import FORMATS, ExportCache
+from figure_cache import FigureCache
+from instrumentation import metrics, span
+from table_view import page_count, page_sizes, style_page
+from filters import ADVANCED_FILTER_WIDGETS, FILTER_WIDGETS, FilterEngine
+from process_backend import ProcessBackend
+from scheduler import TaskGraph
+import sql_backend
 
 warnings.filterwarnings("ignore")
 
@@ -13,232 +33,206 @@ st.markdown(
 )
 
 
+def parquet_source():
+    # File Parquet yang di-query DuckDB di tempat: VISDAT_DATABASE, atau
+    # dataset Parquet itu sendiri selama tidak ada jurnal upsert
+    if settings.BACKEND != "duckdb":
+        return ""
+    if settings.DATABASE:
+        return settings.DATABASE
+    if settings.DATASET.endswith(".parquet") and not os.path.isdir(
+        updates_path(settings.DATASET)
+    ):
+        return settings.DATASET
+    return ""
+
+
+# Tanpa file Parquet untuk DuckDB, dataset dimuat ke pandas (dibagi semua session)
+dataset = None
 try:
-    df = pd.read_excel("jabodetabek_house_price.xlsx")
+    if not parquet_source():
+        with span("load_dataset"):
+            dataset = load_dataset(settings.DATASET)
+        df = dataset.frame
+        st.sidebar.caption(dataset.summary())
 except FileNotFoundError:
     st.error(
         "File not found. Please make sure you have uploaded the correct file or provide the correct path to the default file."
     )
+    st.stop()
 except Exception as e:
     st.error(f"An error occurred: {e}")
+    # Dataset gagal dimuat: halaman berhenti, tidak beralih ke backend lain
+    st.stop()
 
 
-# Filter function
-def apply_filters(data_frame):
-    # Filter
-    st.sidebar.header("Filter:")
+@st.cache_resource(max_entries=2)
+def get_filter_engine(_dataset, content_hash):
+    return FilterEngine(_dataset.frame)
 
-    city = st.sidebar.multiselect(
-        ":world_map: Kota", data_frame["city"].dropna().unique()
-    )
-    if not city:
-        df_filtered = data_frame.copy()
-    else:
-        df_filtered = data_frame[data_frame["city"].isin(city)]
 
-    district = st.sidebar.multiselect(
-        ":cityscape: Kawasan", df_filtered["district"].dropna().unique()
-    )
-    if not district:
-        df_filtered = df_filtered.copy()
-    else:
-        df_filtered = df_filtered[df_filtered["district"].isin(district)]
+@st.cache_resource(max_entries=2)
+def get_aggregator(_dataset, content_hash):
+    aggregator = Aggregator(get_filter_engine(_dataset, content_hash), content_hash)
+    return aggregator.track(_dataset)
 
-    alamat = st.sidebar.multiselect(
-        "📌 Alamat", df_filtered["address"].dropna().unique()
-    )
-    if not alamat:
-        df_filtered = df_filtered.copy()
-    else:
-        df_filtered = df_filtered[df_filtered["address"].isin(alamat)]
 
-    # Sertifikat Filter
-    sertifikat = st.sidebar.multiselect(
-        "📜 Jenis Sertifikat", df_filtered["certificate"].dropna().unique()
-    )
-    if not sertifikat:
-        df_filtered = df_filtered.copy()
-    else:
-        df_filtered = df_filtered[df_filtered["certificate"].isin(sertifikat)]
+def close_backend(backend):
+    # Backend yang dibuang dari cache melepas worker, snapshot & koneksinya
+    getattr(backend, "close", lambda: None)()
 
-    # Mengambil semua kemungkinan fasilitas yang tidak kosong
-    all_facilities = set()
-    for facilities_list in df_filtered["facilities"]:
-        facilities = facilities_list.split(", ")
-        all_facilities.update(facilities)
 
-    # Mengurutkan fasilitas yang tidak kosong dalam bentuk daftar
-    all_facilities = sorted([facility for facility in all_facilities if facility])
+@st.cache_resource(max_entries=2, on_release=close_backend)
+def get_parquet_backend(path):
+    return sql_backend.connect("duckdb", path).attach()
 
-    selected_facilities = st.sidebar.multiselect("🎱 Fasilitas", all_facilities)
 
-    if not selected_facilities:
-        df_filtered = df_filtered.copy()
-    else:
-        mask = df_filtered["facilities"].apply(
-            lambda x: all(facility in x for facility in selected_facilities)
-        )
-        df_filtered = df_filtered[mask & (df_filtered["facilities"] != "")]
+@st.cache_resource(max_entries=2, on_release=close_backend)
+def get_backend(_dataset, content_hash):
+    # Backend filter & agregasi dipilih lewat VISDAT_BACKEND
+    if settings.BACKEND == "pandas":
+        return get_aggregator(_dataset, content_hash)
+    if settings.BACKEND == "process":
+        backend = ProcessBackend(settings.WORKERS, timeout=settings.WORKER_TIMEOUT)
+        return backend.sync(_dataset.frame, _dataset.content_hash)
+    backend = sql_backend.connect(settings.BACKEND, settings.DATABASE)
+    return backend.sync(_dataset.frame, _dataset.content_hash)
 
-    # Harga
-    min_price_column, max_price_column = st.sidebar.columns(2)
 
-    min_price = min_price_column.number_input("💵 Harga Minimum", min_value=0, value=0)
+@st.cache_resource
+def get_figure_cache():
+    # Dipakai bersama oleh semua session
+    return FigureCache(settings.FIGURE_CACHE_MB * 1024**2)
 
-    max_price = max_price_column.number_input(
-        "💶 Harga Maksimum", min_value=0, value=df_filtered["price_in_rp"].max()
+
+@st.cache_resource
+def get_export_cache():
+    return ExportCache(
+        settings.EXPORT_CACHE_MB * 1024**2, settings.EXPORT_ENTRY_MB * 1024**2
     )
 
-    # Menerapkan filter
-    df_filtered = df_filtered[
-        (df_filtered["price_in_rp"] >= min_price)
-        & (df_filtered["price_in_rp"] <= max_price)
-    ]
 
-    # Expander untuk Advanced Filters
-    with st.sidebar.expander("Advanced Filters", expanded=True):
+@st.cache_resource
+def get_chart_pool():
+    # Thread pool bersama untuk agregasi; banyak kerja pandas/numpy melepas
+    # GIL sehingga agregat bisa dihitung bersamaan. Figure tidak dibangun di
+    # sini: Plotly Express tidak thread-safe (template default dibaca bersama)
+    return ThreadPoolExecutor(settings.CHART_THREADS, thread_name_prefix="chart")
 
-        building_age = st.multiselect(
-            "🏗 Umur Bangunan (Tahun)", df_filtered["building_age"].dropna().unique()
-        )
-        if not building_age:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["building_age"].isin(building_age)]
 
-        year_built = st.multiselect(
-            "📆 Tahun Pembangunan", df_filtered["year_built"].dropna().unique()
-        )
-        if not year_built:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["year_built"].isin(year_built)]
+def range_slider(state, column, label):
+    bounds = state.bounds(column)
+    if bounds is None or bounds[0] == bounds[1]:
+        # Tidak ada rentang yang bisa dipilih
+        return (None, None)
+    low, high = bounds
+    if float(low).is_integer() and float(high).is_integer():
+        low, high = int(low), int(high)
+    selected = st.slider(label, min_value=low, max_value=high, value=(low, high))
+    if selected == (low, high):
+        # Rentang penuh = tidak memfilter (baris tanpa nilai tetap ikut)
+        return (None, None)
+    return selected
 
-        land_size = st.multiselect(
-            "🪨 Luas Tanah (m²)", df_filtered["land_size_m2"].dropna().unique()
-        )
-        if not land_size:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["land_size_m2"].isin(land_size)]
 
-        building_size = st.multiselect(
-            "🧱 Luas Bangunan (m²)", df_filtered["building_size_m2"].dropna().unique()
-        )
-        if not building_size:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[
-                df_filtered["building_size_m2"].isin(building_size)
-            ]
-
-        floors = st.multiselect(
-            "🪜 Jumlah Lantai", df_filtered["floors"].dropna().unique()
-        )
-        if not floors:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["floors"].isin(floors)]
+# Filter function
+def apply_filters(backend):
+    # Filter
+    st.sidebar.header("Filter:")
 
-        listrik = st.multiselect(
-            "🔌 Kelistrikan", df_filtered["electricity"].dropna().unique()
-        )
-        if not listrik:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["electricity"].isin(listrik)]
+    # Semua pilihan dikumpulkan menjadi satu FilterSpec dan digabung dalam satu mask
+    state = backend.start()
 
-        kondisi = st.multiselect(
-            "🏡 Kondisi", df_filtered["property_condition"].dropna().unique()
-        )
-        if not kondisi:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["property_condition"].isin(kondisi)]
-
-        orientasi = st.multiselect(
-            "🧭 Orientasi Bangunan",
-            df_filtered["building_orientation"].dropna().unique(),
-        )
-        if not orientasi:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[
-                df_filtered["building_orientation"].isin(orientasi)
-            ]
-
-        furnish = st.multiselect(
-            "🪑 Perabotan", df_filtered["furnishing"].dropna().unique()
-        )
-        if not furnish:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["furnishing"].isin(furnish)]
+    for column, label in FILTER_WIDGETS:
+        selected = st.sidebar.multiselect(label, state.options(column))
+        state.add(column, "isin", selected)
 
-        bedrooms = st.multiselect(
-            "🛏️ Jumlah Kamar Tidur", df_filtered["bedrooms"].dropna().unique()
-        )
-        if not bedrooms:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["bedrooms"].isin(bedrooms)]
+    # Daftar fasilitas diambil dari indeks fasilitas (hanya yang ada di baris terfilter)
+    all_facilities = state.facility_options()
 
-        bathrooms = st.multiselect(
-            "🛁 Jumlah Kamar Mandi", df_filtered["bathrooms"].dropna().unique()
-        )
-        if not bathrooms:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["bathrooms"].isin(bathrooms)]
+    selected_facilities = st.sidebar.multiselect("🎱 Fasilitas", all_facilities)
+    state.add("facilities", "facilities", selected_facilities)
 
-        carports = st.multiselect(
-            "🏎 Jumlah Carport", df_filtered["carports"].dropna().unique()
-        )
-        if not carports:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["carports"].isin(carports)]
-
-        maid_bedrooms = st.multiselect(
-            "🛏 Jumlah Kamar Pembantu",
-            df_filtered["maid_bedrooms"].dropna().unique(),
-        )
-        if not maid_bedrooms:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["maid_bedrooms"].isin(maid_bedrooms)]
-
-        maid_bathrooms = st.multiselect(
-            "🚽 Jumlah Kamar Mandi Pembantu",
-            df_filtered["maid_bathrooms"].dropna().unique(),
-        )
-        if not maid_bathrooms:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[
-                df_filtered["maid_bathrooms"].isin(maid_bathrooms)
-            ]
-
-        garages = st.multiselect(
-            "🏎️ Jumlah Garasi", df_filtered["garages"].dropna().unique()
-        )
-        if not garages:
-            df_filtered = df_filtered.copy()
-        else:
-            df_filtered = df_filtered[df_filtered["garages"].isin(garages)]
+    # Harga
+    min_price_column, max_price_column = st.sidebar.columns(2)
 
-    return df_filtered
+    min_price = min_price_column.number_input("💵 Harga Minimum", min_value=0, value=0)
+
+    price_bounds = state.bounds("price_in_rp")
+    max_price = max_price_column.number_input(
+        "💶 Harga Maksimum",
+        min_value=0,
+        value=int(price_bounds[1]) if price_bounds else 0,
+    )
+
+    # Menerapkan filter
+    state.add("price_in_rp", "range", (min_price, max_price))
+
+    # Expander untuk Advanced Filters
+    with st.sidebar.expander("Advanced Filters", expanded=True):
+        for column, label, kind in ADVANCED_FILTER_WIDGETS:
+            if kind == "range":
+                selected = range_slider(state, column, label)
+            else:
+                selected = st.multiselect(label, state.options(column))
+            state.add(column, kind, selected)
+
+    return state
 
 
 # Apply filters
-df_filtered = apply_filters(df)
+# Backend di-cache per isi dataset awal; upsert berikutnya diterapkan incremental
+with span("backend"):
+    if parquet_source():
+        # View DuckDB dibuat ulang bila file Parquet berubah
+        backend = get_parquet_backend(parquet_source()).refresh(None)
+        st.sidebar.caption(backend.describe())
+    else:
+        backend = get_backend(dataset, dataset.base_hash).refresh(dataset)
+with span("filters"):
+    filter_state = apply_filters(backend)
+
+# Cube agregasi bersama untuk semua chart (sekali per state filter)
+passes_before = backend.passes
+filter_fingerprint = filter_state.spec.fingerprint()
+chart_data = ChartData(
+    backend,
+    filter_state,
+    settings.EXACT_QUANTILE_ROWS,
+    settings.SCATTER_WEBGL_ROWS,
+    settings.SCATTER_MAX_POINTS,
+    settings.SCATTER_SAMPLING,
+)
+figure_cache = get_figure_cache()
+export_cache = get_export_cache()
+# Agregasi rerun ini dijadwalkan di thread pool (VISDAT_CHART_THREADS); figure
+# dibangun di thread script begitu agregat yang dibacanya selesai
+chart_tasks = TaskGraph(get_chart_pool() if settings.CHART_THREADS else None)
+# Rerun baru (juga yang memotong rerun sebelumnya) membatalkan tugas rerun
+# lama yang belum mulai, supaya tidak mengantre di depan tugas rerun ini
+previous_tasks = st.session_state.get("chart_tasks")
+if previous_tasks is not None:
+    previous_tasks.cancel()
+st.session_state["chart_tasks"] = chart_tasks
+pending_charts = []
+
+
+def aggregate(name):
+    return chart_tasks.add(name, lambda: AGGREGATES[name](chart_data))
+
+
+# Cube dihitung lebih dulu: dibaca KPI dan hampir semua chart
+aggregate("cube")
+summary_task = chart_tasks.add(
+    "summary", lambda: backend.summary(filter_state), after=["cube"]
+)
 
 
-def Home(df_filtered):
-    jumlah_rumah = df_filtered["url"].nunique()
-    avg_harga = df_filtered["price_in_rp"].mean()
-    max_harga = df_filtered["price_in_rp"].max()
-    min_harga = df_filtered["price_in_rp"].min()
+def Home(summary):
+    jumlah_rumah = summary["distinct"]
+    avg_harga = summary["price_mean"]
+    max_harga = summary["price_max"]
+    min_harga = summary["price_min"]
 
     # Ubah harga ke dalam satuan miliar
     avg_harga_miliar = avg_harga / 1e9
@@ -261,765 +255,371 @@ def Home(df_filtered):
         st.metric(label="Min of Price", value=f"${min_harga_juta}M")
 
 
-# Panggil method yang sudah dibuat dengan DataFrame yang sudah difilter
-Home(df_filtered)
+# KPI dari cube state filter aktif (partial per grup), bukan dari frame baris.
+# Tempatnya disiapkan di atas tab, isinya ditulis setelah tab selesai disusun
+home = st.container()
+
+
+def plot(chart_id, *args, **kwargs):
+    # Figure diambil dari cache (kunci: chart id + parameter + dataset + state
+    # filter); kalau belum ada baru dibangun lewat charts.CHARTS setelah
+    # agregat yang dibacanya siap
+    data_key = backend.data_key(CHART_COLUMNS[chart_id], filter_state)
+    key = (chart_id, args, data_key, filter_fingerprint)
+    fig = figure_cache.lookup(key)
+    if fig is not None:
+        # Hit: agregat chart ini tidak perlu dijadwalkan
+        with span(f"render.{chart_id}"):
+            st.plotly_chart(fig, **kwargs)
+        return
+    for name in CHART_AGGREGATES[chart_id]:
+        aggregate(name)
+    # Tugas kosong yang selesai saat semua agregat chart ini siap
+    ready = chart_tasks.add((chart_id, args), lambda: None, CHART_AGGREGATES[chart_id])
+    pending_charts.append((ready, st.empty(), chart_id, args, key, kwargs))
+    show_charts()
+
+
+def show_charts(wait=False):
+    # Isi placeholder chart yang agregatnya sudah selesai (urutan selesai,
+    # bukan urutan halaman); wait=True menunggu semua chart yang tersisa.
+    # Figure dibangun di sini, di thread script, satu per satu
+    tasks = list(dict.fromkeys(item[0] for item in pending_charts))
+    finished = as_completed(tasks) if wait else [task for task in tasks if task.done()]
+    rendered = set()
+    for task in finished:
+        # Error agregat diteruskan ke halaman
+        task.result()
+        # Chart yang sama (id & parameter) bisa ditampilkan di beberapa tempat
+        for ready, placeholder, chart_id, args, key, kwargs in pending_charts:
+            if ready is task:
+                with span(f"figure.{chart_id}"):
+                    fig = figure_cache.get(
+                        key, lambda: CHARTS[chart_id](chart_data, *args)
+                    )
+                with span(f"render.{chart_id}"):
+                    placeholder.plotly_chart(fig, **kwargs)
+        rendered.add(task)
+    # Hanya yang benar-benar dirender yang dibuang: tugas yang selesai setelah
+    # daftar `finished` dibuat dirender di panggilan berikutnya
+    pending_charts[:] = [item for item in pending_charts if item[0] not in rendered]
+
+
+def download(name, frame_fn, file_stem, help=None):
+    # File baru dibuat saat tombol diklik (data berupa callable) dan di-cache
+    # per state filter. Bukan streaming: download_button butuh seluruh file
+    # sebagai bytes, jadi file besar hanya tidak disimpan di cache
+    export_format = st.selectbox("Format", list(FORMATS), key=f"format_{name}")
+    extension, mime = FORMATS[export_format]
+    key = (name, export_format, backend.content_hash, filter_fingerprint)
+    st.download_button(
+        "Download Data",
+        data=lambda: export_cache.get(key, frame_fn, export_format),
+        file_name=file_stem + extension,
+        mime=mime,
+        help=help,
+        key=f"download_{name}",
+    )
 
 
-Top_5, persentase, bar_chart, korelasiDist, tren, mapping = st.tabs(
-    ["Summary", "Persentase", "Bar Chart", "Korelasi & Distribusi", "Tren", "Mapping"]
-)
-with Top_5:
+def data_table(backend, state):
+    # Tabel dipaginasi di server: cari & urutkan lewat backend, lalu
+    # gradient warna hanya dihitung untuk baris di halaman yang tampil
+    col_search, col_sort, col_size = st.columns((3, 2, 1))
+    search = col_search.text_input(
+        "🔎 Cari (judul, alamat, kecamatan, kota)", key="tabel_cari"
+    )
+    columns = list(backend.columns)
+    sort_column = col_sort.selectbox(
+        "Urutkan berdasarkan",
+        [None] + columns,
+        format_func=lambda column: "-" if column is None else column,
+        key="tabel_urut",
+    )
+    sizes = page_sizes(settings.TABLE_PAGE_SIZE)
+    page_size = col_size.selectbox(
+        "Baris/halaman",
+        sizes,
+        index=sizes.index(settings.TABLE_PAGE_SIZE),
+        key="tabel_ukuran",
+    )
+    descending = st.toggle("Urutan menurun", key="tabel_menurun")
+
+    page = st.session_state.get("tabel_halaman", 1)
+    with span("table.page"):
+        rows, total = backend.page(
+            state, sort_column, descending, search, page, page_size
+        )
+        pages = page_count(total, page_size)
+        if page > pages:
+            # Jumlah halaman berkurang (filter/ukuran berubah): ke halaman terakhir
+            page = st.session_state["tabel_halaman"] = pages
+            rows, total = backend.page(
+                state, sort_column, descending, search, page, page_size
+            )
+    with span("table.style"):
+        st.dataframe(style_page(rows))
+    first = (page - 1) * page_size
+    st.caption(
+        f"Baris {min(first + 1, total)}–{min(first + page_size, total)} dari {total}"
+    )
+    st.number_input(
+        f"Halaman (dari {pages})", min_value=1, max_value=pages, key="tabel_halaman"
+    )
+
+
+def tab_summary(data):
     col1, col2 = st.columns((2))
     # TOP CHART HARGA
-    topChartHarga = df_filtered.groupby(by="district", as_index=False)[
-        "price_in_rp"
-    ].sum()
-    topChartHarga = topChartHarga.sort_values(by="price_in_rp", ascending=True)
-    topChartHarga = topChartHarga.tail(5)
-
     with col1:
-        fig = px.bar(
-            topChartHarga,
-            x="price_in_rp",
-            y="district",
-            title="Top 5 Kecamatan dengan Total Harga Properti Tertinggi",
-            template="seaborn",
-            barmode="group",
-            text="price_in_rp",
-            labels={"price_in_rp": "", "district": ""},
-        )
-        fig.update_traces(texttemplate="%{text}", textposition="inside")
-        st.plotly_chart(fig, use_container_width=True)
+        plot("top_district_price", use_container_width=True)
 
     # TopChartJumlah
-    topChartJumlah = (
-        df_filtered.groupby(["district"]).size().reset_index(name="jumlah_rumah")
-    )
-    topChartJumlah = topChartJumlah.sort_values(by="jumlah_rumah", ascending=True)
-    topChartJumlah = topChartJumlah.tail(5)
-
     with col2:
-        fig = px.bar(
-            topChartJumlah,
-            x="jumlah_rumah",
-            y="district",
-            title="Top 5 Kecamatan dengan Jumlah Properti yang Dijual Tertinggi",
-            template="seaborn",
-            barmode="group",
-            text="jumlah_rumah",
-            labels={"jumlah_rumah": "", "district": ""},
-        )
-        fig.update_traces(texttemplate="%{text}", textposition="inside")
-        st.plotly_chart(fig, use_container_width=True)
+        plot("top_district_count", use_container_width=True)
 
     with st.expander("Data Rumah Sesuai Filter"):
-        st.write(df_filtered.style.background_gradient(cmap="Blues"))
-        csv = df_filtered.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "Download Data",
-            data=csv,
-            file_name="Data Full Data.csv",
-            mime="text/csv",
-            help="Tekan untuk download data dalam bentuk CSV",
+        data_table(backend, filter_state)
+        download(
+            "full",
+            lambda: data.frame,
+            "Data Full Data",
+            help="Tekan untuk download data sesuai filter",
         )
+
+
 # PIECHART
-# persentase Properti Berdasarkan kota
-with persentase:
+def tab_persentase(data):
     col1, col2 = st.columns((2))
+    # persentase Properti Berdasarkan kota
     with col1:
-        fig_persentase_kota = px.pie(
-            df_filtered["city"].value_counts(),
-            values=df_filtered["city"].value_counts().values,
-            names=df_filtered["city"].value_counts().index,
-            title="Persentase Jumlah Properti Berdasarkan Kota",
-        )
-        fig_persentase_kota.update_traces(textinfo="percent", textposition="outside")
-        st.plotly_chart(fig_persentase_kota, use_container_width=True)
+        plot("pie_city", use_container_width=True)
 
     # persentase Properti Berdasarkan Tipe Sertifikat
     with col2:
-        fig_persentase_sertifikat = px.pie(
-            df_filtered["certificate"].value_counts(),
-            hole=0.7,
-            values=df_filtered["certificate"].value_counts().values,
-            names=df_filtered["certificate"].value_counts().index,
-            title="Persentase Jumlah Properti Berdasarkan Tipe Sertifikat",
-        )
-        fig_persentase_sertifikat.add_annotation(
-            dict(
-                x=0.5,
-                y=0.5,
-                align="center",
-                xref="paper",
-                yref="paper",
-                showarrow=False,
-                font_size=30,
-                text="Certificate",
-            )
-        )
-        st.plotly_chart(fig_persentase_sertifikat, use_container_width=True)
+        plot("pie_certificate", use_container_width=True)
 
     # persentase Properti Berdasarkan Orientasi Bangunan
     with col1:
-        fig_persentase_orientasi_bangunan = px.pie(
-            df_filtered["building_orientation"].value_counts(),
-            values=df_filtered["building_orientation"].value_counts().values,
-            names=df_filtered["building_orientation"].value_counts().index,
-            title="Persentase Jumlah Properti Berdasarkan Orientasi Bangunan",
-        )
-        fig_persentase_orientasi_bangunan.update_traces(
-            textinfo="percent", textposition="outside"
-        )
-        st.plotly_chart(fig_persentase_orientasi_bangunan, use_container_width=True)
+        plot("pie_building_orientation", use_container_width=True)
 
     # persentase Properti Berdasarkan Kondisi Bangunan
     with col2:
-        fig_persentase_kondisi_bangunan = px.pie(
-            df_filtered["property_condition"].value_counts(),
-            values=df_filtered["property_condition"].value_counts().values,
-            names=df_filtered["property_condition"].value_counts().index,
-            title="Persentase Jumlah Properti Berdasarkan Kondisi Bangunan",
-        )
-        fig_persentase_kondisi_bangunan.update_traces(
-            textinfo="label+percent", textposition="outside"
-        )
-        fig_persentase_kondisi_bangunan.update_layout(showlegend=False)
-        st.plotly_chart(fig_persentase_kondisi_bangunan, use_container_width=True)
+        plot("pie_property_condition", use_container_width=True)
 
     # persentase Properti Berdasarkan Kondisi Perabotan
     with col1:
-        fig = px.pie(
-            df_filtered["furnishing"].value_counts(),
-            values=df_filtered["furnishing"].value_counts().values,
-            names=df_filtered["furnishing"].value_counts().index,
-            title="Persentase Jumlah Properti Berdasarkan Kondisi Perabotan",
-        )
-        fig.update_traces(textinfo="label+percent", textposition="outside")
-        fig.update_layout(showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
-
-        # Sunburst Chart
-
-    fig_sunburst = px.sunburst(
-        df_filtered,
-        width=1000,
-        height=1000,
-        path=["city", "district"],
-        values="price_in_rp",
-    )
-    fig_sunburst.update_layout(title="Harga Properti Berdasarkan Kota dan Kecamatan")
-    st.plotly_chart(fig_sunburst)
+        plot("pie_furnishing", use_container_width=True)
 
     # Sunburst Chart
-    jumlahByKotaDist = (
-        df_filtered.groupby(["city", "district"])
-        .size()
-        .reset_index(name="jumlah_rumah")
-    )
-    fig_sunburst = px.sunburst(
-        jumlahByKotaDist,
-        width=1000,
-        height=1000,
-        path=["city", "district"],
-        values="jumlah_rumah",
-    )
-    fig_sunburst.update_layout(title="Jumlah Properti Berdasarkan Kota dan Kecamatan")
-    st.plotly_chart(fig_sunburst)
+    plot("sunburst_price")
+    plot("sunburst_count")
 
 
-with bar_chart:
+def tab_bar_chart(data):
     col1, col2 = st.columns((2))
-    # BARRRRRRR
-    # BARRRRRRR
-    # BARRRRRRR
-    # BARRRRRRR
-    # BARRRRRRR
-
-    # KOTAAAAAAA
-    with col1:
-        cityPrice = df_filtered.groupby(by="city", as_index=False)["price_in_rp"].mean()
-        cityPrice = cityPrice.sort_values(by="price_in_rp", ascending=False)
-        fig = px.bar(
-            cityPrice,
-            width=400,
-            height=600,
-            x="city",
-            y="price_in_rp",
-            text="price_in_rp",
-            title="Harga Properti di Jabodetabek Berdasarkan Kota",
-            labels={"city": "", "price_in_rp": ""},
-        )
-        fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        fig = px.bar(
-            df_filtered["city"].value_counts(),
-            width=400,
-            height=600,
-            x=df_filtered["city"].value_counts().index,
-            y=df_filtered["city"].value_counts().values,
-            title="Banyaknya Properti yang Dijual Berdasarkan Kota",
-            labels={"x": "", "y": ""},
-        )
-        fig.update_traces(
-            text=df_filtered["city"].value_counts().values, textposition="outside"
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    # TIPE SERTIFIKAT
-    with col1:
-        certiPrice = df_filtered.groupby(by=["certificate", "city"], as_index=False)[
-            "price_in_rp"
-        ].sum()
-        certiPrice = certiPrice.sort_values(by="price_in_rp", ascending=False)
-        fig = px.bar(
-            certiPrice,
-            width=400,
-            height=600,
-            x="certificate",
-            y="price_in_rp",
-            color="city",
-            text="price_in_rp",
-            title="Harga Properti di Jabodetabek Berdasarkan Tipe Sertifikat",
-            labels={"certificate": "", "price_in_rp": ""},
-        )
-        fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        fig = px.bar(
-            df_filtered["certificate"].value_counts(),
-            width=400,
-            height=600,
-            x=df_filtered["certificate"].value_counts().index,
-            y=df_filtered["certificate"].value_counts().values,
-            title="Banyaknya Properti yang Dijual Berdasarkan Tipe Sertifikat",
-            labels={"x": "", "y": ""},
-        )
-        fig.update_traces(
-            text=df_filtered["certificate"].value_counts().values,
-            textposition="outside",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    # Orientasi Bangunan
+    # KOTA
     with col1:
-        OrientPrice = df_filtered.groupby(
-            by=["building_orientation", "city"], as_index=False
-        )["price_in_rp"].sum()
-        OrientPrice = OrientPrice.sort_values(by="price_in_rp", ascending=False)
-        fig = px.bar(
-            OrientPrice,
-            width=400,
-            height=600,
-            x="building_orientation",
-            y="price_in_rp",
-            color="city",
-            text="price_in_rp",
-            title="Harga Properti di Jabodetabek Berdasarkan Orientasi Properti",
-            labels={"building_orientation": "", "price_in_rp": ""},
-        )
-        fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        fig = px.bar(
-            df_filtered["building_orientation"].value_counts(),
-            width=400,
-            height=600,
-            x=df_filtered["building_orientation"].value_counts().index,
-            y=df_filtered["building_orientation"].value_counts().values,
-            title="Banyaknya Properti yang Dijual Berdasarkan Orientasi Properti",
-            labels={"x": "", "y": ""},
-        )
-        fig.update_traces(
-            text=df_filtered["building_orientation"].value_counts().values,
-            textposition="outside",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    # KONDISIIIIIIIII
-    with col1:
-        CondiPrice = df_filtered.groupby(
-            by=["property_condition", "city"], as_index=False
-        )["price_in_rp"].sum()
-        CondiPrice = CondiPrice.sort_values(by="price_in_rp", ascending=False)
-        fig = px.bar(
-            CondiPrice,
-            width=400,
-            height=600,
-            x="property_condition",
-            y="price_in_rp",
-            color="city",
-            text="price_in_rp",
-            title="Harga Properti di Jabodetabek Berdasarkan Kondisi Properti",
-            labels={"property_condition": "", "price_in_rp": ""},
-        )
-        fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
-        st.plotly_chart(fig, use_container_width=True)
-
+        plot("bar_city_price", use_container_width=True)
     with col2:
-        fig = px.bar(
-            df_filtered["property_condition"].value_counts(),
-            width=400,
-            height=600,
-            x=df_filtered["property_condition"].value_counts().index,
-            y=df_filtered["property_condition"].value_counts().values,
-            title="Banyaknya Properti yang Dijual Berdasarkan Kondisi Properti",
-            labels={"x": "", "y": ""},
-        )
-        fig.update_traces(
-            text=df_filtered["property_condition"].value_counts().values,
-            textposition="outside",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col1:
-        CondiPrice = df_filtered.groupby(by=["furnishing", "city"], as_index=False)[
-            "price_in_rp"
-        ].sum()
-        CondiPrice = CondiPrice.sort_values(by="price_in_rp", ascending=False)
-        fig = px.bar(
-            CondiPrice,
-            width=400,
-            height=600,
-            x="furnishing",
-            y="price_in_rp",
-            color="city",
-            text="price_in_rp",
-            title="Harga Properti di Jabodetabek Berdasarkan Kondisi Perabotan",
-            labels={"furnishing": "", "price_in_rp": ""},
-        )
-        fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        fig = px.bar(
-            df_filtered["furnishing"].value_counts(),
-            width=400,
-            height=600,
-            x=df_filtered["furnishing"].value_counts().index,
-            y=df_filtered["furnishing"].value_counts().values,
-            title="Banyaknya Properti yang Dijual Berdasarkan Kondisi Perabotan",
-            labels={"x": "", "y": ""},
-        )
-        fig.update_traces(
-            text=df_filtered["furnishing"].value_counts().values,
-            textposition="outside",
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-
-with korelasiDist:
+        plot("bar_city_count", use_container_width=True)
+
+    # TIPE SERTIFIKAT, ORIENTASI, KONDISI, PERABOTAN
+    for dimension in [
+        "certificate",
+        "building_orientation",
+        "property_condition",
+        "furnishing",
+    ]:
+        with col1:
+            plot(f"bar_{dimension}_price", use_container_width=True)
+        with col2:
+            plot(f"bar_{dimension}_count", use_container_width=True)
+
+
+def tab_korelasi_distribusi(data):
     col1, col2 = st.columns((2))
-    df_filtered["count_bedrooms"] = df_filtered.groupby("bedrooms")[
-        "bedrooms"
-    ].transform("count")
 
     # Korelasi Antara Harga Properti dan Luas Tanah
     with col1:
-        fig_corr_harga_luas_tanah = px.scatter(
-            df_filtered,
-            x="land_size_m2",
-            y="price_in_rp",
-            color="city",
-            title="Korelasi Antara Harga Properti dengan Luas Tanah",
-            labels={"land_size_m2": "Luas Tanah", "price_in_rp": "Harga Properti"},
-        )
-        st.plotly_chart(fig_corr_harga_luas_tanah, use_container_width=True)
+        plot("scatter_land_size", use_container_width=True)
 
     # Korelasi Antara Harga Properti dan Luas Bangunan
     with col2:
-        fig_corr_harga_luas_bangunan = px.scatter(
-            df_filtered,
-            x="building_size_m2",
-            y="price_in_rp",
-            color="city",
-            title="Korelasi Antara Harga Properti dengan Luas Bangunan",
-            labels={
-                "building_size_m2": "Luas Bangunan",
-                "price_in_rp": "Harga Properti",
-            },
-        )
-        st.plotly_chart(fig_corr_harga_luas_bangunan, use_container_width=True)
-
+        plot("scatter_building_size", use_container_width=True)
 
     # DensityPLOT
-    # DensityPLOT
-    # DensityPLOT
-    # DensityPLOT
-    # DensityPLOT
-    # DensityPLOT
-
-    with col1:
-        jumlahByKota = (
-            df_filtered.groupby(["city"]).size().reset_index(name="Jumlah_Properti")
-        )
-        fig = px.density_contour(
-            jumlahByKota,
-            x="city",
-            y="Jumlah_Properti",
-            title="Korelasi Antara Jumlah Properti dengan Kota",
-            labels={"city": "", "Jumlah_Properti": ""},
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        jumlahByCertificate = (
-            df_filtered.groupby(["certificate"])
-            .size()
-            .reset_index(name="Jumlah_Certificate")
-        )
-        fig = px.density_contour(
-            jumlahByCertificate,
-            x="certificate",
-            y="Jumlah_Certificate",
-            title="Korelasi Antara Jumlah Properti dengan Jenis Sertifikat",
-            labels={"certificate": "", "Jumlah_Certificate": ""},
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col1:
-        jumlahByKondisi = (
-            df_filtered.groupby(["property_condition"])
-            .size()
-            .reset_index(name="Jumlah_Kondisi")
-        )
-        fig = px.density_contour(
-            jumlahByKondisi,
-            x="property_condition",
-            y="Jumlah_Kondisi",
-            title="Korelasi Antara Jumlah Properti dengan Kondisi Properti",
-            labels={"property_condition": "", "Jumlah_Kondisi": ""},
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col2:
-        jumlahByOrientasi = (
-            df_filtered.groupby(["building_orientation"])
-            .size()
-            .reset_index(name="Jumlah_Orientasi")
-        )
-        fig = px.density_contour(
-            jumlahByOrientasi,
-            x="building_orientation",
-            y="Jumlah_Orientasi",
-            title="Korelasi Antara Jumlah Properti dengan Orientasi Bangunan",
-            labels={"building_orientation": "", "Jumlah_Orientasi": ""},
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col1:
-        jumlahByFurnish = (
-            df_filtered.groupby(["furnishing"])
-            .size()
-            .reset_index(name="Jumlah_Furnish")
-        )
-        fig = px.density_contour(
-            jumlahByFurnish,
-            x="furnishing",
-            y="Jumlah_Furnish",
-            title="Korelasi Antara Jumlah Properti dengan Kondisi Perabotan",
-            labels={"furnishing": "", "Jumlah_Furnish": ""},
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    for column, dimension in zip(
+        [col1, col2, col1, col2, col1],
+        [
+            "city",
+            "certificate",
+            "property_condition",
+            "building_orientation",
+            "furnishing",
+        ],
+    ):
+        with column:
+            plot(f"contour_{dimension}", use_container_width=True)
 
     # Box Plot
-    fig_box = px.box(
-        df_filtered,
-        x="city",
-        y="price_in_rp",
-        title="Box Plot Harga Properti Berdasarkan Kota",
-        template="seaborn",
-    )
-    fig_box.update_layout(xaxis_title="", yaxis_title="")
-    fig_box.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_box, use_container_width=True)
+    plot("box_city_price", use_container_width=True)
 
     # Violin Plot Harga Properti Berdasarkan Kota
-    jumlahByKotaDist = (
-        df_filtered.groupby(["city", "district", "certificate"])
-        .size()
-        .reset_index(name="jumlah_rumah")
-    )
+    plot("violin_city", use_container_width=True)
 
-    fig_violin = px.violin(
-        jumlahByKotaDist,
-        x="city",
-        y="jumlah_rumah",
-        title="Violin Plot Harga Properti Berdasarkan Kota",
-        template="seaborn",
-    )
-    fig_violin.update_layout(xaxis_title="", yaxis_title="")
-    fig_violin.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_violin, use_container_width=True)
 
-with tren:
+def tab_tren(data):
     col1, col2 = st.columns((2))
 
-    linechartHarga = df_filtered.groupby("year_built")["price_in_rp"].mean().reset_index()
-    linechartHarga2 = df_filtered.groupby("year_built")["price_in_rp"].mean().reset_index()
-
-    linechartHarga['year_built'] = linechartHarga['year_built'].astype(str).str[:4]
-    linechartHarga['price_in_rp'] = (linechartHarga['price_in_rp'] / 1_000_000_000).map('{:.2f}'.format)
-    
-    linechartHarga2['year_built'] = linechartHarga2['year_built'].astype(str).str[:4]
-    linechartHarga2['price_in_rp'] = (linechartHarga2['price_in_rp'] / 1_000_000_000).map('{:.2f}'.format) + ' Miliar'
-
-    fig_tren_harga_waktu = px.area(
-        linechartHarga,
-        x="year_built",
-        y="price_in_rp",
-        title="Tren Rata-Rata Harga Properti berdasarkan Tahun Pembangunan",
-        labels={"year_built": "Tahun Pembangunan", "price_in_rp": "Harga (dalam Miliar Rp)"}
-    )
-
-    st.plotly_chart(fig_tren_harga_waktu, use_container_width=True)
+    plot("trend_price", use_container_width=True)
 
     with st.expander("TimeSerie Rata-Rata Harga Bangunan"):
-        st.write(linechartHarga2.T.style.background_gradient(cmap="Blues"))
-        csv = linechartHarga.to_csv(index=False).encode("UTF-8")
-        st.download_button(
-            "Download Data", data=csv, file_name="TimeSeriesHarga.csv", mime="text/csv"
-        )
+        linechartHarga = trend_price_table(aggregate("year").result())
+        linechartHarga2 = linechartHarga.copy()
+        linechartHarga["price_in_rp"] = (
+            linechartHarga["price_in_rp"] / 1_000_000_000
+        ).map("{:.2f}".format)
+        linechartHarga2["price_in_rp"] = (
+            linechartHarga2["price_in_rp"] / 1_000_000_000
+        ).map("{:.2f}".format) + " Miliar"
 
-properti_per_tahun = df_filtered["year_built"].value_counts().reset_index()
-properti_per_tahun.columns = ["year_built", "jumlah_properti"]
-properti_per_tahun["year_built"] = properti_per_tahun["year_built"].astype(int)
+        with span("table.tren_harga"):
+            st.write(linechartHarga2.T.style.background_gradient(cmap="Blues"))
+        download("tren_harga", lambda: linechartHarga, "TimeSeriesHarga")
 
-fig = px.area(
-    properti_per_tahun,
-    x="year_built",
-    y="jumlah_properti",
-    title="Tren Banyaknya Properti Dijual berdasarkan Tahun Pembangunan",
-    labels={"year_built": "Tahun Pembangunan", "jumlah_properti": "Jumlah Properti"},
-)
-
-fig.update_layout(
-    xaxis=dict(tickformat='d'),
-    yaxis=dict(tickformat='d'),
-)
+    plot("trend_count", use_container_width=True)
 
-st.plotly_chart(fig, use_container_width=True)
+    with st.expander("TimeSeries Jumlah Properti"):
+        properti_per_tahun = trend_count_table(aggregate("year").result())
+        with span("table.tren_jumlah"):
+            st.write(properti_per_tahun.T.style.background_gradient(cmap="Blues"))
+        download("tren_jumlah", lambda: properti_per_tahun, "TimeSeriesJumlahProperti")
 
-with st.expander("TimeSeries Jumlah Properti"):
-    st.write(properti_per_tahun.T.style.background_gradient(cmap="Blues"))
-    csv = properti_per_tahun.to_csv(index=False).encode("UTF-8")
-    st.download_button(
-        "Download Data",
-        data=csv,
-        file_name="TimeSeriesJumlahProperti.csv",
-        mime="text/csv",
-    )
 
-with mapping:
+def tab_mapping(data):
     col1, col2 = st.columns((2))
     # TREE MAP
-    # TREE MAP
-    jumlahByKotaDist = (
-        df_filtered.groupby(["city", "district", "certificate"])
-        .size()
-        .reset_index(name="jumlah_rumah")
-    )
+    plot("treemap", use_container_width=True)
 
-    figTree = px.treemap(
-        jumlahByKotaDist,
-        path=["city", "district", "certificate"],
-        values="jumlah_rumah",
-        hover_data=["city", "district", "certificate", "jumlah_rumah"],
-        color="certificate",
-        color_discrete_sequence=[
-            "#CDE8E5",
-            "#EEF7FF",
-            "#7AB2B2",
-            "#4D869C",
-        ],
-        title="Tree Map Banyaknya Properti yang Dijual",
+    # Distribusi Properti Berdasarkan Koordinat Geografis. Di bawah zoom detail
+    # titik dikirim sebagai cluster grid; detail per listing hanya saat zoom dekat
+    zoom = st.slider(
+        "🔍 Zoom Peta", min_value=8, max_value=16, value=10, key="zoom_peta"
     )
-    figTree.update_layout(width=800, height=1500)
-    st.plotly_chart(figTree, use_container_width=True)
-
-    #
-    # ------------------------
-
-    # Distribusi Properti Berdasarkan Koordinat Geografis
-    df_filtered["address_count"] = df_filtered.groupby(["lat", "long"])[
-        "address"
-    ].transform(
-        "size"
-    )  # Hitung jumlah alamat untuk setiap baris
-    fig_scatter_mapbox = px.scatter_mapbox(
-        df_filtered,
-        lat="lat",
-        lon="long",
-        hover_name="address",
-        color="city",
-        size="address_count",  # Gunakan kolom 'address_count' sebagai ukuran
-        mapbox_style="carto-positron",
-        zoom=10,
-        title="Peta Distribusi Geografis Properti Menurut Jumlah Rumah yang Dijual",
-    )
-    st.plotly_chart(fig_scatter_mapbox, use_container_width=True)
+    if zoom >= settings.MAP_DETAIL_ZOOM:
+        plot("scatter_map", zoom, use_container_width=True)
+    else:
+        plot("cluster_map", zoom, use_container_width=True)
 
     cl1, cl2 = st.columns(2)
     with cl1:
         with st.expander("Data Rumah yang Dijual"):
             jumlahByKotaDist = (
-                df_filtered.groupby(["city", "district"])
-                .size()
-                .reset_index(name="jumlah_rumah")
+                aggregate("cube")
+                .result()
+                .slice(["city", "district"])[["city", "district", "count"]]
+                .rename(columns={"count": "jumlah_rumah"})
             )
-            st.write(jumlahByKotaDist.style.background_gradient(cmap="Blues"))
-            csv = jumlahByKotaDist.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                "Download Data",
-                data=csv,
-                file_name="Data Rumah.csv",
-                mime="text/csv",
-                help="Tekan untuk download data dalam bentuk CSV",
+            with span("table.rumah"):
+                st.write(jumlahByKotaDist.style.background_gradient(cmap="Blues"))
+            download(
+                "rumah",
+                lambda: jumlahByKotaDist,
+                "Data Rumah",
+                help="Tekan untuk download data sesuai filter",
             )
 
     with cl2:
         with st.expander("Data Harga"):
-            city = df_filtered.groupby(by="city", as_index=False)["price_in_rp"].sum()
-            st.write(city.style.background_gradient(cmap="Oranges"))
-            csv = city.to_csv(index=False).encode("utf-8")
-            st.download_button(
-                "Download Data",
-                data=csv,
-                file_name="Data Harga.csv",
-                mime="text/csv",
-                help="Tekan untuk download data dalam bentuk CSV",
+            city = (
+                aggregate("cube")
+                .result()
+                .slice("city")[["city", "price_sum"]]
+                .rename(columns={"price_sum": "price_in_rp"})
+            )
+            with span("table.harga"):
+                st.write(city.style.background_gradient(cmap="Oranges"))
+            download(
+                "harga",
+                lambda: city,
+                "Data Harga",
+                help="Tekan untuk download data sesuai filter",
             )
 
-    # Heatmap
-    # serti
-
-    fig_heatmap = px.density_heatmap(
-        df_filtered,
-        x="city",
-        y="certificate",
-        z="price_in_rp",
-        title="Heatmap Harga Properti Antara Kota dan Jenis Sertifikat",
-        marginal_x="rug",
-        marginal_y="histogram",
-        color_continuous_scale=["#006769", "#40A578", "#9DDE8B", "#E6FF94"],
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    heatmap_data = (
-        df_filtered.groupby(["city", "certificate"]).size().reset_index(name="count")
-    )
-    fig_heatmap = px.density_heatmap(
-        heatmap_data,
-        x="city",
-        y="certificate",
-        z="count",
-        title="Heatmap Jumlah Properti Antara Kota dan Jenis Sertifikat",
-        marginal_x="rug",
-        marginal_y="histogram",
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    # Kondisi
-    fig_heatmap = px.density_heatmap(
-        df_filtered,
-        x="city",
-        y="property_condition",
-        z="price_in_rp",
-        title="Heatmap Harga Properti Antara Kota dan Kondisi Bangunan",
-        marginal_x="rug",
-        marginal_y="histogram",
-        color_continuous_scale=["#006769", "#40A578", "#9DDE8B", "#E6FF94"],
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    heatmap_data = (
-        df_filtered.groupby(["city", "property_condition"])
-        .size()
-        .reset_index(name="count")
-    )
-    fig_heatmap = px.density_heatmap(
-        heatmap_data,
-        x="city",
-        y="property_condition",
-        z="count",
-        title="Heatmap Jumlah Properti Antara Kota dan Kondisi Bangunan",
-        marginal_x="rug",
-        marginal_y="histogram",
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    # orientasi
-    fig_heatmap = px.density_heatmap(
-        df_filtered,
-        x="city",
-        y="building_orientation",
-        z="price_in_rp",
-        title="Heatmap Harga Properti Antara Kota dan Orientasi Bangunan",
-        marginal_x="rug",
-        marginal_y="histogram",
-        color_continuous_scale=["#006769", "#40A578", "#9DDE8B", "#E6FF94"],
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    heatmap_data = (
-        df_filtered.groupby(["city", "building_orientation"])
-        .size()
-        .reset_index(name="count")
-    )
-    fig_heatmap = px.density_heatmap(
-        heatmap_data,
-        x="city",
-        y="building_orientation",
-        z="count",
-        title="Heatmap Jumlah Properti Antara Kota dan Orientasi Bangunan",
-        marginal_x="rug",
-        marginal_y="histogram",
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-
-    # furnish
-
-    fig_heatmap = px.density_heatmap(
-        df_filtered,
-        x="city",
-        y="furnishing",
-        z="price_in_rp",
-        title="Heatmap Harga Properti Antara Kota dan Kondisi Perabotan",
-        marginal_x="rug",
-        marginal_y="histogram",
-        color_continuous_scale=["#006769", "#40A578", "#9DDE8B", "#E6FF94"],
+    # Heatmap: sertifikat, kondisi, orientasi, perabotan
+    for dimension in [
+        "certificate",
+        "property_condition",
+        "building_orientation",
+        "furnishing",
+    ]:
+        plot(f"heatmap_{dimension}_price", use_container_width=True)
+        plot(f"heatmap_{dimension}_count", use_container_width=True)
+
+
+# Dengan LAZY_TABS hanya tab yang sedang dibuka yang dihitung; tab lain
+# baru dibangun saat dipilih (st.tabs memicu rerun ketika tab berganti)
+tabs = st.tabs(
+    ["Summary", "Persentase", "Bar Chart", "Korelasi & Distribusi", "Tren", "Mapping"],
+    key="tab_aktif",
+    on_change="rerun" if settings.LAZY_TABS else "ignore",
+)
+Top_5, persentase, bar_chart, korelasiDist, tren, mapping = tabs
+for tab, render in [
+    (Top_5, tab_summary),
+    (persentase, tab_persentase),
+    (bar_chart, tab_bar_chart),
+    (korelasiDist, tab_korelasi_distribusi),
+    (tren, tab_tren),
+    (mapping, tab_mapping),
+]:
+    if settings.LAZY_TABS and not tab.open:
+        continue
+    with tab, span(f"tab.{render.__name__}"):
+        render(chart_data)
+
+with home, span("summary"):
+    Home(summary_task.result())
+show_charts(wait=True)
+
+with st.sidebar.expander("⏱ Waktu Filter", expanded=False):
+    st.dataframe(filter_state.timing_frame(), hide_index=True)
+    facet_hits, facet_misses = backend.facet_stats()
+    st.caption(f"Cache opsi filter: {facet_hits} hit / {facet_misses} miss")
+    st.caption(f"Agregasi: {backend.passes - passes_before} pass atas baris data")
+    # Dataset dan indeks dipakai bersama semua session (read-only); session
+    # hanya memegang vektor seleksi dan kolom baris yang dibaca chart
+    if dataset is None:
+        shared = "dataset tetap di file Parquet"
+    else:
+        shared = f"dataset bersama: {dataset.memory_bytes / 1024 ** 2:.1f} MB"
+    st.caption(f"Memori session: {chart_data.memory_bytes() / 1024:,.0f} KB, {shared}")
+    figure_stats = figure_cache.stats()
+    st.caption(
+        f"Cache figure: {figure_stats['hits']} hit / {figure_stats['misses']} miss, "
+        f"{figure_stats['entries']} figure ({figure_stats['bytes'] / 1024 ** 2:.1f} MB)"
     )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
 
-    heatmap_data = (
-        df_filtered.groupby(["city", "furnishing"]).size().reset_index(name="count")
-    )
-    fig_heatmap = px.density_heatmap(
-        heatmap_data,
-        x="city",
-        y="furnishing",
-        z="count",
-        title="Heatmap Jumlah Properti Antara Kota dan Kondisi Perabotan",
-        marginal_x="rug",
-        marginal_y="histogram",
-    )
-    fig_heatmap.update_xaxes(title=None, tickangle=45)
-    fig_heatmap.update_yaxes(title=None)
-    st.plotly_chart(fig_heatmap, use_container_width=True)
+if metrics.enabled:
+    # Panel developer (VISDAT_INSTRUMENTATION=1): histogram latensi per span
+    # untuk semua session di proses ini
+    with st.sidebar.expander("🛠 Timing Span (developer)", expanded=False):
+        st.dataframe(metrics.frame(), hide_index=True)
+        json_column, prometheus_column = st.columns(2)
+        json_column.download_button(
+            "JSON",
+            data=metrics.to_json,
+            file_name="visdat_metrics.json",
+            mime="application/json",
+            key="metrics_json",
+        )
+        prometheus_column.download_button(
+            "Prometheus",
+            data=metrics.to_prometheus,
+            file_name="visdat_metrics.prom",
+            mime="text/plain",
+            key="metrics_prometheus",
+        )
+        if st.button("Reset", key="metrics_reset"):
+            metrics.reset()
@@ -0,0 +1,397 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from filters import spec_columns
+from geo_index import GeoIndex
+from instrumentation import span
+from sketches import LogBuckets, QuantileSketch
+
+# Dimensi cube bersama untuk tab Persentase, Bar Chart, Korelasi dan Mapping
+CUBE_DIMENSIONS = [
+    "city",
+    "district",
+    "certificate",
+    "property_condition",
+    "building_orientation",
+    "furnishing",
+]
+YEAR_DIMENSIONS = ["year_built"]
+# Kolom id listing untuk KPI "jumlah properti" (distinct, lewat kode integer)
+DISTINCT_COLUMN = "url"
+
+
+class GroupTable:
+    # Setiap baris dipetakan sekali ke id grup (kombinasi nilai dimensi),
+    # sehingga agregasi per filter cukup satu bincount atas id tersebut.
+    def __init__(self, engine, dimensions):
+        self.dimensions = list(dimensions)
+        group_ids = np.zeros(engine.rows, dtype=np.int64)
+        for column in self.dimensions:
+            codes, uniques = engine.codes(column)
+            group_ids = group_ids * (len(uniques) + 1) + (codes + 1)
+            group_ids = pd.factorize(group_ids)[0]
+        first_rows = np.unique(group_ids, return_index=True)[1]
+        self.group_ids = group_ids
+        self.size = len(first_rows)
+        self.key_codes = np.column_stack(
+            [engine.codes(column)[0][first_rows] for column in self.dimensions]
+        )
+        self.keys = self._keys(engine, self.key_codes)
+        self._groups = None
+
+    def _keys(self, engine, key_codes):
+        keys = {}
+        for position, column in enumerate(self.dimensions):
+            codes = key_codes[:, position]
+            uniques = engine.codes(column)[1]
+            values = np.asarray(uniques, dtype=object)[np.maximum(codes, 0)]
+            values[codes < 0] = None
+            keys[column] = values
+        return pd.DataFrame(keys, columns=self.dimensions)
+
+    def updated(self, engine, rows):
+        # Tabel baru setelah upsert: baris yang berubah/ditambah dipetakan ke
+        # grup yang sudah ada lewat kombinasi kodenya; kombinasi baru menjadi
+        # grup baru di akhir. Tabel lama tidak diubah.
+        if self._groups is None:
+            groups = {tuple(key): group for group, key in enumerate(self.key_codes)}
+        else:
+            groups = dict(self._groups)
+        table = copy.copy(self)
+        table._groups = groups
+        row_codes = np.column_stack(
+            [engine.codes(column)[0][rows] for column in self.dimensions]
+        )
+        new_keys = []
+        row_groups = np.empty(len(rows), dtype=np.int64)
+        for position, key in enumerate(map(tuple, row_codes)):
+            group = table._groups.get(key)
+            if group is None:
+                group = table._groups[key] = self.size + len(new_keys)
+                new_keys.append(key)
+            row_groups[position] = group
+        group_ids = np.zeros(engine.rows, dtype=np.int64)
+        group_ids[: len(self.group_ids)] = self.group_ids
+        group_ids[rows] = row_groups
+        if new_keys:
+            new_keys = np.array(new_keys, dtype=self.key_codes.dtype)
+            table.key_codes = np.vstack([self.key_codes, new_keys])
+            table.keys = pd.concat(
+                [self.keys, self._keys(engine, new_keys)], ignore_index=True
+            )
+            table.size = self.size + len(new_keys)
+        table.group_ids = group_ids
+        return table
+
+
+# Cube ikut dikirim worker process (pickle), jadi lock-nya tingkat modul
+_matrix_lock = threading.Lock()
+
+
+class Cube:
+    # Hasil count/sum harga per grup untuk satu state filter. Chart cukup
+    # memotong (slice) cube ini, tidak perlu groupby atas baris data lagi.
+    # Frame: satu baris per grup berisi kolom dimensi, count, price_sum,
+    # price_min dan price_max; distinct = jumlah id listing unik.
+    def __init__(self, dimensions, frame, distinct=None):
+        self.dimensions = list(dimensions)
+        self.frame = frame
+        self.distinct = distinct
+        self._matrices = {}
+
+    def slice(self, dimensions):
+        if isinstance(dimensions, str):
+            dimensions = [dimensions]
+        result = self.frame.groupby(dimensions, as_index=False).agg(
+            count=("count", "sum"),
+            price_sum=("price_sum", "sum"),
+            price_min=("price_min", "min"),
+            price_max=("price_max", "max"),
+        )
+        result["price_mean"] = result["price_sum"] / result["count"]
+        return result
+
+    def summary(self):
+        # KPI header digabung dari partial per grup, tanpa menyentuh baris data
+        count = int(self.frame["count"].sum())
+        price_sum = self.frame["price_sum"].sum()
+        return {
+            "count": count,
+            "distinct": self.distinct,
+            "price_mean": price_sum / count if count else np.nan,
+            "price_min": self.frame["price_min"].min(),
+            "price_max": self.frame["price_max"].max(),
+        }
+
+    def matrix(self, x, y, value="count"):
+        # Matriks kontingensi (baris = nilai y, kolom = nilai x) dari partial
+        # per grup: satu bincount atas kode kategori, disimpan per cube
+        key = (x, y, value)
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            return matrix
+        frame = self.frame.dropna(subset=[x, y])
+        x_codes, x_values = pd.factorize(frame[x], sort=True)
+        y_codes, y_values = pd.factorize(frame[y], sort=True)
+        cells = np.bincount(
+            y_codes * len(x_values) + x_codes,
+            weights=frame[value].to_numpy(dtype="float64"),
+            minlength=len(y_values) * len(x_values),
+        )
+        matrix = pd.DataFrame(
+            cells.reshape(len(y_values), len(x_values)),
+            index=pd.Index(y_values, name=y),
+            columns=pd.Index(x_values, name=x),
+        )
+        # Cube dibagi antar thread chart: dict baru dipasang dengan satu
+        # assignment, pembaca tidak pernah melihat dict yang sedang diubah
+        with _matrix_lock:
+            matrices = dict(self._matrices)
+            matrix = matrices.setdefault(key, matrix)
+            self._matrices = matrices
+        return matrix
+
+    def counts(self, dimension):
+        # Setara df[dimension].value_counts()
+        result = self.slice(dimension).set_index(dimension)["count"]
+        return result.sort_values(ascending=False)
+
+
+def cube_frame(table, counts, price_sums, price_mins, price_maxs):
+    present = counts > 0
+    frame = table.keys[present].reset_index(drop=True)
+    frame["count"] = counts[present]
+    frame["price_sum"] = price_sums[present]
+    frame["price_min"] = price_mins[present]
+    frame["price_max"] = price_maxs[present]
+    return frame
+
+
+class AggregateIndex:
+    # Struktur turunan untuk satu versi dataset: engine filter, harga dan
+    # bucket sketch per baris, tabel grup cube dan indeks grid peta. Upsert
+    # membangun versi baru lewat updated() (struktur yang tidak terdampak
+    # dipakai bersama); versi lama tidak pernah diubah karena state filter
+    # session lain mungkin masih memakainya.
+    def __init__(self, engine, buckets):
+        self.engine = engine
+        self.buckets = buckets
+        # Nomor urut versi, bagian dari kunci cache agregasi
+        self.generation = 0
+        # Versi dataset yang sudah diterapkan (lihat data_loader.Dataset.upsert)
+        self.version = 0
+        self.row_version = 0
+        self.column_versions = {}
+        self.prices = engine.frame["price_in_rp"].to_numpy(dtype="float64")
+        # Bucket sketch kuantil harga per baris dihitung sekali
+        self.price_buckets = self._price_buckets(slice(None))
+        self.tables = {
+            "cube": GroupTable(engine, CUBE_DIMENSIONS),
+            "year": GroupTable(engine, YEAR_DIMENSIONS),
+        }
+        self.geo = GeoIndex(engine.frame["lat"], engine.frame["long"])
+        # Kode lokasi (lat, long) per baris, dibangun saat pertama dipakai
+        self.locations = None
+
+    def _price_buckets(self, rows):
+        # Harga <= 0 (tidak valid) tidak masuk sketch
+        return self.buckets.index(np.maximum(self.prices[rows], 1))
+
+    def updated(self, frame, change):
+        # Versi baru untuk upsert yang belum diterapkan: hanya baris yang
+        # berubah/ditambah yang dihitung ulang
+        index = copy.copy(self)
+        index.generation = self.generation + 1
+        index.engine = self.engine.updated(frame, change)
+        index.tables = {
+            name: table.updated(index.engine, change.rows)
+            for name, table in self.tables.items()
+        }
+        index.prices = frame["price_in_rp"].to_numpy(dtype="float64")
+        if change.grown or "price_in_rp" in change.columns:
+            price_buckets = np.zeros(len(index.prices), dtype=np.int64)
+            price_buckets[: len(self.price_buckets)] = self.price_buckets
+            price_buckets[change.rows] = index._price_buckets(change.rows)
+            index.price_buckets = price_buckets
+        if change.grown or change.columns & {"lat", "long"}:
+            index.geo = self.geo.updated(frame["lat"], frame["long"], change.rows)
+            index.locations = None
+        return index
+
+    def tracking(self, dataset):
+        # Salinan yang mencatat versi dataset yang sudah tercermin di sini
+        index = copy.copy(self)
+        index.version = dataset.version
+        index.row_version = dataset.row_version
+        index.column_versions = dict(dataset.column_versions)
+        return index
+
+
+class Aggregator:
+    # Backend pandas: filter lewat FilterEngine (mask), agregasi lewat bincount.
+    # Backend lain (sql_backend) memakai antarmuka yang sama: start, cube,
+    # clusters, rows, page dan facet_stats.
+    def __init__(self, engine, content_hash=None, max_entries=32):
+        self.content_hash = content_hash
+        self.base_hash = content_hash
+        self.columns = list(engine.frame.columns)
+        self.max_entries = max_entries
+        self.buckets = LogBuckets()
+        # Versi struktur terbaru; upsert memasang versi baru dengan satu
+        # assignment sehingga pembaca selalu melihat satu versi yang utuh
+        self.index = AggregateIndex(engine, self.buckets)
+        # Jumlah lintasan (pass) atas baris data, untuk ditampilkan per rerun
+        self.passes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        # State mengingat versi tempat mask-nya dibangun; agregasinya tetap
+        # memakai versi itu walau upsert diterapkan di tengah rerun
+        index = self.index
+        state = index.engine.start()
+        state.index = index
+        return state
+
+    def refresh(self, dataset):
+        # Terapkan upsert yang belum diterapkan secara incremental
+        with self._lock:
+            change = dataset.changes_since(self.index.version)
+            if change is None:
+                return self
+            index = self.index.updated(dataset.frame, change).tracking(dataset)
+            self.index = index
+            self.content_hash = dataset.content_hash
+            # Cube lama dihitung dari data sebelum upsert
+            self._entries.clear()
+        return self
+
+    def track(self, dataset):
+        # Catat versi dataset yang sudah tercermin di struktur backend ini
+        with self._lock:
+            self.index = self.index.tracking(dataset)
+            self.content_hash = dataset.content_hash
+        return self
+
+    def data_key(self, columns, state):
+        # Kunci cache figure: hanya berubah jika kolom yang dibaca chart atau
+        # kolom filter aktifnya berubah (atau ada baris baru)
+        index = state.index
+        columns = set(columns) | spec_columns(state.spec)
+        versions = tuple(
+            (column, index.column_versions.get(column, 0)) for column in sorted(columns)
+        )
+        return self.base_hash, index.row_version, versions
+
+    def cube(self, state, name="cube"):
+        # Satu cube per state filter; state yang sama diambil dari LRU
+        index = state.index
+        mask = state.mask
+
+        def build():
+            table = index.tables[name]
+            group_ids = table.group_ids[mask]
+            prices = index.prices[mask]
+            counts = np.bincount(group_ids, minlength=table.size)
+            price_sums = np.bincount(group_ids, weights=prices, minlength=table.size)
+            price_mins = np.full(table.size, np.inf)
+            np.minimum.at(price_mins, group_ids, prices)
+            price_maxs = np.full(table.size, -np.inf)
+            np.maximum.at(price_maxs, group_ids, prices)
+            frame = cube_frame(table, counts, price_sums, price_mins, price_maxs)
+            distinct = self._distinct(state) if name == "cube" else None
+            return Cube(table.dimensions, frame, distinct)
+
+        return self._cached((name, state.spec.fingerprint(), index.generation), build)
+
+    def _distinct(self, state):
+        # Id listing di-intern sekali (kode integer), distinct = jumlah kode
+        # yang muncul; tidak ada hashing string per rerun
+        codes, uniques = state.engine.codes(DISTINCT_COLUMN)
+        codes = codes[state.mask]
+        seen = np.zeros(len(uniques), dtype=bool)
+        seen[codes[codes >= 0]] = True
+        return int(seen.sum())
+
+    def summary(self, state):
+        return self.cube(state).summary()
+
+    def sketch(self, state, dimension):
+        # Sketch kuantil harga per kategori untuk satu state filter
+        index = state.index
+
+        def build():
+            codes, uniques = state.engine.codes(dimension)
+            selected = state.mask & (codes >= 0) & (index.prices > 0)
+            return QuantileSketch.build(
+                self.buckets,
+                codes[selected],
+                uniques,
+                index.price_buckets[selected],
+                index.prices[selected],
+            )
+
+        key = ("sketch", dimension, state.spec.fingerprint(), index.generation)
+        return self._cached(key, build)
+
+    def clusters(self, state, level):
+        # Cluster peta (count, sum, rata-rata harga) per sel grid di level tsb
+        index = state.index
+        return self._cached(
+            ("geo", level, state.spec.fingerprint(), index.generation),
+            lambda: index.geo.clusters(state.mask, level, index.prices),
+        )
+
+    def rows(self, state, columns=None):
+        return state.take(columns)
+
+    def address_counts(self, state):
+        # Jumlah listing per koordinat (lat, long) di antara baris terfilter,
+        # urut seperti rows(state); NaN untuk baris tanpa koordinat
+        index = state.index
+        locations = index.locations
+        if locations is None:
+            frame = state.engine.frame
+            locations = frame.groupby(["lat", "long"]).ngroup().to_numpy()
+            # Indeks yang sudah dipegang state tidak diubah: salinan berisi
+            # kode lokasi dipasang dengan satu assignment (copy-on-write)
+            with self._lock:
+                current = self.index
+                if current.generation == index.generation:
+                    current = copy.copy(current)
+                    current.locations = locations
+                    self.index = current
+        codes = locations[state.mask]
+        located = codes >= 0
+        counts = np.bincount(codes[located])
+        result = np.full(len(codes), np.nan)
+        result[located] = counts[codes[located]]
+        return result
+
+    def page(self, state, column, descending, search, page, page_size):
+        # Satu halaman tabel dan jumlah total baris yang cocok
+        row_ids = state.sorted_rows(column, descending, search)
+        start = (page - 1) * page_size
+        return state.engine.frame.take(row_ids[start : start + page_size]), len(row_ids)
+
+    def facet_stats(self):
+        facets = self.index.engine.facets
+        return facets.hits, facets.misses
+
+    def _cached(self, key, build):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        with span(f"aggregate.{key[0]}"):
+            value = build()
+        with self._lock:
+            self.passes += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import settings
+from aggregates import Aggregator
+from charts import CHARTS, ChartData
+from data_loader import (
+    DEFAULT_DATASET,
+    apply_dtypes,
+    load_dataset,
+    read_snapshot,
+    write_snapshot,
+)
+from filters import ADVANCED_FILTER_WIDGETS, FILTER_STAGES, FilterEngine
+from process_backend import ProcessBackend
+import sql_backend
+from synthetic import ListingModel, generate
+
+# Contoh:
+#   python benchmark.py
+#   python benchmark.py --rows 10000 100000 --sessions 5 --backend duckdb
+#   python benchmark.py --record sesi.jsonl --rows 10000
+#   python benchmark.py --replay sesi.jsonl --json hasil.json
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+STAGES = [
+    "load",
+    "index",
+    "filter",
+    "summary",
+    "aggregate",
+    "figure",
+    "render",
+    "table",
+]
+# Argumen tambahan chart yang butuh parameter (zoom peta)
+CHART_ARGS = {"scatter_map": (settings.MAP_DETAIL_ZOOM,), "cluster_map": (10,)}
+# Kolom id listing yang dibuat unik ulang saat dataset diperbesar
+ID_COLUMNS = ["url", "ads_id"]
+
+
+def scale_frame(frame, rows, seed=0):
+    # Dataset diperbesar dengan sampling ulang baris asli; id listing dibuat
+    # unik dan harga/luas/koordinat diberi jitter kecil supaya tidak kembar
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, len(frame), rows)
+    positions[: min(rows, len(frame))] = np.arange(min(rows, len(frame)))
+    scaled = frame.iloc[positions].reset_index(drop=True)
+    copies = np.arange(rows) // len(frame)
+    for column in ID_COLUMNS:
+        if column in scaled.columns:
+            values = scaled[column].astype(str)
+            scaled[column] = values.where(
+                copies == 0, values + "#" + copies.astype(str)
+            )
+    for column in ["price_in_rp", "land_size_m2", "building_size_m2"]:
+        noise = np.where(copies == 0, 1.0, rng.lognormal(0, 0.05, rows))
+        scaled[column] = (scaled[column] * noise).round().astype(scaled[column].dtype)
+    for column in ["lat", "long"]:
+        noise = np.where(copies == 0, 0.0, rng.normal(0, 0.002, rows))
+        scaled[column] = scaled[column] + noise
+    return scaled
+
+
+def synthetic_frame(source, rows, seed=0):
+    # Listing baru dari model statistik dataset asli (lihat synthetic.py)
+    chunks = generate(ListingModel(source), rows, seed=seed)
+    return apply_dtypes(pd.concat(chunks, ignore_index=True))
+
+
+def sample_values(rng, options, most):
+    options = pd.Index(options).tolist()
+    if not options:
+        return []
+    size = int(rng.integers(1, min(most, len(options)) + 1))
+    return [options[i] for i in rng.choice(len(options), size, replace=False)]
+
+
+def sample_range(rng, bounds):
+    if bounds is None or bounds[0] == bounds[1]:
+        return None
+    low, high = sorted(rng.uniform(bounds[0], bounds[1], 2))
+    return [float(np.floor(low)), float(np.ceil(high))]
+
+
+def synthetic_sessions(backend, sessions, steps, seed=0):
+    # Sesi sintetis: setiap langkah menambah satu pilihan filter seperti klik
+    # pengguna (kota, kawasan, fasilitas, harga, atau filter lanjutan acak).
+    # Satu langkah = spesifikasi filter lengkap {kolom: nilai}.
+    rng = np.random.default_rng(seed)
+    choices = ["city", "district", "facilities", "price_in_rp"] + [
+        column for column, _, _ in ADVANCED_FILTER_WIDGETS
+    ]
+    result = []
+    for _ in range(sessions):
+        current, session = {}, []
+        for _ in range(steps):
+            column = choices[int(rng.integers(len(choices)))]
+            state = apply_spec(backend, current)
+            kind = dict(FILTER_STAGES)[column]
+            if kind == "range":
+                value = sample_range(rng, state.bounds(column))
+            elif kind == "facilities":
+                value = sample_values(rng, state.facility_options(), 2)
+            else:
+                value = sample_values(rng, state.options(column), 3)
+            # Pilihan yang mengosongkan hasil dilewati (UI hanya menawarkan
+            # opsi yang masih ada, tetapi rentang bisa jatuh di celah data)
+            if (
+                value
+                and backend.summary(apply_spec(backend, {**current, column: value}))[
+                    "count"
+                ]
+            ):
+                current = {**current, column: value}
+            session.append(current)
+        result.append(session)
+    return result
+
+
+def apply_spec(backend, values):
+    # Menjalankan tahap filter dalam urutan sidebar, termasuk query opsi dan
+    # batas widget yang dilakukan UI di setiap rerun
+    state = backend.start()
+    for column, kind in FILTER_STAGES:
+        if kind == "range":
+            state.bounds(column)
+            value = values.get(column) or (None, None)
+        elif kind == "facilities":
+            state.facility_options()
+            value = values.get(column, [])
+        else:
+            state.options(column)
+            value = values.get(column, [])
+        state.add(column, kind, value)
+    return state
+
+
+class Recorder:
+    # Latensi dan puncak memori (tracemalloc) per tahap
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.seconds = {}
+        self.peaks = {}
+
+    def run(self, stage, work):
+        if self.memory:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = work()
+        self.seconds.setdefault(stage, []).append(time.perf_counter() - start)
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1] - current
+            self.peaks[stage] = max(self.peaks.get(stage, 0), peak)
+        return result
+
+    def report(self, rows):
+        return [
+            {
+                "rows": rows,
+                "stage": stage,
+                "n": len(self.seconds[stage]),
+                "p50_ms": float(np.percentile(self.seconds[stage], 50) * 1000),
+                "p95_ms": float(np.percentile(self.seconds[stage], 95) * 1000),
+                "peak_mb": self.peaks.get(stage, np.nan) / 1024**2,
+            }
+            for stage in STAGES
+            if stage in self.seconds
+        ]
+
+
+def build_backend(kind, frame, content_hash, workdir, database="", workers=0):
+    if kind == "pandas":
+        return Aggregator(FilterEngine(frame), content_hash)
+    if kind == "process":
+        return ProcessBackend(workers).sync(frame, content_hash)
+    if kind == "sqlite":
+        database = database or os.path.join(workdir, "benchmark.sqlite")
+    elif kind == "duckdb":
+        database = database or os.path.join(workdir, "benchmark.parquet")
+        sql_backend.write_parquet(frame, database, content_hash)
+    return sql_backend.connect(kind, database).sync(frame, content_hash)
+
+
+def run_step(recorder, backend, values, charts):
+    state = recorder.run("filter", lambda: apply_spec(backend, values))
+    recorder.run("summary", lambda: backend.summary(state))
+    recorder.run(
+        "aggregate",
+        lambda: (
+            backend.cube(state),
+            backend.cube(state, "year"),
+            backend.clusters(state, 12),
+            backend.sketch(state, "city"),
+        ),
+    )
+    data = ChartData(
+        backend,
+        state,
+        settings.EXACT_QUANTILE_ROWS,
+        settings.SCATTER_WEBGL_ROWS,
+        settings.SCATTER_MAX_POINTS,
+        settings.SCATTER_SAMPLING,
+    )
+    for chart_id in charts:
+        args = CHART_ARGS.get(chart_id, ())
+        fig = recorder.run("figure", lambda: CHARTS[chart_id](data, *args))
+        recorder.run("render", fig.to_json)
+    recorder.run("table", lambda: backend.page(state, "price_in_rp", True, "", 1, 50))
+
+
+def run_scale(args, source, rows, sessions, workdir):
+    recorder = Recorder(args.memory)
+    # Dataset sintetis ditulis sebagai snapshot, lalu dibaca seperti dashboard
+    snapshot = os.path.join(workdir, f"benchmark_{rows}.feather")
+    scale = synthetic_frame if args.generator == "model" else scale_frame
+    write_snapshot(scale(source, rows, args.seed), snapshot)
+    frame, content_hash = recorder.run("load", lambda: read_snapshot(snapshot))
+    backend = recorder.run(
+        "index",
+        lambda: build_backend(
+            args.backend, frame, content_hash, workdir, args.database, args.workers
+        ),
+    )
+    if sessions is None:
+        sessions = synthetic_sessions(
+            Aggregator(FilterEngine(frame)), args.sessions, args.steps, args.seed
+        )
+    for session in sessions:
+        for values in session:
+            run_step(recorder, backend, values, args.charts)
+    return recorder.report(rows), sessions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark headless pipeline dashboard (filter, agregasi, figure)"
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET,
+        help=f"Dataset sumber (default: {DEFAULT_DATASET})",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=DEFAULT_ROWS,
+        help="Ukuran dataset sintetis (default: 10000 100000 1000000)",
+    )
+    parser.add_argument(
+        "--backend",
+        default="pandas",
+        choices=["pandas", "process", "sqlite", "postgres", "duckdb"],
+        help="Backend filter & agregasi (default: pandas)",
+    )
+    parser.add_argument(
+        "--database", default="", help="Path SQLite/Parquet atau DSN Postgres"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.WORKERS,
+        help="Jumlah proses worker untuk --backend process (default: jumlah CPU)",
+    )
+    parser.add_argument(
+        "--sessions", type=int, default=3, help="Jumlah sesi sintetis (default: 3)"
+    )
+    parser.add_argument(
+        "--steps", type=int, default=5, help="Langkah filter per sesi (default: 5)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--generator",
+        default="resample",
+        choices=["resample", "model"],
+        help="Cara memperbesar dataset: sampling ulang listing asli atau model"
+        " statistik synthetic.py (default: resample)",
+    )
+    parser.add_argument(
+        "--charts",
+        nargs="+",
+        default=list(CHARTS),
+        choices=list(CHARTS),
+        metavar="CHART",
+        help="Chart yang dibangun per langkah (default: semua)",
+    )
+    parser.add_argument(
+        "--replay", help="File JSON lines berisi sesi filter yang diputar ulang"
+    )
+    parser.add_argument("--record", help="Simpan sesi sintetis ke file JSON lines")
+    parser.add_argument("--json", help="Simpan hasil benchmark ke file JSON")
+    parser.add_argument(
+        "--no-memory",
+        dest="memory",
+        action="store_false",
+        help="Tanpa tracemalloc (latensi lebih bersih, tanpa puncak memori)",
+    )
+    args = parser.parse_args()
+
+    sessions = None
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as replay:
+            sessions = [json.loads(line) for line in replay if line.strip()]
+
+    source = load_dataset(args.dataset).frame
+    if args.memory:
+        tracemalloc.start()
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            report, used = run_scale(args, source, rows, sessions, workdir)
+            results.extend(report)
+            print(pd.DataFrame(report).to_string(index=False, float_format="%.1f"))
+            if args.record and sessions is None:
+                with open(args.record, "w", encoding="utf-8") as record:
+                    for session in used:
+                        record.write(json.dumps(session) + "\n")
+            # Sesi yang sama diputar untuk ukuran berikutnya
+            sessions = used
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"backend": args.backend, "results": results}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
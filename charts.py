@@ -0,0 +1,657 @@
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from geo_index import level_for_zoom
+from sampling import thin_points
+
+# Semua figure dashboard dibangun di sini dari cube/frame hasil filter, sehingga
+# bisa di-cache per (chart id, state filter) dan dipakai di luar Streamlit.
+
+HEATMAP_SCALE = ["#006769", "#40A578", "#9DDE8B", "#E6FF94"]
+
+
+class ChartData:
+    # Data untuk satu state filter. Cube dan frame baris baru dihitung saat
+    # ada chart yang membutuhkannya (figure dari cache tidak memicu apa pun).
+    # Frame baris hanya berisi kolom yang dibaca chart, bukan salinan penuh.
+    def __init__(
+        self,
+        backend,
+        state,
+        exact_rows=0,
+        webgl_rows=1000,
+        max_points=0,
+        sampling="density",
+    ):
+        self.backend = backend
+        self.state = state
+        # Di bawah batas ini kuantil dihitung persis dari baris mentah
+        self.exact_rows = exact_rows
+        # Scatter di atas webgl_rows titik digambar dengan WebGL; max_points > 0
+        # menipiskan titik scatter di server (outlier selalu ikut)
+        self.webgl_rows = webgl_rows
+        self.max_points = max_points
+        self.sampling = sampling
+        self._frames = {}
+
+    @property
+    def cube(self):
+        return self.backend.cube(self.state)
+
+    @property
+    def year_cube(self):
+        return self.backend.cube(self.state, "year")
+
+    @property
+    def frame(self):
+        # Semua kolom (dipakai unduhan data)
+        return self.rows()
+
+    def rows(self, columns=None):
+        key = None if columns is None else tuple(columns)
+        if key not in self._frames:
+            self._frames[key] = self.backend.rows(self.state, columns)
+        return self._frames[key]
+
+    def address_counts(self):
+        return self.backend.address_counts(self.state)
+
+    def clusters(self, level):
+        return self.backend.clusters(self.state, level)
+
+    def sketch(self, dimension):
+        return self.backend.sketch(self.state, dimension)
+
+    def points(self, x, y):
+        # Baris scatter (setelah penipisan bila aktif) dan jumlah titik asli
+        frame = self.rows([x, y, "city"])
+        if not self.max_points or len(frame) <= self.max_points:
+            return frame, len(frame)
+        rows = thin_points(frame[x], frame[y], self.max_points, self.sampling)
+        return frame.iloc[rows], len(frame)
+
+    def render_mode(self, points):
+        return "webgl" if points > self.webgl_rows else "svg"
+
+    def exact_quantiles(self):
+        return self.cube.summary()["count"] <= self.exact_rows
+
+    def memory_bytes(self):
+        # Memori milik session ini: vektor seleksi filter + frame baris chart
+        frames = sum(
+            int(frame.memory_usage(deep=True).sum()) for frame in self._frames.values()
+        )
+        return self.state.memory_bytes() + frames
+
+
+# Summary
+def top_district_price(data):
+    topChartHarga = data.cube.slice("district").rename(
+        columns={"price_sum": "price_in_rp"}
+    )
+    topChartHarga = topChartHarga.sort_values(by="price_in_rp", ascending=True)
+    topChartHarga = topChartHarga.tail(5)
+
+    fig = px.bar(
+        topChartHarga,
+        x="price_in_rp",
+        y="district",
+        title="Top 5 Kecamatan dengan Total Harga Properti Tertinggi",
+        template="seaborn",
+        barmode="group",
+        text="price_in_rp",
+        labels={"price_in_rp": "", "district": ""},
+    )
+    fig.update_traces(texttemplate="%{text}", textposition="inside")
+    return fig
+
+
+def top_district_count(data):
+    topChartJumlah = data.cube.slice("district").rename(
+        columns={"count": "jumlah_rumah"}
+    )
+    topChartJumlah = topChartJumlah.sort_values(by="jumlah_rumah", ascending=True)
+    topChartJumlah = topChartJumlah.tail(5)
+
+    fig = px.bar(
+        topChartJumlah,
+        x="jumlah_rumah",
+        y="district",
+        title="Top 5 Kecamatan dengan Jumlah Properti yang Dijual Tertinggi",
+        template="seaborn",
+        barmode="group",
+        text="jumlah_rumah",
+        labels={"jumlah_rumah": "", "district": ""},
+    )
+    fig.update_traces(texttemplate="%{text}", textposition="inside")
+    return fig
+
+
+# PIECHART
+PIE_TITLES = {
+    "city": "Persentase Jumlah Properti Berdasarkan Kota",
+    "certificate": "Persentase Jumlah Properti Berdasarkan Tipe Sertifikat",
+    "building_orientation": "Persentase Jumlah Properti Berdasarkan Orientasi Bangunan",
+    "property_condition": "Persentase Jumlah Properti Berdasarkan Kondisi Bangunan",
+    "furnishing": "Persentase Jumlah Properti Berdasarkan Kondisi Perabotan",
+}
+
+
+def pie(data, dimension):
+    counts = data.cube.counts(dimension)
+    if dimension == "certificate":
+        fig = px.pie(
+            counts,
+            hole=0.7,
+            values=counts.values,
+            names=counts.index,
+            title=PIE_TITLES[dimension],
+        )
+        fig.add_annotation(
+            dict(
+                x=0.5,
+                y=0.5,
+                align="center",
+                xref="paper",
+                yref="paper",
+                showarrow=False,
+                font_size=30,
+                text="Certificate",
+            )
+        )
+        return fig
+
+    fig = px.pie(
+        counts,
+        values=counts.values,
+        names=counts.index,
+        title=PIE_TITLES[dimension],
+    )
+    if dimension in ("city", "building_orientation"):
+        fig.update_traces(textinfo="percent", textposition="outside")
+    else:
+        fig.update_traces(textinfo="label+percent", textposition="outside")
+        fig.update_layout(showlegend=False)
+    return fig
+
+
+# Sunburst Chart
+def sunburst_price(data):
+    hargaByKotaDist = data.cube.slice(["city", "district"])
+    fig = px.sunburst(
+        hargaByKotaDist,
+        width=1000,
+        height=1000,
+        path=["city", "district"],
+        values="price_sum",
+    )
+    fig.update_layout(title="Harga Properti Berdasarkan Kota dan Kecamatan")
+    return fig
+
+
+def sunburst_count(data):
+    jumlahByKotaDist = data.cube.slice(["city", "district"]).rename(
+        columns={"count": "jumlah_rumah"}
+    )
+    fig = px.sunburst(
+        jumlahByKotaDist,
+        width=1000,
+        height=1000,
+        path=["city", "district"],
+        values="jumlah_rumah",
+    )
+    fig.update_layout(title="Jumlah Properti Berdasarkan Kota dan Kecamatan")
+    return fig
+
+
+# BAR
+BAR_TITLES = {
+    "certificate": "Tipe Sertifikat",
+    "building_orientation": "Orientasi Properti",
+    "property_condition": "Kondisi Properti",
+    "furnishing": "Kondisi Perabotan",
+}
+
+
+def bar_city_price(data):
+    cityPrice = data.cube.slice("city").rename(columns={"price_mean": "price_in_rp"})
+    cityPrice = cityPrice.sort_values(by="price_in_rp", ascending=False)
+    fig = px.bar(
+        cityPrice,
+        width=400,
+        height=600,
+        x="city",
+        y="price_in_rp",
+        text="price_in_rp",
+        title="Harga Properti di Jabodetabek Berdasarkan Kota",
+        labels={"city": "", "price_in_rp": ""},
+    )
+    fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
+    return fig
+
+
+def bar_price_by_city(data, dimension):
+    price = data.cube.slice([dimension, "city"]).rename(
+        columns={"price_sum": "price_in_rp"}
+    )
+    price = price.sort_values(by="price_in_rp", ascending=False)
+    fig = px.bar(
+        price,
+        width=400,
+        height=600,
+        x=dimension,
+        y="price_in_rp",
+        color="city",
+        text="price_in_rp",
+        title="Harga Properti di Jabodetabek Berdasarkan " + BAR_TITLES[dimension],
+        labels={dimension: "", "price_in_rp": ""},
+    )
+    fig.update_traces(texttemplate="%{text:.2s}", textposition="outside")
+    return fig
+
+
+def bar_count(data, dimension):
+    counts = data.cube.counts(dimension)
+    title = "Kota" if dimension == "city" else BAR_TITLES[dimension]
+    fig = px.bar(
+        counts,
+        width=400,
+        height=600,
+        x=counts.index,
+        y=counts.values,
+        title="Banyaknya Properti yang Dijual Berdasarkan " + title,
+        labels={"x": "", "y": ""},
+    )
+    fig.update_traces(text=counts.values, textposition="outside")
+    return fig
+
+
+# Korelasi
+def scatter_price(data, x, title, labels):
+    points, total = data.points(x, "price_in_rp")
+    if len(points) < total:
+        title += f" ({len(points):,} dari {total:,} titik)"
+    return px.scatter(
+        points,
+        x=x,
+        y="price_in_rp",
+        color="city",
+        title=title,
+        labels=labels,
+        render_mode=data.render_mode(len(points)),
+    )
+
+
+def scatter_land_size(data):
+    return scatter_price(
+        data,
+        "land_size_m2",
+        "Korelasi Antara Harga Properti dengan Luas Tanah",
+        {"land_size_m2": "Luas Tanah", "price_in_rp": "Harga Properti"},
+    )
+
+
+def scatter_building_size(data):
+    return scatter_price(
+        data,
+        "building_size_m2",
+        "Korelasi Antara Harga Properti dengan Luas Bangunan",
+        {"building_size_m2": "Luas Bangunan", "price_in_rp": "Harga Properti"},
+    )
+
+
+# DensityPLOT
+CONTOUR_TITLES = {
+    "city": ("Jumlah_Properti", "Kota"),
+    "certificate": ("Jumlah_Certificate", "Jenis Sertifikat"),
+    "property_condition": ("Jumlah_Kondisi", "Kondisi Properti"),
+    "building_orientation": ("Jumlah_Orientasi", "Orientasi Bangunan"),
+    "furnishing": ("Jumlah_Furnish", "Kondisi Perabotan"),
+}
+
+
+def density_contour(data, dimension):
+    column, title = CONTOUR_TITLES[dimension]
+    jumlah = data.cube.slice(dimension).rename(columns={"count": column})
+    return px.density_contour(
+        jumlah,
+        x=dimension,
+        y=column,
+        title="Korelasi Antara Jumlah Properti dengan " + title,
+        labels={dimension: "", column: ""},
+    )
+
+
+def box_city_price(data):
+    title = "Box Plot Harga Properti Berdasarkan Kota"
+    if data.exact_quantiles():
+        fig_box = px.box(
+            data.rows(["city", "price_in_rp"]),
+            x="city",
+            y="price_in_rp",
+            title=title,
+            template="seaborn",
+        )
+    else:
+        # Seleksi besar: kotak digambar dari ringkasan sketch kuantil, tanpa
+        # mengirim setiap harga listing ke browser
+        stats = data.sketch("city").box_stats()
+        fig_box = go.Figure(
+            go.Box(
+                x=stats.index,
+                q1=stats["q1"],
+                median=stats["median"],
+                q3=stats["q3"],
+                lowerfence=stats["lowerfence"],
+                upperfence=stats["upperfence"],
+                mean=stats["mean"],
+                boxpoints=False,
+                name="price_in_rp",
+            )
+        )
+        fig_box.update_layout(title=title, template="seaborn")
+    fig_box.update_layout(xaxis_title="", yaxis_title="")
+    fig_box.update_xaxes(tickangle=45)
+    return fig_box
+
+
+def violin_city(data):
+    jumlahByKotaDist = data.cube.slice(["city", "district", "certificate"]).rename(
+        columns={"count": "jumlah_rumah"}
+    )
+    fig_violin = px.violin(
+        jumlahByKotaDist,
+        x="city",
+        y="jumlah_rumah",
+        title="Violin Plot Harga Properti Berdasarkan Kota",
+        template="seaborn",
+    )
+    fig_violin.update_layout(xaxis_title="", yaxis_title="")
+    fig_violin.update_xaxes(tickangle=45)
+    return fig_violin
+
+
+# Tren
+def trend_price_table(year_cube):
+    linechartHarga = year_cube.slice("year_built")[["year_built", "price_mean"]]
+    linechartHarga = linechartHarga.rename(columns={"price_mean": "price_in_rp"})
+    linechartHarga["year_built"] = linechartHarga["year_built"].astype(str).str[:4]
+    return linechartHarga
+
+
+def trend_count_table(year_cube):
+    properti_per_tahun = year_cube.slice("year_built")[["year_built", "count"]]
+    properti_per_tahun.columns = ["year_built", "jumlah_properti"]
+    properti_per_tahun["year_built"] = properti_per_tahun["year_built"].astype(int)
+    return properti_per_tahun
+
+
+def trend_price(data):
+    linechartHarga = trend_price_table(data.year_cube)
+    linechartHarga["price_in_rp"] = (linechartHarga["price_in_rp"] / 1_000_000_000).map(
+        "{:.2f}".format
+    )
+    return px.area(
+        linechartHarga,
+        x="year_built",
+        y="price_in_rp",
+        title="Tren Rata-Rata Harga Properti berdasarkan Tahun Pembangunan",
+        labels={
+            "year_built": "Tahun Pembangunan",
+            "price_in_rp": "Harga (dalam Miliar Rp)",
+        },
+    )
+
+
+def trend_count(data):
+    fig = px.area(
+        trend_count_table(data.year_cube),
+        x="year_built",
+        y="jumlah_properti",
+        title="Tren Banyaknya Properti Dijual berdasarkan Tahun Pembangunan",
+        labels={
+            "year_built": "Tahun Pembangunan",
+            "jumlah_properti": "Jumlah Properti",
+        },
+    )
+    fig.update_layout(
+        xaxis=dict(tickformat="d"),
+        yaxis=dict(tickformat="d"),
+    )
+    return fig
+
+
+# TREE MAP
+def treemap(data):
+    jumlahByKotaDist = data.cube.slice(["city", "district", "certificate"]).rename(
+        columns={"count": "jumlah_rumah"}
+    )
+    figTree = px.treemap(
+        jumlahByKotaDist,
+        path=["city", "district", "certificate"],
+        values="jumlah_rumah",
+        hover_data=["city", "district", "certificate", "jumlah_rumah"],
+        color="certificate",
+        color_discrete_sequence=[
+            "#CDE8E5",
+            "#EEF7FF",
+            "#7AB2B2",
+            "#4D869C",
+        ],
+        title="Tree Map Banyaknya Properti yang Dijual",
+    )
+    figTree.update_layout(width=800, height=1500)
+    return figTree
+
+
+# Distribusi Properti Berdasarkan Koordinat Geografis
+def scatter_map(data, zoom=10):
+    # Jumlah listing per koordinat di antara baris terfilter; kode lokasi
+    # dihitung sekali di backend, bukan groupby per session
+    frame = data.rows(["lat", "long", "address", "city"]).assign(
+        address_count=data.address_counts()
+    )
+    return px.scatter_mapbox(
+        frame,
+        lat="lat",
+        lon="long",
+        hover_name="address",
+        color="city",
+        size="address_count",  # Gunakan kolom 'address_count' sebagai ukuran
+        mapbox_style="carto-positron",
+        zoom=zoom,
+        title="Peta Distribusi Geografis Properti Menurut Jumlah Rumah yang Dijual",
+    )
+
+
+def cluster_map(data, zoom):
+    # Mode agregasi: titik di-cluster per sel grid sesuai zoom, yang dikirim ke
+    # browser hanya jumlah, total dan rata-rata harga per cluster
+    clusters = data.clusters(level_for_zoom(zoom))
+    return px.scatter_mapbox(
+        clusters,
+        lat="lat",
+        lon="long",
+        size="count",
+        color="price_mean",
+        hover_data={"count": True, "price_sum": ":.3s", "price_mean": ":.3s"},
+        labels={
+            "count": "Jumlah Rumah",
+            "price_sum": "Total Harga",
+            "price_mean": "Rata-Rata Harga",
+        },
+        color_continuous_scale=HEATMAP_SCALE,
+        mapbox_style="carto-positron",
+        zoom=zoom,
+        title="Peta Distribusi Geografis Properti Menurut Jumlah Rumah yang Dijual",
+    )
+
+
+# Heatmap
+HEATMAP_TITLES = {
+    "certificate": "Jenis Sertifikat",
+    "property_condition": "Kondisi Bangunan",
+    "building_orientation": "Orientasi Bangunan",
+    "furnishing": "Kondisi Perabotan",
+}
+
+
+def heatmap_figure(matrix, title, color_scale=None):
+    # Heatmap dari matriks kota x dimensi yang sudah di-bin; marginal atas
+    # dan kanan adalah jumlah kolom/baris matriks yang sama
+    fig_heatmap = make_subplots(
+        rows=2,
+        cols=2,
+        shared_xaxes=True,
+        shared_yaxes=True,
+        column_widths=[0.8, 0.2],
+        row_heights=[0.2, 0.8],
+        horizontal_spacing=0.02,
+        vertical_spacing=0.02,
+    )
+    fig_heatmap.add_trace(
+        go.Heatmap(
+            x=matrix.columns,
+            y=matrix.index,
+            z=matrix.to_numpy(),
+            coloraxis="coloraxis",
+            name="",
+        ),
+        row=2,
+        col=1,
+    )
+    fig_heatmap.add_trace(
+        go.Bar(x=matrix.columns, y=matrix.sum(axis=0), name="", showlegend=False),
+        row=1,
+        col=1,
+    )
+    fig_heatmap.add_trace(
+        go.Bar(
+            x=matrix.sum(axis=1),
+            y=matrix.index,
+            orientation="h",
+            name="",
+            showlegend=False,
+        ),
+        row=2,
+        col=2,
+    )
+    fig_heatmap.update_layout(title=title, bargap=0.1)
+    if color_scale is not None:
+        fig_heatmap.update_layout(coloraxis_colorscale=color_scale)
+    fig_heatmap.update_xaxes(title=None, tickangle=45)
+    fig_heatmap.update_yaxes(title=None)
+    return fig_heatmap
+
+
+def heatmap_price(data, dimension):
+    return heatmap_figure(
+        data.cube.matrix("city", dimension, "price_sum"),
+        "Heatmap Harga Properti Antara Kota dan " + HEATMAP_TITLES[dimension],
+        HEATMAP_SCALE,
+    )
+
+
+def heatmap_count(data, dimension):
+    return heatmap_figure(
+        data.cube.matrix("city", dimension, "count"),
+        "Heatmap Jumlah Properti Antara Kota dan " + HEATMAP_TITLES[dimension],
+    )
+
+
+def _bind(build, dimension):
+    return lambda data, *args: build(data, dimension, *args)
+
+
+# Registry chart id -> builder, dipakai cache figure dan benchmark
+CHARTS = {
+    "top_district_price": top_district_price,
+    "top_district_count": top_district_count,
+    **{f"pie_{dimension}": _bind(pie, dimension) for dimension in PIE_TITLES},
+    "sunburst_price": sunburst_price,
+    "sunburst_count": sunburst_count,
+    "bar_city_price": bar_city_price,
+    "bar_city_count": _bind(bar_count, "city"),
+    **{
+        f"bar_{dimension}_price": _bind(bar_price_by_city, dimension)
+        for dimension in BAR_TITLES
+    },
+    **{
+        f"bar_{dimension}_count": _bind(bar_count, dimension)
+        for dimension in BAR_TITLES
+    },
+    "scatter_land_size": scatter_land_size,
+    "scatter_building_size": scatter_building_size,
+    **{
+        f"contour_{dimension}": _bind(density_contour, dimension)
+        for dimension in CONTOUR_TITLES
+    },
+    "box_city_price": box_city_price,
+    "violin_city": violin_city,
+    "trend_price": trend_price,
+    "trend_count": trend_count,
+    "treemap": treemap,
+    "scatter_map": scatter_map,
+    "cluster_map": cluster_map,
+    **{
+        f"heatmap_{dimension}_price": _bind(heatmap_price, dimension)
+        for dimension in HEATMAP_TITLES
+    },
+    **{
+        f"heatmap_{dimension}_count": _bind(heatmap_count, dimension)
+        for dimension in HEATMAP_TITLES
+    },
+}
+
+# Kolom data yang dibaca setiap chart. Setelah upsert, figure hanya dibangun
+# ulang jika salah satu kolom ini (atau kolom filter aktif) berubah.
+PRICE = "price_in_rp"
+CHART_COLUMNS = {
+    "top_district_price": ["district", PRICE],
+    "top_district_count": ["district"],
+    **{f"pie_{dimension}": [dimension] for dimension in PIE_TITLES},
+    "sunburst_price": ["city", "district", PRICE],
+    "sunburst_count": ["city", "district"],
+    "bar_city_price": ["city", PRICE],
+    "bar_city_count": ["city"],
+    **{
+        f"bar_{dimension}_price": [dimension, "city", PRICE] for dimension in BAR_TITLES
+    },
+    **{f"bar_{dimension}_count": [dimension] for dimension in BAR_TITLES},
+    "scatter_land_size": ["land_size_m2", PRICE, "city"],
+    "scatter_building_size": ["building_size_m2", PRICE, "city"],
+    **{f"contour_{dimension}": [dimension] for dimension in CONTOUR_TITLES},
+    "box_city_price": ["city", PRICE],
+    "violin_city": ["city", "district", "certificate"],
+    "trend_price": ["year_built", PRICE],
+    "trend_count": ["year_built"],
+    "treemap": ["city", "district", "certificate"],
+    "scatter_map": ["lat", "long", "address", "city"],
+    "cluster_map": ["lat", "long", PRICE],
+    **{
+        f"heatmap_{dimension}_price": ["city", dimension, PRICE]
+        for dimension in HEATMAP_TITLES
+    },
+    **{
+        f"heatmap_{dimension}_count": ["city", dimension]
+        for dimension in HEATMAP_TITLES
+    },
+}
+
+# Agregat bersama yang dihitung lebih dulu (sekali per state filter) sebelum
+# figure yang membacanya dibangun; chart scatter & peta membaca barisnya
+# sendiri sehingga bisa langsung jalan
+AGGREGATES = {
+    "cube": lambda data: data.cube,
+    "year": lambda data: data.year_cube,
+}
+CHART_AGGREGATES = {
+    **{chart_id: ["cube"] for chart_id in CHARTS},
+    "scatter_land_size": [],
+    "scatter_building_size": [],
+    "trend_price": ["year"],
+    "trend_count": ["year"],
+    "scatter_map": [],
+    "cluster_map": [],
+}
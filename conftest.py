@@ -0,0 +1,2 @@
+# Root repo dimasukkan ke sys.path oleh pytest lewat conftest ini, jadi test
+# di tests/ bisa mengimpor modul dashboard langsung
@@ -0,0 +1,455 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Semua session memakai frame yang sama; dengan copy-on-write hasil filter
+# maupun kolom tambahan tidak pernah mengubah frame bersama tersebut.
+# (pandas >= 3 selalu copy-on-write)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+DEFAULT_DATASET = "jabodetabek_house_price.xlsx"
+
+# Naikkan setiap kali DTYPES atau normalisasi berubah, snapshot lama akan dibuat ulang
+SCHEMA_VERSION = 1
+SNAPSHOT_SUFFIX = ".feather"
+# Jurnal upsert: folder berisi batch listing baru/berubah di samping sumbernya
+UPDATES_SUFFIX = ".updates"
+
+# Kolom kategori (nilai berulang, cocok disimpan sebagai category)
+CATEGORY_COLUMNS = [
+    "city",
+    "district",
+    "certificate",
+    "furnishing",
+    "property_condition",
+    "building_orientation",
+]
+
+# Kolom numerik yang cukup disimpan sebagai float32
+FLOAT32_COLUMNS = [
+    "bedrooms",
+    "bathrooms",
+    "land_size_m2",
+    "building_size_m2",
+    "carports",
+    "maid_bedrooms",
+    "maid_bathrooms",
+    "floors",
+    "building_age",
+    "garages",
+]
+
+# Harga disimpan int64 (float32 tidak presisi untuk nilai miliaran rupiah),
+# koordinat tetap float64 karena dipakai sebagai kunci groupby lokasi.
+DTYPES = {
+    **{column: "category" for column in CATEGORY_COLUMNS},
+    **{column: "float32" for column in FLOAT32_COLUMNS},
+    "price_in_rp": "int64",
+    "lat": "float64",
+    "long": "float64",
+    "year_built": "Int16",
+}
+
+
+class Change:
+    # Hasil upsert: posisi baris yang diperbarui, rentang baris baru
+    # (start, stop) dan kolom yang nilainya berubah
+    def __init__(self, version, updated, appended, columns):
+        self.version = version
+        self.updated = updated
+        self.appended = appended
+        self.columns = set(columns)
+
+    @property
+    def grown(self):
+        return self.appended[1] > self.appended[0]
+
+    @property
+    def rows(self):
+        return np.union1d(self.updated, np.arange(*self.appended))
+
+    def merge(self, other):
+        return Change(
+            other.version,
+            np.union1d(self.updated, other.updated),
+            (
+                min(self.appended[0], other.appended[0]),
+                max(self.appended[1], other.appended[1]),
+            ),
+            self.columns | other.columns,
+        )
+
+
+# Kolom kunci listing dan kolom yang wajib terisi untuk listing baru
+KEY_COLUMNS = ["ads_id", "url"]
+REQUIRED_COLUMNS = ["price_in_rp"]
+
+
+def listing_keys(frame):
+    # Kunci listing untuk upsert: ads_id, atau url jika ads_id kosong
+    return frame["ads_id"].fillna(frame["url"]).astype(str)
+
+
+def check_new_listings(listings):
+    # Listing baru (belum ada di dataset) wajib membawa kolom REQUIRED_COLUMNS
+    values = listings.reindex(columns=REQUIRED_COLUMNS)
+    missing = [column for column in REQUIRED_COLUMNS if values[column].isna().any()]
+    if missing:
+        raise ValueError(f"Listing baru membutuhkan kolom {', '.join(missing)}")
+
+
+class Dataset:
+    def __init__(self, frame, path, mtime, load_seconds, content_hash=None):
+        self.frame = frame
+        self.path = path
+        self.mtime = mtime
+        self.load_seconds = load_seconds
+        self.content_hash = content_hash or compute_content_hash(frame)
+        self.base_hash = self.content_hash
+        self.memory_bytes = int(frame.memory_usage(deep=True).sum())
+        # Versi naik setiap upsert; versi per kolom dan versi baris (ada
+        # baris baru) dipakai cache untuk membuang hanya entri yang terdampak
+        self.version = 0
+        self.row_version = 0
+        self.column_versions = {}
+        self.changes = []
+        self.last_update = ""
+        self._positions = None
+        self._lock = threading.RLock()
+
+    def _prepare(self, batch):
+        # Kolom batch yang dikenal dataset, satu baris per listing (terakhir)
+        columns = [column for column in self.frame.columns if column in batch.columns]
+        batch = apply_dtypes(batch[columns].copy(), nullable=True)
+        if batch.reindex(columns=KEY_COLUMNS).isna().all(axis=1).any():
+            raise ValueError("Setiap listing upsert membutuhkan ads_id atau url")
+        keys = listing_keys(batch.reindex(columns=KEY_COLUMNS))
+        batch = batch[~keys.duplicated(keep="last")].reset_index(drop=True)
+        keys = listing_keys(batch.reindex(columns=KEY_COLUMNS))
+        return columns, batch, keys
+
+    def _listing_positions(self):
+        # Posisi baris per kunci listing, dibangun sekali (dipanggil di bawah lock)
+        if self._positions is None:
+            self._positions = {}
+            for position, key in enumerate(listing_keys(self.frame)):
+                self._positions.setdefault(key, []).append(position)
+        return self._positions
+
+    def validate(self, batch):
+        # Pemeriksaan yang sama dengan upsert() tanpa mengubah dataset
+        _, batch, keys = self._prepare(batch)
+        with self._lock:
+            positions = self._listing_positions()
+            existing = np.array([key in positions for key in keys], dtype=bool)
+        check_new_listings(batch[~existing])
+
+    def upsert(self, batch):
+        # Gabungkan listing baru/berubah berdasarkan ads_id (atau url).
+        # Baris yang sudah ada diperbarui di tempat, hanya untuk kolom yang ada
+        # di batch (sel kosong = nilai lama dipertahankan); sisanya ditambahkan
+        columns, batch, keys = self._prepare(batch)
+        with self._lock:
+            frame = self.frame.copy(deep=False)
+            positions = self._listing_positions()
+            for column in columns:
+                if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                    # Kategori baru ditambahkan di akhir, kode lama tetap berlaku
+                    categories = frame[column].cat.categories
+                    new = pd.Index(batch[column].dropna().unique()).difference(
+                        categories
+                    )
+                    if len(new):
+                        frame[column] = frame[column].cat.add_categories(new)
+                    batch[column] = batch[column].astype(frame[column].dtype)
+
+            targets, sources = [], []
+            for source, key in enumerate(keys):
+                for position in positions.get(key, ()):
+                    targets.append(position)
+                    sources.append(source)
+            targets = np.asarray(targets, dtype=np.int64)
+            existing = np.zeros(len(batch), dtype=bool)
+            existing[sources] = True
+
+            appended = batch[~existing].reindex(columns=frame.columns)
+            check_new_listings(appended)
+            appended = appended.astype(frame.dtypes.to_dict())
+
+            changed = []
+            for column in columns:
+                old = frame[column].iloc[targets].reset_index(drop=True)
+                new = batch[column].iloc[sources].reset_index(drop=True)
+                new = new.where(new.notna(), old).astype(frame[column].dtype)
+                if not old.equals(new):
+                    changed.append(column)
+                    values = frame[column].copy()
+                    values.iloc[targets] = new.to_numpy()
+                    frame[column] = values
+
+            start = len(frame)
+            if len(appended):
+                frame = pd.concat([frame, appended], ignore_index=True)
+                for offset, key in enumerate(keys[~existing]):
+                    positions.setdefault(key, []).append(start + offset)
+
+            self.version += 1
+            for column in changed:
+                self.column_versions[column] = self.version
+            if len(appended):
+                self.row_version = self.version
+            digest = hashlib.sha256(self.content_hash.encode("utf-8"))
+            digest.update(compute_content_hash(batch).encode("utf-8"))
+            self.content_hash = digest.hexdigest()
+            change = Change(self.version, targets, (start, len(frame)), changed)
+            self.changes.append(change)
+            self.frame = frame
+            self.memory_bytes = int(frame.memory_usage(deep=True).sum())
+            return change
+
+    def changes_since(self, version):
+        # Semua perubahan setelah `version` digabung menjadi satu Change
+        with self._lock:
+            changes = [change for change in self.changes if change.version > version]
+        merged = None
+        for change in changes:
+            merged = change if merged is None else merged.merge(change)
+        return merged
+
+    def apply_updates(self, directory):
+        # Terapkan batch jurnal yang belum pernah diterapkan, urut nama file
+        try:
+            names = sorted(
+                name for name in os.listdir(directory) if name.endswith(SNAPSHOT_SUFFIX)
+            )
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            names = [name for name in names if name > self.last_update]
+            for name in names:
+                batch, _ = read_snapshot(os.path.join(directory, name))
+                self.upsert(batch)
+                self.last_update = name
+        return len(names)
+
+    def summary(self):
+        return (
+            f"{len(self.frame):,} baris dimuat dalam {self.load_seconds * 1000:.0f} ms, "
+            f"memori {self.memory_bytes / 1024 ** 2:.1f} MB"
+        )
+
+
+_cache = {}
+_lock = threading.Lock()
+
+
+_SQL_INSERT = re.compile(r"INSERT INTO\s+\S+\s+VALUES\s*\(", re.IGNORECASE)
+_SQL_VALUE = re.compile(r"\s*(?:'((?:[^']|'')*)'|(NULL))\s*([,)])", re.DOTALL)
+_SQL_COLUMN = re.compile(r'^\s*"(\w+)"\s+\w+', re.MULTILINE)
+
+
+def read_sql_dump(path):
+    # Membaca dump Postgres (CREATE TABLE + INSERT ... VALUES) tanpa database
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    create = text[
+        text.index("CREATE TABLE") : text.index(";", text.index("CREATE TABLE"))
+    ]
+    columns = _SQL_COLUMN.findall(create)
+    rows = []
+    for match in _SQL_INSERT.finditer(text):
+        position = match.end()
+        row = []
+        while True:
+            value = _SQL_VALUE.match(text, position)
+            if value is None:
+                raise ValueError(f"Format INSERT tidak dikenali di posisi {position}")
+            row.append(None if value.group(2) else value.group(1).replace("''", "'"))
+            position = value.end()
+            if value.group(3) == ")":
+                break
+        rows.append(row)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def read_source(path):
+    if path.endswith(SNAPSHOT_SUFFIX):
+        return read_snapshot(path)[0]
+    if path.endswith(".csv") or path.endswith(".csv.gz"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".sql"):
+        return read_sql_dump(path)
+    return pd.read_excel(path)
+
+
+def apply_dtypes(frame, nullable=False):
+    # nullable: kolom int64 memakai Int64 supaya sel kosong (batch upsert
+    # parsial) tidak gagal di-cast
+    for column, dtype in DTYPES.items():
+        if column not in frame.columns:
+            continue
+        if nullable and dtype == "int64":
+            dtype = "Int64"
+        if dtype == "category":
+            frame[column] = frame[column].astype("category")
+        else:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype(dtype)
+    return frame
+
+
+def compute_content_hash(frame):
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    digest = hashlib.sha256(hashes.tobytes())
+    digest.update(",".join(frame.columns).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def snapshot_path(source):
+    return os.path.splitext(source)[0] + SNAPSHOT_SUFFIX
+
+
+def write_snapshot(frame, path):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    content_hash = compute_content_hash(frame)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            b"visdat.schema_version": str(SCHEMA_VERSION).encode(),
+            b"visdat.content_hash": content_hash.encode(),
+        }
+    )
+    # Tanpa kompresi supaya file bisa di-memory-map dan dibagi antar worker.
+    # Nama sementara unik di folder tujuan: penulis bersamaan tidak saling
+    # menimpa, dan pembaca hanya melihat file lama atau file baru yang utuh
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        feather.write_feather(table, temp_path, compression="uncompressed")
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return content_hash
+
+
+def read_snapshot(path):
+    import pyarrow.feather as feather
+
+    table = feather.read_table(path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    version = int(metadata.get(b"visdat.schema_version", b"0"))
+    if version != SCHEMA_VERSION:
+        raise ValueError(
+            f"Snapshot {path} memakai schema versi {version}, dibutuhkan {SCHEMA_VERSION}"
+        )
+    content_hash = metadata.get(b"visdat.content_hash", b"").decode() or None
+    # split_blocks: kolom numerik tanpa NaN tetap menunjuk ke halaman mmap
+    return table.to_pandas(split_blocks=True), content_hash
+
+
+def ingest(source, target=None):
+    target = target or snapshot_path(source)
+    frame = apply_dtypes(read_source(source))
+    content_hash = write_snapshot(frame, target)
+    return target, len(frame), content_hash
+
+
+def updates_path(source):
+    return os.path.splitext(source)[0] + UPDATES_SUFFIX
+
+
+def append_update(source, batch):
+    # Tulis satu batch upsert ke jurnal; dashboard yang sedang berjalan
+    # menerapkannya pada rerun berikutnya tanpa membaca ulang seluruh data.
+    # Batch diperiksa dulu terhadap dataset saat ini: batch yang ditolak
+    # upsert() tidak boleh masuk jurnal karena setiap load berikutnya gagal
+    load_dataset(source).validate(batch)
+    directory = updates_path(source)
+    os.makedirs(directory, exist_ok=True)
+    frame = apply_dtypes(batch.copy(), nullable=True)
+    path = os.path.join(directory, f"{time.time_ns():020d}{SNAPSHOT_SUFFIX}")
+    write_snapshot(frame, path)
+    return path, len(frame)
+
+
+def compact(source):
+    # Gabungkan jurnal ke snapshot utama lalu hapus batch yang sudah masuk
+    dataset = load_dataset(source)
+    with dataset._lock:
+        target = snapshot_path(dataset.path)
+        write_snapshot(dataset.frame, target)
+        directory = updates_path(dataset.path)
+        names = (
+            [
+                name
+                for name in os.listdir(directory)
+                if name.endswith(SNAPSHOT_SUFFIX) and name <= dataset.last_update
+            ]
+            if os.path.isdir(directory)
+            else []
+        )
+        for name in names:
+            os.remove(os.path.join(directory, name))
+    return target, len(dataset.frame), len(names)
+
+
+def _fresh_snapshot(source):
+    # Snapshot dipakai kalau lebih baru dari sumbernya; kalau belum ada dibuat sekali
+    if source.endswith(SNAPSHOT_SUFFIX):
+        return source
+    target = snapshot_path(source)
+    try:
+        if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(
+            source
+        ):
+            ingest(source, target)
+        return target
+    except (ImportError, OSError):
+        return None
+
+
+def _read(path):
+    snapshot = _fresh_snapshot(path)
+    if snapshot is None:
+        return apply_dtypes(read_source(path)), None
+    try:
+        return read_snapshot(snapshot)
+    except ValueError:
+        # Schema snapshot sudah usang, buat ulang dari sumbernya
+        if snapshot == path:
+            raise
+        ingest(path, snapshot)
+        return read_snapshot(snapshot)
+
+
+def load_dataset(path=DEFAULT_DATASET):
+    # Dibaca sekali per proses, cache dikunci dengan path dan mtime file
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+    with _lock:
+        dataset = _cache.get(key)
+        if dataset is None:
+            start = time.perf_counter()
+            frame, content_hash = _read(path)
+            dataset = Dataset(
+                frame, path, key[1], time.perf_counter() - start, content_hash
+            )
+            # Versi lama file yang sama tidak perlu disimpan lagi
+            for old_key in [k for k in _cache if k[0] == path]:
+                del _cache[old_key]
+            _cache[key] = dataset
+    # Batch upsert baru di jurnal diterapkan ke dataset yang sudah di-cache
+    dataset.apply_updates(updates_path(path))
+    return dataset
@@ -0,0 +1,87 @@
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+from instrumentation import span
+
+# Format unduhan: label -> (ekstensi file, mime)
+FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Excel": (
+        ".xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+}
+
+CHUNK_ROWS = 50_000
+
+
+def iter_csv_chunks(frame, chunk_rows=CHUNK_ROWS):
+    # CSV diformat per potongan baris supaya tidak ada string CSV besar kedua
+    # selain file hasilnya (bukan streaming: lihat export_bytes)
+    if len(frame) == 0:
+        yield frame.to_csv(index=False).encode("utf-8")
+        return
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start : start + chunk_rows]
+        yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def write_export(frame, export_format, output):
+    if export_format == "CSV":
+        for chunk in iter_csv_chunks(frame):
+            output.write(chunk)
+    elif export_format == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=output, mode="wb", mtime=0) as compressed:
+            for chunk in iter_csv_chunks(frame):
+                compressed.write(chunk)
+    elif export_format == "Parquet":
+        frame.to_parquet(output, index=False)
+    elif export_format == "Excel":
+        frame.to_excel(output, index=False)
+    else:
+        raise ValueError(f"Format export tidak dikenal: {export_format}")
+
+
+def export_bytes(frame, export_format):
+    # Seluruh file tetap dikumpulkan di memori: st.download_button hanya
+    # menerima bytes (atau callable yang mengembalikan bytes), tidak bisa
+    # mengalirkan file per potongan ke browser
+    output = io.BytesIO()
+    write_export(frame, export_format, output)
+    return output.getvalue()
+
+
+class ExportCache:
+    # Menyimpan hasil export terakhir per (nama, format, state filter) supaya
+    # unduhan ulang tidak membangun file lagi. Dibatasi total ukuran; file di
+    # atas max_entry_bytes tidak disimpan (dibuat ulang setiap unduhan)
+    def __init__(self, max_bytes, max_entry_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_bytes, max_entry_bytes or max_bytes)
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, frame_fn, export_format):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                return payload
+        with span(f"export.{export_format}"):
+            payload = export_bytes(frame_fn(), export_format)
+        if len(payload) <= self.max_entry_bytes:
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.bytes -= len(old)
+                self._entries[key] = payload
+                self.bytes += len(payload)
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.bytes -= len(evicted)
+        return payload
@@ -0,0 +1,160 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def reinsert(order, sorted_values, values, rows, valid):
+    # Update urutan tanpa sort ulang: baris yang berubah dikeluarkan, lalu
+    # disisipkan kembali di posisinya (binary search) dengan nilai barunya
+    touched = np.zeros(len(values), dtype=bool)
+    touched[rows] = True
+    keep = ~touched[order]
+    order, sorted_values = order[keep], sorted_values[keep]
+    rows = rows[valid[rows]]
+    rows = rows[np.argsort(values[rows], kind="stable")]
+    positions = np.searchsorted(sorted_values, values[rows], side="right")
+    return (
+        np.insert(order, positions, rows),
+        np.insert(sorted_values, positions, values[rows]),
+    )
+
+
+class GroupIndex:
+    # Indeks grup per kolom: baris diurutkan per kode sehingga setiap nilai
+    # menempati satu potongan (start, end) di array `order`.
+    def __init__(self, codes, uniques):
+        valid = np.flatnonzero(codes >= 0)
+        self.order = valid[np.argsort(codes[valid], kind="stable")]
+        self._index(codes, uniques, codes[self.order])
+
+    def _index(self, codes, uniques, sorted_codes):
+        self.uniques = uniques
+        self.sorted_codes = sorted_codes
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        self.starts = (
+            np.concatenate([[0], boundaries])
+            if len(sorted_codes)
+            else np.zeros(0, dtype=np.int64)
+        )
+        self.present = sorted_codes[self.starts]
+        self.codes = codes
+
+    def updated(self, codes, uniques, rows):
+        # Indeks baru untuk data setelah upsert; hanya baris yang berubah/
+        # ditambah yang dipindah di urutan, indeks lama tidak diubah
+        index = copy.copy(self)
+        index.order, sorted_codes = reinsert(
+            self.order, self.sorted_codes, codes, rows, codes >= 0
+        )
+        index._index(codes, uniques, sorted_codes)
+        return index
+
+    def options(self, mask=None, row_ids=None):
+        options = self.uniques[self._present_codes(mask, row_ids)]
+        # Nilai baru dari upsert ditambahkan di akhir uniques; opsi tetap urut
+        if self.uniques.is_monotonic_increasing:
+            return options
+        return options.sort_values()
+
+    def _present_codes(self, mask, row_ids):
+        if mask is None:
+            return self.present
+        if row_ids is not None:
+            # Seleksi kecil: cukup lihat kode baris yang terpilih
+            return np.unique(self.codes[row_ids][self.codes[row_ids] >= 0])
+        if len(self.order) == 0:
+            return self.present
+        hits = np.logical_or.reduceat(mask[self.order], self.starts)
+        return self.present[hits]
+
+
+_MISSING = object()
+
+
+class FacetService:
+    # Daftar opsi multiselect di-cache per (kolom, state filter sebelumnya), LRU.
+    # Mengubah filter di tahap akhir tidak menghitung ulang opsi tahap awal.
+    def __init__(self, engine, max_entries=512, sparse_fraction=0.05):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.sparse_fraction = sparse_fraction
+        self.sparse_rows = int(engine.rows * sparse_fraction)
+        self.hits = 0
+        self.misses = 0
+        self._groups = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def group_index(self, column):
+        with self._lock:
+            index = self._groups.get(column)
+        if index is None:
+            index = GroupIndex(*self.engine.codes(column))
+            with self._lock:
+                self._groups[column] = index
+        return index
+
+    def options(self, column, upstream, mask):
+        key = (column, upstream)
+        options = self._lookup(key)
+        if options is _MISSING:
+            if column == "facilities":
+                options = self.engine.facilities.options(mask)
+            else:
+                options = self._compute(column, upstream, mask)
+            self._store(key, options)
+        return options
+
+    def bounds(self, column, upstream, mask):
+        # Batas (min, max) untuk slider rentang, None jika tidak ada baris
+        key = (column, "bounds", upstream)
+        bounds = self._lookup(key)
+        if bounds is _MISSING:
+            bounds = self.engine.sorted_index(column).bounds(mask)
+            self._store(key, bounds)
+        return bounds
+
+    def _lookup(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return _MISSING
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+
+    def updated(self, engine, change):
+        # Service untuk engine setelah upsert: indeks grup kolom yang terdampak
+        # dibangun ulang dari yang lama, cache opsi mulai kosong (bergantung
+        # pada isi data). Service lama tetap melayani state versi sebelumnya.
+        facets = FacetService(engine, self.max_entries, self.sparse_fraction)
+        with self._lock:
+            groups = dict(self._groups)
+            facets.hits, facets.misses = self.hits, self.misses
+        for column, index in groups.items():
+            if change.grown or column in change.columns:
+                groups[column] = index.updated(*engine.codes(column), change.rows)
+        facets._groups = groups
+        return facets
+
+    def _compute(self, column, upstream, mask):
+        index = self.group_index(column)
+        if upstream is None:
+            return index.options()
+        row_ids = np.flatnonzero(mask)
+        if len(row_ids) <= self.sparse_rows:
+            return index.options(mask, row_ids)
+        return index.options(mask)
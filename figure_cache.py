@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    # LRU berisi figure jadi per (chart id, dataset, state filter). Hit
+    # mengembalikan objek figure yang sama tanpa membangun ulang go.Figure,
+    # jadi figure dari cache tidak boleh diubah pemanggil. Dibatasi total
+    # ukuran JSON figure; entri terlama dibuang sampai muat lagi.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        # Figure dari cache, atau None tanpa membangun apa pun
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, key, build):
+        fig = self.lookup(key)
+        if fig is not None:
+            return fig
+        with self._lock:
+            self.misses += 1
+
+        fig = build()
+        self.put(key, fig)
+        return fig
+
+    def put(self, key, fig):
+        size = len(fig.to_json())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (fig, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+            }
@@ -0,0 +1,409 @@
+import copy
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from facets import FacetService, reinsert
+from instrumentation import span
+
+# Label widget untuk setiap kolom filter (urutan = urutan tahap filter),
+# dipakai sidebar dashboard dan benchmark
+FILTER_WIDGETS = [
+    ("city", ":world_map: Kota"),
+    ("district", ":cityscape: Kawasan"),
+    ("address", "📌 Alamat"),
+    ("certificate", "📜 Jenis Sertifikat"),
+]
+
+# Kolom numerik memakai slider rentang (indeks terurut), sisanya multiselect
+ADVANCED_FILTER_WIDGETS = [
+    ("building_age", "🏗 Umur Bangunan (Tahun)", "range"),
+    ("year_built", "📆 Tahun Pembangunan", "range"),
+    ("land_size_m2", "🪨 Luas Tanah (m²)", "range"),
+    ("building_size_m2", "🧱 Luas Bangunan (m²)", "range"),
+    ("floors", "🪜 Jumlah Lantai", "range"),
+    ("electricity", "🔌 Kelistrikan", "isin"),
+    ("property_condition", "🏡 Kondisi", "isin"),
+    ("building_orientation", "🧭 Orientasi Bangunan", "isin"),
+    ("furnishing", "🪑 Perabotan", "isin"),
+    ("bedrooms", "🛏️ Jumlah Kamar Tidur", "range"),
+    ("bathrooms", "🛁 Jumlah Kamar Mandi", "range"),
+    ("carports", "🏎 Jumlah Carport", "range"),
+    ("maid_bedrooms", "🛏 Jumlah Kamar Pembantu", "range"),
+    ("maid_bathrooms", "🚽 Jumlah Kamar Mandi Pembantu", "range"),
+    ("garages", "🏎️ Jumlah Garasi", "range"),
+]
+
+
+# Urutan lengkap tahap filter dashboard: (kolom, jenis)
+FILTER_STAGES = (
+    [(column, "isin") for column, _ in FILTER_WIDGETS]
+    + [("facilities", "facilities"), ("price_in_rp", "range")]
+    + [(column, kind) for column, _, kind in ADVANCED_FILTER_WIDGETS]
+)
+
+
+class FilterSpec:
+    # Daftar tahap filter berurutan: (kolom, jenis, nilai).
+    # Jenis: "isin" (multiselect), "facilities" (semua fasilitas), "range" (min, max),
+    # "search" (teks dicari di judul, alamat, kecamatan dan kota)
+    def __init__(self, stages=None):
+        self.stages = list(stages or [])
+
+    def add(self, column, kind, value):
+        self.stages.append((column, kind, normalize_value(kind, value)))
+        return self
+
+    def active(self):
+        return [stage for stage in self.stages if is_active(stage)]
+
+    def fingerprint(self):
+        digest = hashlib.sha1(repr(self.active()).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def normalize_value(kind, value):
+    if kind == "range":
+        low, high = value
+        return (
+            None if low is None else float(low),
+            None if high is None else float(high),
+        )
+    if kind == "search":
+        return str(value or "").strip().lower()
+    return tuple(sorted({_plain(item) for item in value or ()}, key=repr))
+
+
+def spec_columns(spec):
+    # Kolom data yang dibaca tahap-tahap filter aktif
+    columns = set()
+    for column, kind, value in spec.active():
+        if kind == "search":
+            columns.update(SEARCH_COLUMNS)
+        else:
+            columns.add(column)
+    return columns
+
+
+def _plain(item):
+    return item.item() if isinstance(item, np.generic) else item
+
+
+def is_active(stage):
+    column, kind, value = stage
+    if kind == "range":
+        return value != (None, None)
+    return bool(value)
+
+
+class FacilityIndex:
+    # Kolom fasilitas di-parse sekali menjadi matriks boolean baris x fasilitas,
+    # sehingga "punya semua fasilitas" cukup AND per kolom (bukan cek substring)
+    def __init__(self, facilities):
+        rows, tokens = parse_facilities(facilities)
+        codes, vocabulary = pd.factorize(tokens, sort=True)
+        self.vocabulary = pd.Index(vocabulary)
+        self.matrix = np.zeros((len(facilities), len(vocabulary)), dtype=bool)
+        self.matrix[rows, codes] = True
+
+    def updated(self, facilities, rows):
+        # Indeks baru setelah upsert: hanya baris yang berubah/ditambah yang
+        # di-parse ulang, fasilitas baru menjadi kolom baru di akhir matriks
+        token_rows, tokens = parse_facilities(facilities.iloc[rows])
+        new = pd.Index(pd.unique(tokens)).difference(self.vocabulary)
+        vocabulary = self.vocabulary.append(new)
+        matrix = self.matrix
+        if len(facilities) > len(matrix) or len(new):
+            matrix = np.zeros((len(facilities), len(vocabulary)), dtype=bool)
+            matrix[: len(self.matrix), : len(self.vocabulary)] = self.matrix
+        else:
+            matrix = matrix.copy()
+        matrix[rows] = False
+        matrix[rows[token_rows], vocabulary.get_indexer(tokens)] = True
+        index = copy.copy(self)
+        index.vocabulary, index.matrix = vocabulary, matrix
+        return index
+
+    def mask(self, selected):
+        columns = self.vocabulary.get_indexer(list(selected))
+        if (columns < 0).any():
+            return np.zeros(len(self.matrix), dtype=bool)
+        return self.matrix[:, columns].all(axis=1)
+
+    def counts(self, mask):
+        return self.matrix[mask].sum(axis=0)
+
+    def options(self, mask):
+        options = self.vocabulary[self.counts(mask) > 0]
+        if self.vocabulary.is_monotonic_increasing:
+            return options
+        return options.sort_values()
+
+
+def parse_facilities(facilities):
+    # "A, B, C" -> (posisi baris, nama fasilitas) per token yang tidak kosong
+    facilities = facilities.reset_index(drop=True).fillna("").astype(str)
+    tokens = facilities.str.split(",").explode().str.strip()
+    tokens = tokens[tokens != ""]
+    return tokens.index.to_numpy(dtype=np.int64), tokens.to_numpy()
+
+
+class SortedIndex:
+    # Nilai kolom numerik diurutkan sekali; rentang [low, high] diselesaikan
+    # dengan dua binary search menjadi potongan row id.
+    def __init__(self, values):
+        values = np.asarray(values, dtype="float64")
+        valid = np.flatnonzero(~np.isnan(values))
+        self.order = valid[np.argsort(values[valid], kind="stable")]
+        self.sorted_values = values[self.order]
+
+    def updated(self, values, rows):
+        index = copy.copy(self)
+        index.order, index.sorted_values = reinsert(
+            self.order, self.sorted_values, values, rows, ~np.isnan(values)
+        )
+        return index
+
+    def row_ids(self, low=None, high=None):
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, "left")
+        end = (
+            len(self.sorted_values)
+            if high is None
+            else np.searchsorted(self.sorted_values, high, "right")
+        )
+        return self.order[start:end]
+
+    def bounds(self, mask):
+        # Nilai terkecil dan terbesar di antara baris yang lolos mask
+        hits = mask[self.order]
+        if not hits.any():
+            return None
+        first = np.argmax(hits)
+        last = len(hits) - 1 - np.argmax(hits[::-1])
+        return self.sorted_values[first].item(), self.sorted_values[last].item()
+
+
+# Kolom yang digabung menjadi teks pencarian tabel
+SEARCH_COLUMNS = ["title", "address", "district", "city"]
+
+
+def search_text(frame):
+    text = frame[SEARCH_COLUMNS[0]].astype(str)
+    for column in SEARCH_COLUMNS[1:]:
+        text = text + " " + frame[column].astype(str)
+    return text.str.lower().reset_index(drop=True)
+
+
+def update_codes(series, codes, uniques, rows):
+    # Kode lama tetap berlaku: kategori baru selalu ditambahkan di akhir
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    values = series.iloc[rows]
+    new = pd.Index(pd.unique(values.dropna())).difference(uniques)
+    uniques = uniques.append(new)
+    result = np.full(len(series), -1, dtype=codes.dtype)
+    result[: len(codes)] = codes
+    result[rows] = uniques.get_indexer(values)
+    return result, uniques
+
+
+class FilterEngine:
+    # Semua tahap filter digabung menjadi satu boolean mask, frame hanya
+    # diambil sekali di akhir (tidak ada copy per tahap).
+    def __init__(self, frame, facilities=None):
+        self.frame = frame
+        self.rows = len(frame)
+        self._codes = {}
+        self._sorted = {}
+        self._orders = {}
+        self._search_text = None
+        self._lock = threading.Lock()
+        self.facilities = facilities or FacilityIndex(frame["facilities"])
+        self.facets = FacetService(self)
+
+    def updated(self, frame, change):
+        # Engine baru untuk frame setelah upsert (data_loader.Change): kode
+        # kategori, indeks terurut, fasilitas dan teks pencarian disalin dari
+        # engine ini dan disesuaikan hanya untuk baris yang berubah. Engine ini
+        # tidak diubah, jadi state yang masih memakainya tetap konsisten.
+        rows = change.rows
+
+        def affected(column):
+            return change.grown or column in change.columns
+
+        facilities = self.facilities
+        if affected("facilities"):
+            facilities = facilities.updated(frame["facilities"], rows)
+        engine = FilterEngine(frame, facilities)
+        with self._lock:
+            codes = dict(self._codes)
+            sorted_indexes = dict(self._sorted)
+            orders = dict(self._orders)
+            search = self._search_text
+        for column in [column for column in codes if affected(column)]:
+            codes[column] = update_codes(frame[column], *codes[column], rows)
+        for column in [column for column in sorted_indexes if affected(column)]:
+            values = frame[column].to_numpy(dtype="float64", na_value=np.nan)
+            sorted_indexes[column] = sorted_indexes[column].updated(values, rows)
+        if search is not None and (
+            change.grown or change.columns & set(SEARCH_COLUMNS)
+        ):
+            text = search_text(frame.iloc[rows])
+            search = search.reindex(range(len(frame)))
+            search.iloc[rows] = text.to_numpy()
+        engine._codes = codes
+        engine._sorted = sorted_indexes
+        # Urutan tabel kolom yang terdampak dibuat ulang saat dibutuhkan
+        engine._orders = {
+            key: order for key, order in orders.items() if not affected(key[0])
+        }
+        engine._search_text = search
+        engine.facets = self.facets.updated(engine, change)
+        return engine
+
+    def codes(self, column):
+        # Kode integer per kolom dibuat sekali: kategori memakai cat.codes,
+        # kolom lain di-factorize (terurut). NaN mendapat kode -1.
+        with self._lock:
+            if column not in self._codes:
+                series = self.frame[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    codes = series.cat.codes.to_numpy()
+                    uniques = pd.Index(series.cat.categories)
+                else:
+                    codes, uniques = pd.factorize(series, sort=True)
+                self._codes[column] = (codes, uniques)
+            return self._codes[column]
+
+    def sorted_index(self, column):
+        with self._lock:
+            if column not in self._sorted:
+                values = self.frame[column].to_numpy(dtype="float64", na_value=np.nan)
+                self._sorted[column] = SortedIndex(values)
+            return self._sorted[column]
+
+    def sort_order(self, column, descending=False):
+        # Urutan baris per kolom dibuat sekali dari kode terurut; NaN selalu
+        # di akhir. Urutan untuk satu filter cukup order[mask[order]].
+        key = (column, descending)
+        with self._lock:
+            order = self._orders.get(key)
+        if order is None:
+            codes, uniques = self.codes(column)
+            # Peringkat nilai per kode (uniques bisa tidak urut setelah upsert)
+            ranks = np.argsort(np.argsort(np.asarray(uniques), kind="stable"))
+            ranks = np.append(ranks, len(uniques))
+            if descending:
+                ranks[:-1] = len(uniques) - 1 - ranks[:-1]
+            keys = ranks[codes]
+            order = np.argsort(keys, kind="stable")
+            with self._lock:
+                self._orders[key] = order
+        return order
+
+    def search_text(self):
+        # Teks pencarian (huruf kecil) dibangun sekali per dataset
+        with self._lock:
+            if self._search_text is None:
+                self._search_text = search_text(self.frame)
+            return self._search_text
+
+    def start(self):
+        return FilterState(self)
+
+    def apply(self, spec):
+        state = self.start()
+        for column, kind, value in spec.stages:
+            state.add(column, kind, value)
+        return state
+
+    def stage_mask(self, column, kind, value):
+        if kind == "range":
+            mask = np.zeros(self.rows, dtype=bool)
+            mask[self.sorted_index(column).row_ids(*value)] = True
+            return mask
+        if kind == "facilities":
+            return self.facilities.mask(value)
+        if kind == "search":
+            return self.search_text().str.contains(value, regex=False).to_numpy()
+        codes, uniques = self.codes(column)
+        # Lookup table per kode; indeks -1 (NaN) jatuh ke slot terakhir yang False
+        lookup = np.zeros(len(uniques) + 1, dtype=bool)
+        selected = uniques.get_indexer(list(value))
+        lookup[selected[selected >= 0]] = True
+        return lookup[codes]
+
+
+class FilterState:
+    def __init__(self, engine):
+        self.engine = engine
+        self.spec = FilterSpec()
+        self.mask = np.ones(engine.rows, dtype=bool)
+        self.timings = []
+
+    def upstream(self):
+        # Kunci cache opsi: None berarti belum ada filter aktif
+        return self.spec.fingerprint() if self.spec.active() else None
+
+    def options(self, column):
+        # Nilai yang masih tersedia setelah tahap-tahap sebelumnya
+        return self.engine.facets.options(column, self.upstream(), self.mask)
+
+    def bounds(self, column):
+        # Batas slider rentang dari baris yang lolos tahap sebelumnya
+        return self.engine.facets.bounds(column, self.upstream(), self.mask)
+
+    def facility_options(self):
+        return self.engine.facets.options("facilities", self.upstream(), self.mask)
+
+    def column(self, column):
+        return self.engine.frame[column].to_numpy()[self.mask]
+
+    def add(self, column, kind, value):
+        start = time.perf_counter()
+        self.spec.add(column, kind, value)
+        stage = self.spec.stages[-1]
+        if is_active(stage):
+            with span(f"filter.{column}"):
+                self.mask &= self.engine.stage_mask(*stage)
+        self.timings.append((column, time.perf_counter() - start))
+        return self
+
+    def row_ids(self):
+        return np.flatnonzero(self.mask)
+
+    def sorted_rows(self, column=None, descending=False, search=""):
+        # Row id terfilter untuk tabel: pencarian memakai mask dari engine,
+        # urutan memakai indeks urutan per kolom (tanpa sort ulang per rerun)
+        mask = self.mask
+        search = normalize_value("search", search)
+        if search:
+            mask = mask & self.engine.stage_mask(None, "search", search)
+        if column is None:
+            return np.flatnonzero(mask)
+        order = self.engine.sort_order(column, descending)
+        return order[mask[order]]
+
+    def take(self, columns=None):
+        start = time.perf_counter()
+        frame = self.engine.frame
+        if columns is not None:
+            frame = frame[list(columns)]
+        if self.mask.all():
+            result = frame.copy(deep=False)
+        else:
+            result = frame.take(self.row_ids())
+        self.timings.append(("take", time.perf_counter() - start))
+        return result
+
+    def memory_bytes(self):
+        return self.mask.nbytes
+
+    def timing_frame(self):
+        return pd.DataFrame(
+            [(name, seconds * 1000) for name, seconds in self.timings],
+            columns=["tahap", "ms"],
+        )
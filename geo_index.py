@@ -0,0 +1,78 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Level grid = level zoom tile peta: sel di level L selebar 360 / 2**L derajat
+MIN_LEVEL = 8
+MAX_LEVEL = 16
+
+
+class GeoIndex:
+    # Setiap listing dipetakan sekali ke sel grid di semua level (quadtree
+    # sederhana), sehingga agregasi per zoom cukup bincount atas kode sel.
+    def __init__(self, lat, long):
+        self.lat = np.asarray(lat, dtype="float64")
+        self.long = np.asarray(long, dtype="float64")
+        valid = ~(np.isnan(self.lat) | np.isnan(self.long))
+        self.valid = valid
+        self.levels = {}
+        self.cells = {}
+        for level in range(MIN_LEVEL, MAX_LEVEL + 1):
+            codes, uniques = pd.factorize(self._cells(level, slice(None)))
+            codes[~valid] = -1
+            self.levels[level] = (codes.astype(np.int32), len(uniques))
+            self.cells[level] = pd.Index(uniques)
+
+    def _cells(self, level, rows):
+        scale = 2**level
+        x = np.floor((self.long[rows] + 180.0) / 360.0 * scale)
+        y = np.floor((self.lat[rows] + 90.0) / 180.0 * scale)
+        return np.where(self.valid[rows], x * scale + y, -1).astype(np.int64)
+
+    def updated(self, lat, long, rows):
+        # Indeks baru setelah upsert: hanya baris yang berubah/ditambah yang
+        # dipetakan ulang ke sel grid, sel baru mendapat kode baru di akhir.
+        # Indeks lama tidak diubah (masih dipakai mask berukuran lama).
+        index = copy.copy(self)
+        index.lat = np.asarray(lat, dtype="float64")
+        index.long = np.asarray(long, dtype="float64")
+        index.valid = ~(np.isnan(index.lat) | np.isnan(index.long))
+        index.levels = {}
+        index.cells = {}
+        for level, (old_codes, size) in self.levels.items():
+            cells = index._cells(level, rows)
+            uniques = self.cells[level]
+            uniques = uniques.append(pd.Index(np.unique(cells)).difference(uniques))
+            codes = np.full(len(index.lat), -1, dtype=np.int32)
+            codes[: len(old_codes)] = old_codes
+            codes[rows] = np.where(index.valid[rows], uniques.get_indexer(cells), -1)
+            index.levels[level] = (codes, len(uniques))
+            index.cells[level] = uniques
+        return index
+
+    def clusters(self, mask, level, prices):
+        level = min(max(level, MIN_LEVEL), MAX_LEVEL)
+        codes, size = self.levels[level]
+        selected = mask & self.valid
+        cells = codes[selected]
+        count = np.bincount(cells, minlength=size)
+        present = count > 0
+        lat_sum = np.bincount(cells, weights=self.lat[selected], minlength=size)
+        long_sum = np.bincount(cells, weights=self.long[selected], minlength=size)
+        price_sum = np.bincount(cells, weights=prices[selected], minlength=size)
+        count = count[present]
+        return pd.DataFrame(
+            {
+                "lat": lat_sum[present] / count,
+                "long": long_sum[present] / count,
+                "count": count,
+                "price_sum": price_sum[present],
+                "price_mean": price_sum[present] / count,
+            }
+        )
+
+
+def level_for_zoom(zoom, cell_pixels=64):
+    # Satu tile 256 px di zoom z = level z; sel ~64 px berarti level z + 2
+    return int(zoom + np.log2(256 / cell_pixels))
@@ -0,0 +1,69 @@
+import argparse
+
+from data_loader import (
+    DEFAULT_DATASET,
+    append_update,
+    compact,
+    ingest,
+    read_source,
+    snapshot_path,
+)
+
+# Contoh:
+#   python ingest.py jabodetabek_house_price.xlsx
+#   python ingest.py visdatJabodetabek.sql -o jabodetabek_house_price.feather
+#   python ingest.py listing_baru.csv --upsert
+#   python ingest.py listing_sintetis.parquet
+#   python ingest.py --compact
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Normalisasi sumber data (xlsx/csv/sql) menjadi snapshot kolumnar"
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        help="File sumber: .xlsx, .csv, .csv.gz, .parquet atau dump .sql",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="File snapshot tujuan (default: nama sumber dengan ekstensi .feather)",
+    )
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="Gabungkan listing di sumber ke dataset berdasarkan ads_id lewat jurnal",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Gabungkan jurnal upsert ke snapshot dataset",
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET,
+        help=f"Dataset tujuan --upsert/--compact (default: {DEFAULT_DATASET})",
+    )
+    args = parser.parse_args()
+
+    if args.compact:
+        target, rows, batches = compact(args.dataset)
+        print(f"{batches} batch digabung, {rows} baris ditulis ke {target}")
+        return
+    if args.source is None:
+        parser.error("source wajib diisi kecuali dengan --compact")
+    if args.upsert:
+        path, rows = append_update(args.dataset, read_source(args.source))
+        print(f"{rows} baris ditambahkan ke jurnal {path}")
+        return
+
+    target, rows, content_hash = ingest(
+        args.source, args.output or snapshot_path(args.source)
+    )
+    print(f"{rows} baris ditulis ke {target} (hash {content_hash[:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+import settings
+
+# Batas atas bucket histogram latensi (detik), sama seperti default Prometheus
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRIC_NAME = "visdat_span_seconds"
+
+# Context kosong yang dipakai ulang saat instrumentasi mati
+_NOOP = nullcontext()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.last = 0.0
+
+    def observe(self, seconds):
+        position = 0
+        while position < len(BUCKETS) and seconds > BUCKETS[position]:
+            position += 1
+        self.counts[position] += 1
+        self.count += 1
+        self.sum += seconds
+        self.last = seconds
+
+    def quantile(self, q):
+        # Perkiraan kuantil dari bucket (interpolasi linear seperti
+        # histogram_quantile di Prometheus)
+        if self.count == 0:
+            return float("nan")
+        rank = q * self.count
+        cumulative = 0
+        for position, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if position == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[position - 1] if position else 0.0
+                upper = BUCKETS[position]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return BUCKETS[-1]
+
+
+class Metrics:
+    # Registry span bernama -> histogram latensi, dipakai bersama semua
+    # session dalam satu proses. Saat disabled, span() hanya mengembalikan
+    # context kosong tanpa mengukur waktu.
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NOOP
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def frame(self):
+        # Ringkasan untuk panel timing (milidetik)
+        return pd.DataFrame(
+            [
+                (
+                    name,
+                    histogram.count,
+                    histogram.last * 1000,
+                    histogram.quantile(0.5) * 1000,
+                    histogram.quantile(0.95) * 1000,
+                    histogram.sum * 1000,
+                )
+                for name, histogram in self._items()
+            ],
+            columns=["span", "n", "terakhir ms", "p50 ms", "p95 ms", "total ms"],
+        )
+
+    def to_json(self):
+        spans = {
+            name: {
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "last": histogram.last,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+                "buckets": dict(
+                    zip([str(bound) for bound in BUCKETS] + ["+Inf"], histogram.counts)
+                ),
+            }
+            for name, histogram in self._items()
+        }
+        return json.dumps({"unit": "seconds", "spans": spans}, indent=2)
+
+    def to_prometheus(self):
+        # Format teks exposition Prometheus (bucket kumulatif)
+        lines = [
+            f"# HELP {METRIC_NAME} Latensi span dashboard",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for name, histogram in self._items():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(list(BUCKETS) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{METRIC_NAME}_bucket{{span="{label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{METRIC_NAME}_sum{{span="{label}"}} {histogram.sum}')
+            lines.append(f'{METRIC_NAME}_count{{span="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(settings.INSTRUMENTATION)
+span = metrics.span
@@ -0,0 +1,378 @@
+import atexit
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from aggregates import Aggregator
+from data_loader import read_snapshot, write_snapshot
+from filters import FilterEngine, FilterSpec
+from instrumentation import span
+from sql_backend import SqlFilterState
+
+# Jumlah state filter (mask) yang disimpan per worker
+WORKER_STATES = 64
+
+# Backend dan cache state milik satu proses worker
+_worker = {}
+
+
+def _init_worker(path):
+    # Snapshot dibaca dengan memory map: kolom numerik menunjuk ke page cache
+    # OS yang sama di semua worker, bukan salinan per proses
+    frame, content_hash = read_snapshot(path)
+    _worker["backend"] = Aggregator(FilterEngine(frame), content_hash)
+    _worker["states"] = OrderedDict()
+
+
+def _state(stages):
+    # FilterState dibangun ulang dari tahap-tahap spec; state dengan prefix
+    # yang sama (tahap sebelumnya di sidebar) dipakai ulang bila ada
+    states = _worker["states"]
+    key = tuple(stages)
+    state = states.get(key)
+    if state is not None:
+        states.move_to_end(key)
+        return state
+    state = _worker["backend"].start()
+    parent = states.get(key[:-1]) if key else None
+    remaining = key
+    if parent is not None:
+        state.spec = FilterSpec(parent.spec.stages)
+        state.mask = parent.mask.copy()
+        remaining = key[-1:]
+    for stage in remaining:
+        state.add(*stage)
+    states[key] = state
+    while len(states) > WORKER_STATES:
+        states.popitem(last=False)
+    return state
+
+
+def _call(method, stages, args):
+    state = _state(stages)
+    if method == "options":
+        (column,) = args
+        if column == "facilities":
+            return state.facility_options()
+        return state.options(column)
+    if method == "bounds":
+        return state.bounds(*args)
+    return getattr(_worker["backend"], method)(state, *args)
+
+
+def serve(address, path, authkey):
+    # Entry point proses worker (python -m process_backend): snapshot dimuat,
+    # pid dikirim sebagai tanda siap, lalu permintaan dilayani satu per satu
+    # sampai koneksi ditutup
+    _init_worker(path)
+    try:
+        connection = Client(address, authkey=authkey)
+    except OSError:
+        # Pool sudah ditutup sebelum worker ini siap
+        return
+    with connection:
+        connection.send(os.getpid())
+        while True:
+            try:
+                method, stages, args = connection.recv()
+            except EOFError:
+                return
+            try:
+                reply = (True, _call(method, stages, args))
+            except Exception as error:
+                reply = (False, error)
+            connection.send(reply)
+
+
+class WorkerPool:
+    # Proses worker untuk satu snapshot. Worker dijalankan sebagai modul
+    # (python -m process_backend), bukan lewat multiprocessing spawn yang
+    # mengeksekusi ulang script Streamlit (__main__) di setiap proses, lalu
+    # terhubung balik lewat multiprocessing.connection. Setiap worker
+    # melayani satu permintaan sekaligus; worker yang bebas menunggu di
+    # antrean. Worker yang mati atau melewati batas waktu diganti baru.
+    def __init__(self, path, workers, timeout):
+        self.path = path
+        self.timeout = timeout
+        self.closed = False
+        self._authkey = secrets.token_bytes(32)
+        self._listener = Listener(authkey=self._authkey)
+        self._address = self._listener.address
+        self._processes = {}
+        self._idle = queue.Queue()
+        self._active = 0
+        self._drained = threading.Condition()
+        threading.Thread(target=self._accept, daemon=True).start()
+        for _ in range(workers):
+            self._spawn()
+
+    def _spawn(self):
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "process_backend",
+                self._address,
+                self.path,
+            ],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=dict(os.environ, VISDAT_WORKER_KEY=self._authkey.hex()),
+        )
+        self._processes[process.pid] = process
+
+    def _accept(self):
+        # Worker yang sudah memuat snapshot masuk antrean bebas; worker yang
+        # tidak mengirim pid dalam batas waktu diabaikan
+        while not self.closed:
+            try:
+                connection = self._listener.accept()
+                if not connection.poll(self.timeout):
+                    connection.close()
+                    continue
+                pid = connection.recv()
+            except (OSError, EOFError, AuthenticationError):
+                continue
+            if self.closed:
+                connection.close()
+            else:
+                self._idle.put((pid, connection))
+        self._listener.close()
+
+    def _wake(self):
+        with suppress(OSError, EOFError, AuthenticationError):
+            Client(self._address, authkey=self._authkey).close()
+
+    def _replace(self, pid, connection):
+        connection.close()
+        process = self._processes.pop(pid, None)
+        if process is not None:
+            process.kill()
+            process.wait()
+        if not self.closed:
+            self._spawn()
+
+    def hold(self):
+        # Dipanggil sebelum pool dipakai; close() menunggu sampai semua
+        # pemakai melepasnya
+        with self._drained:
+            self._active += 1
+
+    def release(self):
+        with self._drained:
+            self._active -= 1
+            self._drained.notify_all()
+
+    def submit(self, request):
+        # Worker yang gagal diganti dan permintaan diulang sekali di worker lain
+        attempts = 0
+        while attempts < 2:
+            try:
+                pid, connection = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("Tidak ada worker backend process yang siap")
+            if connection.poll():
+                # Worker bebas tidak pernah mengirim apa pun: koneksinya sudah
+                # ditutup (proses mati saat menunggu), tidak dihitung percobaan
+                self._replace(pid, connection)
+                continue
+            attempts += 1
+            try:
+                connection.send(request)
+                if not connection.poll(self.timeout):
+                    raise TimeoutError
+                ok, result = connection.recv()
+            except (OSError, EOFError, TimeoutError):
+                self._replace(pid, connection)
+                continue
+            self._idle.put((pid, connection))
+            if not ok:
+                raise result
+            return result
+        raise RuntimeError("Worker backend process berhenti saat memproses permintaan")
+
+    def close(self):
+        # Permintaan yang masih berjalan diselesaikan dulu; menutup koneksi
+        # membuat worker keluar dari loop-nya
+        with self._drained:
+            self._drained.wait_for(lambda: self._active == 0, self.timeout)
+        self.closed = True
+        # Koneksi kosong membangunkan thread _accept supaya berhenti dan
+        # menutup listener; handshake-nya menunggu _accept, jadi dibuat di
+        # thread lain
+        threading.Thread(target=self._wake, daemon=True).start()
+        while True:
+            try:
+                self._idle.get_nowait()[1].close()
+            except queue.Empty:
+                break
+        for process in list(self._processes.values()):
+            try:
+                process.wait(self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._processes.clear()
+        with suppress(OSError):
+            os.remove(self.path)
+
+
+class ProcessBackend:
+    # Backend multi-proses: filter dan agregasi dijalankan di pool proses
+    # worker (tidak berebut GIL dengan thread script Streamlit). Script hanya
+    # mengirim tahap FilterSpec dan menerima hasil agregasi (cube, cluster,
+    # sketch, halaman tabel). Antarmuka sama dengan aggregates.Aggregator.
+    def __init__(self, workers=0, max_entries=256, timeout=60):
+        self.workers = workers or os.cpu_count()
+        self.timeout = timeout
+        self.columns = []
+        self.content_hash = None
+        self.path = None
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Jumlah permintaan agregasi yang benar-benar dikirim ke worker
+        self.passes = 0
+        self._pool = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        # Worker dan snapshot dibereskan saat server berhenti
+        atexit.register(self.close)
+
+    def sync(self, frame, content_hash):
+        # Dataset ditulis sebagai snapshot tak terkompresi yang di-memory-map
+        # worker. Pool baru dipasang di bawah lock; pool lama menyelesaikan
+        # permintaan yang masih berjalan, lalu ditutup beserta snapshot-nya.
+        with self._sync_lock:
+            if self._pool is not None and self.content_hash == content_hash:
+                return self
+            fd, path = tempfile.mkstemp(prefix="visdat-serve-", suffix=".feather")
+            os.close(fd)
+            try:
+                write_snapshot(frame, path)
+                pool = WorkerPool(path, self.workers, self.timeout)
+            except Exception:
+                os.remove(path)
+                raise
+            with self._lock:
+                old, self._pool = self._pool, pool
+                self.columns = list(frame.columns)
+                self.content_hash = content_hash
+                self.path = path
+                self._entries.clear()
+            if old is not None:
+                old.close()
+        return self
+
+    def refresh(self, dataset):
+        if self.content_hash != dataset.content_hash:
+            self.sync(dataset.frame, dataset.content_hash)
+        return self
+
+    def close(self):
+        with self._sync_lock:
+            with self._lock:
+                pool, self._pool = self._pool, None
+            if pool is not None:
+                pool.close()
+
+    def data_key(self, columns, state):
+        return self.content_hash
+
+    def start(self):
+        # State sisi UI hanya menyimpan FilterSpec, sama seperti backend SQL
+        return SqlFilterState(self)
+
+    def options(self, column, state):
+        key = (column, state.upstream())
+        return self._cached(key, lambda: self._submit("options", state, column), False)
+
+    def bounds(self, column, state):
+        key = (column, "bounds", state.upstream())
+        return self._cached(key, lambda: self._submit("bounds", state, column), False)
+
+    def cube(self, state, name="cube"):
+        return self._cached(
+            (name, state.spec.fingerprint()), lambda: self._submit("cube", state, name)
+        )
+
+    def summary(self, state):
+        return self.cube(state).summary()
+
+    def sketch(self, state, dimension):
+        return self._cached(
+            ("sketch", dimension, state.spec.fingerprint()),
+            lambda: self._submit("sketch", state, dimension),
+        )
+
+    def clusters(self, state, level):
+        return self._cached(
+            ("geo", level, state.spec.fingerprint()),
+            lambda: self._submit("clusters", state, level),
+        )
+
+    def rows(self, state, columns=None):
+        return self._submit("rows", state, columns)
+
+    def address_counts(self, state):
+        return self._submit("address_counts", state)
+
+    def page(self, state, column, descending, search, page, page_size):
+        return self._submit("page", state, column, descending, search, page, page_size)
+
+    def facet_stats(self):
+        return self.hits, self.misses
+
+    def _submit(self, method, state, *args):
+        # Pool diambil dan ditahan di bawah lock yang sama dengan pergantian
+        # pool, jadi sync() tidak menutupnya selagi permintaan ini berjalan
+        with self._lock:
+            pool = self._pool
+            if pool is None:
+                raise RuntimeError("Backend process sudah ditutup")
+            pool.hold()
+        try:
+            with span(f"worker.{method}"):
+                return pool.submit((method, state.spec.stages, args))
+        finally:
+            pool.release()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _cached(self, key, build, aggregate=True):
+        # Hasil dari pool lama tidak tercampur dengan dataset baru: hash dibaca
+        # di bawah lock yang sama dengan pergantian pool di sync()
+        with self._lock:
+            content_hash = self.content_hash
+            key = (content_hash, key)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if not aggregate:
+                    self.hits += 1
+                return self._entries[key]
+        value = build()
+        with self._lock:
+            if aggregate:
+                self.passes += 1
+            else:
+                self.misses += 1
+            # Hasil yang dihitung selagi sync() mengganti dataset tidak disimpan
+            if self.content_hash == content_hash:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], sys.argv[2], bytes.fromhex(os.environ["VISDAT_WORKER_KEY"]))
@@ -0,0 +1,75 @@
+import numpy as np
+
+# Seed tetap: sampel yang sama untuk state filter yang sama (cache figure stabil)
+SAMPLE_SEED = 0
+SAMPLING_METHODS = ["density", "random"]
+# Jumlah sel grid per sumbu untuk sampling density
+DENSITY_BINS = 64
+
+
+def outlier_mask(values):
+    # Titik di luar pagar 1.5 x IQR pada sumbu tersebut; harga dan luas sangat
+    # menceng ke kanan, jadi pagar dihitung di skala log bila semua positif
+    if np.nanmin(values) > 0:
+        values = np.log(values)
+    q1, q3 = np.nanpercentile(values, [25, 75])
+    iqr = q3 - q1
+    return (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+
+
+def grid_cells(x, y, bins=DENSITY_BINS):
+    cells = np.zeros(len(x), dtype=np.int64)
+    for values in (x, y):
+        low, high = values.min(), values.max()
+        scale = bins / (high - low) if high > low else 0
+        codes = np.minimum(((values - low) * scale).astype(np.int64), bins - 1)
+        cells = cells * bins + codes
+    return cells
+
+
+def density_sample(cells, size, rng):
+    # Stratified per sel grid: setiap sel menyumbang paling banyak `cap` titik,
+    # cap dipilih sebesar mungkin sehingga total <= size. Daerah jarang tetap
+    # terwakili, daerah padat ditipiskan.
+    _, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    ordered = np.sort(counts)
+    remaining = np.arange(len(ordered) - 1, -1, -1)
+    kept = np.cumsum(ordered) + ordered * remaining
+    position = np.searchsorted(kept, size, side="right") - 1
+    if position < 0:
+        cap = size // len(counts)
+    else:
+        cap = ordered[position] + (size - kept[position]) // max(remaining[position], 1)
+    if cap == 0:
+        # Sel lebih banyak dari kuota: sampel acak biasa
+        return np.sort(rng.choice(len(cells), size, replace=False))
+    order = np.lexsort((rng.random(len(cells)), inverse))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.empty(len(cells), dtype=np.int64)
+    rank[order] = np.arange(len(cells)) - starts[inverse[order]]
+    return np.flatnonzero(rank < cap)
+
+
+def thin_points(x, y, max_points, method="density", seed=SAMPLE_SEED):
+    # Posisi baris yang digambar: semua outlier ditambah sampel sisanya,
+    # urut seperti data asli
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    # Titik tanpa koordinat tidak digambar
+    valid = np.isfinite(x) & np.isfinite(y)
+    if valid.sum() <= max_points:
+        return np.flatnonzero(valid)
+    outliers = valid & (outlier_mask(x) | outlier_mask(y))
+    rest = np.flatnonzero(valid & ~outliers)
+    size = max(max_points - int(outliers.sum()), 0)
+    rng = np.random.default_rng(seed)
+    if size >= len(rest):
+        sample = rest
+    elif method == "random":
+        sample = np.sort(rng.choice(rest, size, replace=False))
+    elif method == "density":
+        cells = grid_cells(x[rest], y[rest])
+        sample = rest[density_sample(cells, size, rng)]
+    else:
+        raise ValueError(f"Metode sampling tidak dikenal: {method}")
+    return np.union1d(np.flatnonzero(outliers), sample)
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import Future
+
+
+class TaskGraph:
+    # Tugas bernama dengan dependensi untuk satu rerun. Tugas baru masuk
+    # antrean executor setelah semua dependensinya selesai, jadi tidak ada
+    # thread pool yang diam menunggu. Antrean FIFO: urutan add() menjadi
+    # prioritas (chart atas halaman lebih dulu). Tanpa executor setiap tugas
+    # langsung dijalankan di thread pemanggil (serial seperti biasa).
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.tasks = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, work, after=()):
+        # Nama yang sama hanya dijalankan sekali per graph
+        if name in self.tasks:
+            return self.tasks[name]
+        future = self.tasks[name] = Future()
+        dependencies = [self.tasks[dependency] for dependency in after]
+        remaining = [len(dependencies)]
+
+        def ready(_):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self._start(future, work, dependencies)
+
+        if not dependencies:
+            self._start(future, work, dependencies)
+        for dependency in dependencies:
+            dependency.add_done_callback(ready)
+        return future
+
+    def _start(self, future, work, dependencies):
+        if self.executor is None:
+            self._run(future, work, dependencies)
+        else:
+            self.executor.submit(self._run, future, work, dependencies)
+
+    def cancel(self):
+        # Tugas yang belum mulai dibatalkan (rerun baru menggantikan graph
+        # ini). Urutan add() sudah topologis, jadi turunan dibatalkan lebih
+        # dulu; yang masih di antrean executor keluar tanpa bekerja.
+        for future in reversed(list(self.tasks.values())):
+            future.cancel()
+
+    @staticmethod
+    def _run(future, work, dependencies):
+        if any(dependency.cancelled() for dependency in dependencies):
+            future.cancel()
+        if not future.set_running_or_notify_cancel():
+            return
+        # Error dependensi diteruskan ke tugas turunannya
+        for dependency in dependencies:
+            if dependency.exception() is not None:
+                future.set_exception(dependency.exception())
+                return
+        try:
+            result = work()
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
@@ -0,0 +1,66 @@
+import os
+
+# Konfigurasi dashboard lewat environment variable, contoh:
+#   VISDAT_LAZY_TABS=0 streamlit run Visualisasi_Data.py
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# File dataset yang dibuka dashboard (xlsx, csv, csv.gz, parquet, dump sql)
+DATASET = os.environ.get("VISDAT_DATASET", "jabodetabek_house_price.xlsx")
+
+# Hanya tab yang sedang dibuka yang membangun figure-nya
+LAZY_TABS = env_flag("VISDAT_LAZY_TABS", True)
+
+# Batas ukuran total cache figure (JSON) yang dipakai bersama semua session
+FIGURE_CACHE_MB = int(os.environ.get("VISDAT_FIGURE_CACHE_MB", "64"))
+
+# Mulai zoom ini peta menampilkan setiap listing; di bawahnya dikirim cluster
+MAP_DETAIL_ZOOM = int(os.environ.get("VISDAT_MAP_DETAIL_ZOOM", "14"))
+
+# Batas ukuran cache file unduhan (hasil export terakhir per state filter)
+EXPORT_CACHE_MB = int(os.environ.get("VISDAT_EXPORT_CACHE_MB", "128"))
+# File unduhan di atas batas ini tidak disimpan di cache
+EXPORT_ENTRY_MB = int(os.environ.get("VISDAT_EXPORT_ENTRY_MB", "16"))
+
+# Jumlah baris per halaman awal di tabel data (bisa diubah dari UI)
+TABLE_PAGE_SIZE = int(os.environ.get("VISDAT_TABLE_PAGE_SIZE", "50"))
+
+# Box plot harga memakai kuantil persis dari baris mentah bila seleksi
+# paling banyak sekian listing; di atasnya dipakai sketch kuantil (error ~1%)
+EXACT_QUANTILE_ROWS = int(os.environ.get("VISDAT_EXACT_QUANTILE_ROWS", "2000"))
+
+# Scatter Korelasi digambar dengan WebGL bila titiknya lebih dari batas ini
+SCATTER_WEBGL_ROWS = int(os.environ.get("VISDAT_SCATTER_WEBGL_ROWS", "1000"))
+
+# Penipisan titik scatter di server (0 = nonaktif): paling banyak sekian titik
+# plus semua outlier, dengan sampling "density" atau "random" (seed tetap)
+SCATTER_MAX_POINTS = int(os.environ.get("VISDAT_SCATTER_MAX_POINTS", "0"))
+SCATTER_SAMPLING = os.environ.get("VISDAT_SCATTER_SAMPLING", "density")
+
+# Jumlah thread untuk menghitung agregasi & figure tab secara bersamaan;
+# chart tampil begitu selesai (0 = serial di thread script)
+CHART_THREADS = int(os.environ.get("VISDAT_CHART_THREADS", "4"))
+
+# Instrumentasi span (load, filter, agregasi, figure, tabel, export) dan panel
+# timing developer; saat mati span tidak mengukur apa pun
+INSTRUMENTATION = env_flag("VISDAT_INSTRUMENTATION", False)
+
+# Backend filter & agregasi: "pandas" (di memori), "process" (pool proses
+# worker yang me-memory-map snapshot dataset), "sqlite", "postgres" atau
+# "duckdb". VISDAT_DATABASE berisi path file SQLite, DSN Postgres, atau file
+# Parquet untuk DuckDB.
+BACKEND = os.environ.get("VISDAT_BACKEND", "pandas")
+DATABASE = os.environ.get("VISDAT_DATABASE", "")
+
+# Jumlah proses worker untuk backend "process" (0 = jumlah CPU)
+WORKERS = int(os.environ.get("VISDAT_WORKERS", "0"))
+
+# Batas waktu (detik) satu permintaan ke worker backend "process"; worker yang
+# mati atau melewatinya diganti dan permintaan diulang sekali
+WORKER_TIMEOUT = float(os.environ.get("VISDAT_WORKER_TIMEOUT", "60"))
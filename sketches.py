@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+# Akurasi relatif sketch kuantil: nilai kuantil meleset paling banyak 1%
+RELATIVE_ACCURACY = 0.01
+
+
+class LogBuckets:
+    # Pemetaan nilai positif ke bucket logaritmik (gaya DDSketch): bucket i
+    # mencakup (gamma^(i-1), gamma^i], sehingga error relatifnya <= alpha
+    def __init__(self, alpha=RELATIVE_ACCURACY):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = np.log(self.gamma)
+
+    def index(self, values):
+        return np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+
+    def value(self, index):
+        # Titik tengah bucket (relatif), dipakai sebagai nilai kuantil
+        return 2 * self.gamma ** np.asarray(index, dtype="float64") / (self.gamma + 1)
+
+
+class QuantileSketch:
+    # Histogram bucket log per kategori (baris = kategori, kolom = bucket).
+    # Bisa digabung (merge) dengan menjumlahkan count, ukurannya tidak
+    # bergantung pada jumlah listing. min/max/sum disimpan persis.
+    def __init__(self, buckets, categories, offset, counts, mins, maxs, sums):
+        self.buckets = buckets
+        self.categories = pd.Index(categories)
+        self.offset = offset
+        self.counts = counts
+        self.mins = mins
+        self.maxs = maxs
+        self.sums = sums
+
+    @classmethod
+    def build(cls, buckets, codes, categories, bucket_ids, values):
+        # codes: kode kategori per baris (>= 0), bucket_ids: LogBuckets.index
+        codes = codes.astype(np.int64)
+        size = len(categories)
+        if len(bucket_ids):
+            offset = int(bucket_ids.min())
+            width = int(bucket_ids.max()) - offset + 1
+        else:
+            offset, width = 0, 1
+        cells = codes * width + (bucket_ids - offset)
+        counts = np.bincount(cells, minlength=size * width).reshape(size, width)
+        mins = np.full(size, np.inf)
+        np.minimum.at(mins, codes, values)
+        maxs = np.full(size, -np.inf)
+        np.maximum.at(maxs, codes, values)
+        sums = np.bincount(codes, weights=values, minlength=size)
+        return cls(buckets, categories, offset, counts, mins, maxs, sums)
+
+    def merge(self, other):
+        # Gabungan dua sketch (mis. dua partisi data) tanpa data mentah
+        categories = self.categories.union(other.categories, sort=False)
+        offset = min(self.offset, other.offset)
+        width = (
+            max(
+                self.offset + self.counts.shape[1],
+                other.offset + other.counts.shape[1],
+            )
+            - offset
+        )
+        counts = np.zeros((len(categories), width), dtype=np.int64)
+        mins = np.full(len(categories), np.inf)
+        maxs = np.full(len(categories), -np.inf)
+        sums = np.zeros(len(categories))
+        for sketch in (self, other):
+            rows = categories.get_indexer(sketch.categories)
+            start = sketch.offset - offset
+            counts[rows, start : start + sketch.counts.shape[1]] += sketch.counts
+            mins[rows] = np.minimum(mins[rows], sketch.mins)
+            maxs[rows] = np.maximum(maxs[rows], sketch.maxs)
+            sums[rows] += sketch.sums
+        return QuantileSketch(
+            self.buckets, categories, offset, counts, mins, maxs, sums
+        )
+
+    def quantiles(self, qs):
+        # Matriks kategori x q; kategori kosong menghasilkan NaN
+        totals = self.counts.sum(axis=1)
+        cumulative = np.cumsum(self.counts, axis=1)
+        result = np.full((len(self.categories), len(qs)), np.nan)
+        for column, q in enumerate(qs):
+            rank = np.floor(q * np.maximum(totals - 1, 0)) + 1
+            index = (cumulative < rank[:, None]).sum(axis=1)
+            values = self.buckets.value(index + self.offset)
+            # Nilai dijepit ke min/max persis supaya ekor tidak melebar
+            result[:, column] = np.clip(values, self.mins, self.maxs)
+        result[totals == 0] = np.nan
+        return result
+
+    def box_stats(self):
+        # Ringkasan box plot per kategori (pagar whisker = 1.5 x IQR)
+        totals = self.counts.sum(axis=1)
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75]).T
+        iqr = q3 - q1
+        stats = pd.DataFrame(
+            {
+                "count": totals,
+                "min": self.mins,
+                "q1": q1,
+                "median": median,
+                "q3": q3,
+                "max": self.maxs,
+                "mean": self.sums / np.maximum(totals, 1),
+                "lowerfence": np.maximum(q1 - 1.5 * iqr, self.mins),
+                "upperfence": np.minimum(q3 + 1.5 * iqr, self.maxs),
+            },
+            index=self.categories,
+        )
+        return stats[stats["count"] > 0]
+
+
+def sketch_from_groups(buckets, groups):
+    # Sketch dari hasil GROUP BY (kategori, bucket) backend SQL; kolom:
+    # category, bucket, count, min, max, sum
+    codes, categories = pd.factorize(groups["category"], sort=True)
+    bucket_ids = groups["bucket"].to_numpy(dtype=np.int64)
+    size = len(categories)
+    if len(bucket_ids):
+        offset = int(bucket_ids.min())
+        width = int(bucket_ids.max()) - offset + 1
+    else:
+        offset, width = 0, 1
+    counts = np.bincount(
+        codes * width + (bucket_ids - offset),
+        weights=groups["count"].to_numpy(dtype="float64"),
+        minlength=size * width,
+    )
+    counts = counts.astype(np.int64).reshape(size, width)
+    mins = np.full(size, np.inf)
+    np.minimum.at(mins, codes, groups["min"].to_numpy(dtype="float64"))
+    maxs = np.full(size, -np.inf)
+    np.maximum.at(maxs, codes, groups["max"].to_numpy(dtype="float64"))
+    sums = np.bincount(
+        codes, weights=groups["sum"].to_numpy(dtype="float64"), minlength=size
+    )
+    return QuantileSketch(buckets, categories, offset, counts, mins, maxs, sums)
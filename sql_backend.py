@@ -0,0 +1,684 @@
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from aggregates import CUBE_DIMENSIONS, DISTINCT_COLUMN, YEAR_DIMENSIONS, Cube
+from data_loader import DEFAULT_DATASET, apply_dtypes
+from filters import SEARCH_COLUMNS, FilterSpec, normalize_value, search_text
+from geo_index import MAX_LEVEL, MIN_LEVEL
+from instrumentation import span
+from sketches import LogBuckets, sketch_from_groups
+
+try:
+    import psycopg2
+except ImportError:
+    psycopg2 = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+TABLE = "jabodetabek_house_price"
+FACILITY_TABLE = "jabodetabek_house_facility"
+META_TABLE = "visdat_meta"
+
+# Kolom yang diberi indeks: dimensi cube, kolom filter rentang yang sering
+# dipakai, dan kunci listing
+INDEXED_COLUMNS = CUBE_DIMENSIONS + [
+    "price_in_rp",
+    "year_built",
+    "land_size_m2",
+    "building_size_m2",
+    "bedrooms",
+    "bathrooms",
+    "ads_id",
+]
+INSERT_ROWS = 10_000
+
+
+class Dialect:
+    # Perbedaan antar database yang dipakai backend: placeholder parameter,
+    # tipe kolom dan pembulatan ke bawah untuk sel grid peta
+    def __init__(self, name, param, types, floor):
+        self.name = name
+        self.param = param
+        self.types = types
+        self.floor = floor
+
+
+SQLITE = Dialect(
+    "sqlite",
+    "?",
+    {"int": "INTEGER", "float": "REAL", "double": "REAL", "text": "TEXT"},
+    # Nilai selalu positif, jadi CAST (potong desimal) = floor
+    lambda expr: f"CAST({expr} AS INTEGER)",
+)
+POSTGRES = Dialect(
+    "postgres",
+    "%s",
+    {
+        "int": "BIGINT",
+        "float": "REAL",
+        "double": "DOUBLE PRECISION",
+        "text": "TEXT",
+        "smallint": "SMALLINT",
+    },
+    lambda expr: f"FLOOR({expr})",
+)
+DUCKDB = Dialect(
+    "duckdb",
+    "?",
+    {
+        "int": "BIGINT",
+        "float": "REAL",
+        "double": "DOUBLE",
+        "text": "VARCHAR",
+        "smallint": "SMALLINT",
+    },
+    lambda expr: f"FLOOR({expr})",
+)
+
+
+def column_type(dtype, dialect):
+    # Tipe SQL dari dtype hasil data_loader.apply_dtypes (bukan varchar semua)
+    if str(dtype) == "Int16":
+        return dialect.types.get("smallint", dialect.types["int"])
+    if pd.api.types.is_integer_dtype(dtype):
+        return dialect.types["int"]
+    if dtype == np.float32:
+        return dialect.types["float"]
+    if pd.api.types.is_float_dtype(dtype):
+        return dialect.types["double"]
+    return dialect.types["text"]
+
+
+def quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def compile_where(spec, dialect):
+    # FilterSpec -> (klausa WHERE, parameter). Nilai selalu lewat placeholder.
+    clauses = []
+    params = []
+    for column, kind, value in spec.active():
+        if kind == "range":
+            low, high = value
+            if low is not None:
+                clauses.append(f"{quote(column)} >= {dialect.param}")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{quote(column)} <= {dialect.param}")
+                params.append(high)
+        elif kind == "facilities":
+            placeholders = ", ".join([dialect.param] * len(value))
+            clauses.append(
+                f"row_id IN (SELECT row_id FROM {FACILITY_TABLE}"
+                f" WHERE facility IN ({placeholders})"
+                f" GROUP BY row_id HAVING COUNT(*) = {dialect.param})"
+            )
+            params.extend(value)
+            params.append(len(value))
+        elif kind == "search":
+            clauses.append(f"search_text LIKE {dialect.param} ESCAPE '\\'")
+            params.append("%" + escape_like(value) + "%")
+        else:
+            placeholders = ", ".join([dialect.param] * len(value))
+            clauses.append(f"{quote(column)} IN ({placeholders})")
+            params.extend(value)
+    if not clauses:
+        return "", []
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def compile_group_by(dimensions, spec, dialect):
+    # Agregasi chart: count dan sum harga per kombinasi dimensi
+    where, params = compile_where(spec, dialect)
+    columns = ", ".join(quote(column) for column in dimensions)
+    sql = (
+        f"SELECT {columns}, COUNT(*) AS count, SUM(price_in_rp) AS price_sum,"
+        " MIN(price_in_rp) AS price_min, MAX(price_in_rp) AS price_max"
+        f" FROM {TABLE}{where} GROUP BY {columns}"
+    )
+    return sql, params
+
+
+def facility_rows(frame):
+    # Pasangan (row_id, fasilitas) dengan aturan parse yang sama seperti
+    # filters.FacilityIndex
+    facilities = frame["facilities"].reset_index(drop=True).fillna("").astype(str)
+    tokens = facilities.str.split(",").explode().str.strip()
+    tokens = tokens[tokens != ""]
+    pairs = pd.DataFrame({"row_id": tokens.index, "facility": tokens.to_numpy()})
+    return pairs.drop_duplicates()
+
+
+def _records(frame):
+    # Baris sebagai tuple nilai Python, NaN/NA menjadi NULL
+    values = frame.astype(object).where(frame.notna(), None)
+    return [tuple(_plain(item) for item in row) for row in values.to_numpy()]
+
+
+def _plain(item):
+    return item.item() if isinstance(item, np.generic) else item
+
+
+class ConnectionPool:
+    # Pool koneksi sederhana: maksimal `size` koneksi terbuka, koneksi yang
+    # selesai dipakai dikembalikan ke antrean untuk query berikutnya
+    def __init__(self, connect, size=4, transactions=True):
+        self._connect = connect
+        self.transactions = transactions
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            if not self.transactions:
+                yield connection
+            else:
+                try:
+                    yield connection
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def sqlite_pool(path, size=4):
+    import sqlite3
+
+    return ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), size)
+
+
+def postgres_pool(dsn, size=4):
+    if psycopg2 is None:
+        raise RuntimeError("Backend postgres membutuhkan paket psycopg2")
+    return ConnectionPool(lambda: psycopg2.connect(dsn), size)
+
+
+def duckdb_pool(size=4):
+    if duckdb is None:
+        raise RuntimeError("Backend duckdb membutuhkan paket duckdb")
+    # Satu database in-process; setiap koneksi pool adalah cursor-nya sendiri
+    # (katalog/view dipakai bersama, query berjalan paralel)
+    database = duckdb.connect(":memory:")
+    return ConnectionPool(database.cursor, size, transactions=False)
+
+
+def connect(backend, database=""):
+    # Backend dari konfigurasi: "sqlite" (file lokal), "postgres" (DSN) atau
+    # "duckdb" (file Parquet, dibaca langsung tanpa dimuat ke pandas)
+    if backend == "sqlite":
+        path = database or os.path.splitext(DEFAULT_DATASET)[0] + ".sqlite"
+        return SqlBackend(sqlite_pool(path), SQLITE)
+    if backend == "postgres":
+        if not database:
+            raise ValueError("Backend postgres membutuhkan VISDAT_DATABASE (DSN)")
+        return SqlBackend(postgres_pool(database), POSTGRES)
+    if backend == "duckdb":
+        return DuckDbBackend(duckdb_pool(), database)
+    raise ValueError(f"Backend tidak dikenal: {backend}")
+
+
+class SqlFilterState:
+    # Pengganti FilterState untuk backend SQL: hanya menyimpan FilterSpec,
+    # opsi dan batas widget diambil lewat query ke database
+    def __init__(self, backend):
+        self.backend = backend
+        self.spec = FilterSpec()
+        self.timings = []
+
+    def upstream(self):
+        return self.spec.fingerprint() if self.spec.active() else None
+
+    def options(self, column):
+        return self._timed(column, lambda: self.backend.options(column, self))
+
+    def bounds(self, column):
+        return self._timed(column, lambda: self.backend.bounds(column, self))
+
+    def facility_options(self):
+        return self._timed(
+            "facilities", lambda: self.backend.options("facilities", self)
+        )
+
+    def add(self, column, kind, value):
+        self.spec.add(column, kind, value)
+        return self
+
+    def _timed(self, name, query):
+        start = time.perf_counter()
+        result = query()
+        self.timings.append((name, time.perf_counter() - start))
+        return result
+
+    def memory_bytes(self):
+        # Seleksi tetap di database, session hanya memegang FilterSpec
+        return 0
+
+    def timing_frame(self):
+        return pd.DataFrame(
+            [(name, seconds * 1000) for name, seconds in self.timings],
+            columns=["tahap", "ms"],
+        )
+
+
+class SqlBackend:
+    # Backend yang mendorong filter (WHERE berparameter) dan agregasi
+    # (GROUP BY) ke database. Antarmuka sama dengan aggregates.Aggregator.
+    def __init__(self, pool, dialect, max_entries=256):
+        self.pool = pool
+        self.dialect = dialect
+        self.columns = []
+        self.dtypes = {}
+        self.content_hash = None
+        self.buckets = LogBuckets()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Jumlah query agregasi yang benar-benar dijalankan
+        self.passes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.pool.close()
+
+    def query(self, sql, params=()):
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(sql, list(params))
+            names = [item[0] for item in cursor.description]
+            rows = cursor.fetchall()
+        return pd.DataFrame.from_records(rows, columns=names)
+
+    def stored_hash(self):
+        try:
+            result = self.query(
+                f"SELECT value FROM {META_TABLE} WHERE key = {self.dialect.param}",
+                ["content_hash"],
+            )
+        except Exception:
+            return None
+        return result["value"].iloc[0] if len(result) else None
+
+    def sync(self, frame, content_hash):
+        # Muat ulang tabel hanya jika isi dataset berubah
+        self.columns = list(frame.columns)
+        self.dtypes = frame.dtypes.to_dict()
+        if self.stored_hash() != content_hash:
+            self.load(frame, content_hash)
+        self.content_hash = content_hash
+        self.clear()
+        return self
+
+    def refresh(self, dataset):
+        # Backend SQL memuat ulang tabel jika isi dataset berubah (upsert)
+        if self.content_hash != dataset.content_hash:
+            self.sync(dataset.frame, dataset.content_hash)
+        return self
+
+    def data_key(self, columns, state):
+        return self.content_hash
+
+    def load(self, frame, content_hash):
+        param = self.dialect.param
+        frame = frame.reset_index(drop=True)
+        columns = [
+            f"{quote(column)} {column_type(dtype, self.dialect)}"
+            for column, dtype in frame.dtypes.items()
+        ]
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            for table in (FACILITY_TABLE, TABLE, META_TABLE):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(
+                f"CREATE TABLE {TABLE} (row_id INTEGER PRIMARY KEY, "
+                + ", ".join(columns)
+                + ", search_text TEXT)"
+            )
+            cursor.execute(
+                f"CREATE TABLE {FACILITY_TABLE} (row_id INTEGER NOT NULL, "
+                "facility TEXT NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE TABLE {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)"
+            )
+
+            listings = frame.copy()
+            listings.insert(0, "row_id", np.arange(len(frame)))
+            listings["search_text"] = search_text(frame)
+            placeholders = ", ".join([param] * listings.shape[1])
+            names = ", ".join(quote(column) for column in listings.columns)
+            insert = f"INSERT INTO {TABLE} ({names}) VALUES ({placeholders})"
+            for start in range(0, len(listings), INSERT_ROWS):
+                chunk = listings.iloc[start : start + INSERT_ROWS]
+                cursor.executemany(insert, _records(chunk))
+            cursor.executemany(
+                f"INSERT INTO {FACILITY_TABLE} VALUES ({param}, {param})",
+                _records(facility_rows(frame)),
+            )
+
+            for column in INDEXED_COLUMNS:
+                cursor.execute(
+                    f"CREATE INDEX idx_{TABLE}_{column} ON {TABLE} ({quote(column)})"
+                )
+            cursor.execute(
+                f"CREATE INDEX idx_{FACILITY_TABLE} "
+                f"ON {FACILITY_TABLE} (facility, row_id)"
+            )
+            cursor.execute(
+                f"INSERT INTO {META_TABLE} VALUES ({param}, {param})",
+                ["content_hash", content_hash],
+            )
+
+    def start(self):
+        return SqlFilterState(self)
+
+    def options(self, column, state):
+        key = (column, state.upstream())
+        return self._cached(key, lambda: self._options(column, state.spec), False)
+
+    def _options(self, column, spec):
+        where, params = compile_where(spec, self.dialect)
+        if column == "facilities":
+            sql = (
+                f"SELECT DISTINCT facility FROM {FACILITY_TABLE}"
+                f" WHERE row_id IN (SELECT row_id FROM {TABLE}{where})"
+                " ORDER BY facility"
+            )
+        else:
+            condition = f"{quote(column)} IS NOT NULL"
+            where = f"{where} AND {condition}" if where else f" WHERE {condition}"
+            sql = (
+                f"SELECT DISTINCT {quote(column)} FROM {TABLE}{where}"
+                f" ORDER BY {quote(column)}"
+            )
+        return pd.Index(self.query(sql, params).iloc[:, 0])
+
+    def bounds(self, column, state):
+        key = (column, "bounds", state.upstream())
+        return self._cached(key, lambda: self._bounds(column, state.spec), False)
+
+    def _bounds(self, column, spec):
+        where, params = compile_where(spec, self.dialect)
+        result = self.query(
+            f"SELECT MIN({quote(column)}), MAX({quote(column)}) FROM {TABLE}{where}",
+            params,
+        )
+        low, high = result.iloc[0]
+        if pd.isna(low):
+            return None
+        return float(low), float(high)
+
+    def cube(self, state, name="cube"):
+        dimensions = CUBE_DIMENSIONS if name == "cube" else YEAR_DIMENSIONS
+
+        def build():
+            sql, params = compile_group_by(dimensions, state.spec, self.dialect)
+            frame = self.query(sql, params)
+            frame["count"] = frame["count"].astype("int64")
+            for column in ["price_sum", "price_min", "price_max"]:
+                frame[column] = frame[column].astype("float64")
+            distinct = None
+            if name == "cube":
+                where, params = compile_where(state.spec, self.dialect)
+                distinct = self.query(
+                    f"SELECT COUNT(DISTINCT {quote(DISTINCT_COLUMN)})"
+                    f" FROM {TABLE}{where}",
+                    params,
+                ).iloc[0, 0]
+            return Cube(dimensions, frame, int(distinct or 0))
+
+        return self._cached((name, state.spec.fingerprint()), build)
+
+    def clusters(self, state, level):
+        level = min(max(level, MIN_LEVEL), MAX_LEVEL)
+        scale = 2**level
+        x = self.dialect.floor(f'("long" + 180.0) / 360.0 * {scale}')
+        y = self.dialect.floor(f"(lat + 90.0) / 180.0 * {scale}")
+
+        def build():
+            where, params = compile_where(state.spec, self.dialect)
+            condition = "lat IS NOT NULL AND long IS NOT NULL"
+            where = f"{where} AND {condition}" if where else f" WHERE {condition}"
+            frame = self.query(
+                f'SELECT AVG(lat) AS lat, AVG("long") AS long, COUNT(*) AS count,'
+                f" SUM(price_in_rp) AS price_sum FROM {TABLE}{where}"
+                f" GROUP BY {x}, {y}",
+                params,
+            ).astype("float64")
+            frame["count"] = frame["count"].astype("int64")
+            frame["price_mean"] = frame["price_sum"] / frame["count"]
+            return frame
+
+        return self._cached(("geo", level, state.spec.fingerprint()), build)
+
+    def summary(self, state):
+        return self.cube(state).summary()
+
+    def sketch(self, state, dimension):
+        # Bucket sketch dihitung di database: GROUP BY (kategori, bucket log)
+        def build():
+            where, params = compile_where(state.spec, self.dialect)
+            condition = f"price_in_rp > 0 AND {quote(dimension)} IS NOT NULL"
+            where = f"{where} AND {condition}" if where else f" WHERE {condition}"
+            bucket = f"CEIL(LN(price_in_rp) / {float(self.buckets.log_gamma)!r})"
+            groups = self.query(
+                f"SELECT {quote(dimension)} AS category, {bucket} AS bucket,"
+                " COUNT(*) AS count, MIN(price_in_rp) AS min,"
+                " MAX(price_in_rp) AS max, SUM(price_in_rp) AS sum"
+                f" FROM {TABLE}{where} GROUP BY 1, 2",
+                params,
+            )
+            return sketch_from_groups(self.buckets, groups)
+
+        return self._cached(("sketch", dimension, state.spec.fingerprint()), build)
+
+    def rows(self, state, columns=None):
+        where, params = compile_where(state.spec, self.dialect)
+        return self._frame(f"{where} ORDER BY row_id", params, columns)
+
+    def address_counts(self, state):
+        # Jumlah listing per koordinat dihitung database (window function)
+        where, params = compile_where(state.spec, self.dialect)
+        counts = self.query(
+            'SELECT CASE WHEN lat IS NULL OR "long" IS NULL THEN NULL'
+            ' ELSE COUNT(*) OVER (PARTITION BY lat, "long") END AS address_count'
+            f" FROM {TABLE}{where} ORDER BY row_id",
+            params,
+        )
+        return counts["address_count"].to_numpy(dtype="float64")
+
+    def page(self, state, column, descending, search, page, page_size):
+        spec = FilterSpec(state.spec.stages)
+        spec.add(None, "search", normalize_value("search", search))
+        where, params = compile_where(spec, self.dialect)
+        total = int(
+            self.query(f"SELECT COUNT(*) FROM {TABLE}{where}", params).iloc[0, 0]
+        )
+        order = "row_id"
+        if column is not None:
+            direction = "DESC" if descending else "ASC"
+            order = f"{quote(column)} IS NULL, {quote(column)} {direction}, row_id"
+        param = self.dialect.param
+        rows = self._frame(
+            f"{where} ORDER BY {order} LIMIT {param} OFFSET {param}",
+            params + [page_size, (page - 1) * page_size],
+        )
+        return rows, total
+
+    def _frame(self, clause, params, columns=None):
+        # Baris dengan kolom & dtype yang sama seperti dataset pandas
+        columns = self.columns if columns is None else columns
+        names = ", ".join(quote(column) for column in columns)
+        frame = self.query(f"SELECT row_id, {names} FROM {TABLE}{clause}", params)
+        frame.index = pd.Index(frame.pop("row_id").to_numpy(dtype="int64"))
+        return self.restore_dtypes(frame)
+
+    def restore_dtypes(self, frame):
+        return frame.astype({column: self.dtypes[column] for column in frame.columns})
+
+    def facet_stats(self):
+        return self.hits, self.misses
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _cached(self, key, build, aggregate=True):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if not aggregate:
+                    self.hits += 1
+                return self._entries[key]
+        name = f"aggregate.{key[0]}" if aggregate else f"facet.{key[0]}"
+        with span(name):
+            value = build()
+        with self._lock:
+            if aggregate:
+                self.passes += 1
+            else:
+                self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+class DuckDbBackend(SqlBackend):
+    # Backend DuckDB: tabel listing adalah view di atas file Parquet, jadi
+    # query membaca kolom yang dibutuhkan langsung dari file (vektor,
+    # multi-thread). Tanpa path file, dataset aktif diekspor ke Parquet.
+    def __init__(self, pool, path="", max_entries=256):
+        super().__init__(pool, DUCKDB, max_entries)
+        self.path = path
+        self.row_count = 0
+
+    def query(self, sql, params=()):
+        with self.pool.connection() as connection:
+            return connection.execute(sql, list(params)).df()
+
+    def sync(self, frame, content_hash):
+        if self.path:
+            return self.attach()
+        path = os.path.splitext(DEFAULT_DATASET)[0] + ".parquet"
+        if parquet_hash(path) != content_hash:
+            write_parquet(frame, path, content_hash)
+        self.load(path, content_hash)
+        self.content_hash = content_hash
+        self.clear()
+        return self
+
+    def attach(self):
+        # File Parquet eksternal di-query langsung tanpa dataset pandas; view
+        # dibuat ulang hanya jika file berubah (hash metadata, atau ukuran &
+        # mtime file)
+        content_hash = parquet_hash(self.path) or file_hash(self.path)
+        if content_hash != self.content_hash:
+            self.load(self.path, content_hash)
+            self.row_count = pq.read_metadata(self.path).num_rows
+            self.content_hash = content_hash
+            self.clear()
+        return self
+
+    def refresh(self, dataset):
+        if self.path:
+            return self.attach()
+        return super().refresh(dataset)
+
+    def describe(self):
+        size = os.path.getsize(self.path) / 1024**2
+        return (
+            f"{self.row_count:,} baris di-query langsung dari "
+            f"{os.path.basename(self.path)} ({size:.1f} MB) oleh DuckDB"
+        )
+
+    def load(self, path, content_hash):
+        source = "read_parquet('{}', file_row_number = true)".format(
+            os.path.abspath(path).replace("'", "''")
+        )
+        schema = self.query(f"DESCRIBE SELECT * FROM {source}")
+        self.columns = [
+            column for column in schema["column_name"] if column != "file_row_number"
+        ]
+        search = ", ".join(quote(column) for column in SEARCH_COLUMNS)
+        with self.pool.connection() as connection:
+            connection.execute(
+                f"CREATE OR REPLACE VIEW {TABLE} AS SELECT file_row_number AS row_id,"
+                f" * EXCLUDE (file_row_number),"
+                f" lower(concat_ws(' ', {search})) AS search_text FROM {source}"
+            )
+            connection.execute(
+                f"CREATE OR REPLACE VIEW {FACILITY_TABLE} AS"
+                " SELECT DISTINCT row_id, trim(token) AS facility FROM ("
+                " SELECT row_id, unnest(string_split(facilities, ',')) AS token"
+                f" FROM {TABLE}) WHERE trim(token) <> ''"
+            )
+
+    def restore_dtypes(self, frame):
+        # Dtype dikembalikan dengan aturan data_loader (kategori dari data)
+        return apply_dtypes(frame)
+
+
+def parquet_hash(path):
+    # Hash isi dataset yang disimpan di metadata file Parquet (jika ada)
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (FileNotFoundError, OSError):
+        return None
+    value = metadata.get(b"visdat.content_hash")
+    return value.decode("utf-8") if value else None
+
+
+def file_hash(path):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def write_parquet(frame, path, content_hash):
+    table = pa.Table.from_pandas(frame.reset_index(drop=True), preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b"visdat.content_hash"] = content_hash.encode("utf-8")
+    # Nama sementara unik seperti data_loader.write_snapshot
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        pq.write_table(table.replace_schema_metadata(metadata), temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,253 @@
+import argparse
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DEFAULT_DATASET, load_dataset
+from filters import parse_facilities
+
+# Contoh:
+#   python synthetic.py --rows 1000000 -o listing_sintetis.parquet
+#   python synthetic.py --rows 200000 -o listing_sintetis.csv.gz --seed 7
+#   python ingest.py listing_sintetis.parquet
+#   VISDAT_DATASET=listing_sintetis.parquet streamlit run Visualisasi_Data.py
+
+CHUNK_ROWS = 100_000
+# Atribut yang disalin dari listing "donor" acak: kota -> kecamatan dan
+# kombinasi kamar, luas, lantai dan umur bangunan tetap realistis
+DONOR_COLUMNS = [
+    "title",
+    "address",
+    "district",
+    "city",
+    "property_type",
+    "bedrooms",
+    "bathrooms",
+    "land_size_m2",
+    "building_size_m2",
+    "carports",
+    "electricity",
+    "maid_bedrooms",
+    "maid_bathrooms",
+    "floors",
+    "building_age",
+    "year_built",
+    "property_condition",
+    "building_orientation",
+    "garages",
+]
+# Campuran kategori yang dipelajari per kota
+CITY_MIXES = ["certificate", "furnishing"]
+SIZE_COLUMNS = ["land_size_m2", "building_size_m2"]
+# Batas sebaran koordinat di sekitar pusat kecamatan (derajat); geocode yang
+# meleset jauh tidak ikut melebarkan cluster
+MIN_COORDINATE_SPREAD = 0.005
+MAX_COORDINATE_SPREAD = 0.03
+PRICE_STEP = 1_000_000
+
+
+class ListingModel:
+    # Model generatif listing yang dipelajari dari dataset asli:
+    # - kota -> kecamatan (dan atribut bangunan) lewat listing donor
+    # - harga: regresi log-harga terhadap log luas tanah & bangunan per kota
+    # - campuran sertifikat & perabotan per kota
+    # - kosakata fasilitas dan distribusi jumlah fasilitas per listing
+    # - koordinat: cluster gaussian per kecamatan
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        # Kategori disimpan sebagai teks biasa supaya skema setiap potongan sama
+        frame = frame.astype(
+            {
+                column: "str"
+                for column in frame.columns
+                if isinstance(frame[column].dtype, pd.CategoricalDtype)
+            }
+        )
+        self.donors = frame[DONOR_COLUMNS].reset_index(drop=True)
+        self.mixes = {
+            column: frame.groupby("city")[column]
+            .value_counts(normalize=True)
+            .rename("p")
+            .reset_index()
+            for column in CITY_MIXES
+        }
+        self.price_models = self._fit_prices(frame)
+        self.coordinates = self._fit_coordinates(frame)
+        rows, tokens = parse_facilities(frame["facilities"])
+        codes, self.vocabulary = pd.factorize(tokens)
+        counts = np.bincount(codes, minlength=len(self.vocabulary))
+        self.facility_weights = counts / counts.sum()
+        self.facility_counts = np.bincount(rows, minlength=len(frame))
+
+    @staticmethod
+    def _design(sizes):
+        return np.column_stack([np.ones(len(sizes)), np.log1p(sizes.fillna(0))])
+
+    def _fit_prices(self, frame):
+        # Per kota: koefisien OLS dan simpangan residual; kota dengan data
+        # sedikit memakai model gabungan
+        prices = np.log(frame["price_in_rp"].clip(lower=PRICE_STEP))
+        design = self._design(frame[SIZE_COLUMNS].astype("float64"))
+        models = {None: least_squares(design, prices.to_numpy())}
+        for city, rows in frame.groupby("city").indices.items():
+            if len(rows) >= 10 * design.shape[1]:
+                models[city] = least_squares(design[rows], prices.to_numpy()[rows])
+        return models
+
+    def _fit_coordinates(self, frame):
+        grouped = frame.groupby(["city", "district"])[["lat", "long"]]
+        centers = grouped.mean()
+        spreads = (
+            grouped.std()
+            .fillna(0)
+            .clip(lower=MIN_COORDINATE_SPREAD, upper=MAX_COORDINATE_SPREAD)
+        )
+        return centers.join(spreads, rsuffix="_spread").reset_index()
+
+    def sample(self, rows, rng, offset=0):
+        donors = rng.integers(0, len(self.donors), rows)
+        listings = self.donors.iloc[donors].reset_index(drop=True)
+        # Luas diberi jitter supaya tidak sekadar salinan donor
+        for column in SIZE_COLUMNS:
+            jitter = rng.lognormal(0, 0.1, rows)
+            listings[column] = (listings[column] * jitter).round().astype("float32")
+        cities = listings["city"].to_numpy()
+        listings["price_in_rp"] = self._sample_prices(listings, cities, rng)
+        for column in CITY_MIXES:
+            listings[column] = self._sample_mix(column, cities, rng)
+        lat, long = self._sample_coordinates(listings, rng)
+        listings["lat"], listings["long"] = lat, long
+        listings["facilities"] = self._sample_facilities(rows, rng)
+        ids = pd.Series(np.arange(offset, offset + rows)).astype("str")
+        listings["ads_id"] = "syn" + ids
+        slugs = pd.Series(cities).str.strip().str.lower().str.replace(" ", "-")
+        listings["url"] = (
+            "https://synthetic.local/properti/" + slugs + "/" + listings["ads_id"] + "/"
+        )
+        return listings[self.columns]
+
+    def _sample_prices(self, listings, cities, rng):
+        design = self._design(listings[SIZE_COLUMNS].astype("float64"))
+        log_prices = np.empty(len(listings))
+        for city in np.unique(cities):
+            rows = np.flatnonzero(cities == city)
+            coefficients, sigma = self.price_models.get(city, self.price_models[None])
+            noise = rng.normal(0, sigma, len(rows))
+            log_prices[rows] = design[rows] @ coefficients + noise
+        # Harga dibulatkan ke juta rupiah seperti listing asli
+        prices = np.round(np.exp(log_prices) / PRICE_STEP) * PRICE_STEP
+        return np.maximum(prices, PRICE_STEP).astype("int64")
+
+    def _sample_mix(self, column, cities, rng):
+        mix = self.mixes[column]
+        result = np.empty(len(cities), dtype=object)
+        for city in np.unique(cities):
+            rows = np.flatnonzero(cities == city)
+            options = mix[mix["city"] == city]
+            probabilities = options["p"].to_numpy() / options["p"].sum()
+            result[rows] = options[column].to_numpy()[
+                rng.choice(len(options), len(rows), p=probabilities)
+            ]
+        return pd.Series(result, dtype="str")
+
+    def _sample_coordinates(self, listings, rng):
+        coordinates = listings[["city", "district"]].merge(
+            self.coordinates, on=["city", "district"], how="left"
+        )
+        result = []
+        for column in ["lat", "long"]:
+            noise = rng.normal(0, 1, len(listings))
+            spread = coordinates[column + "_spread"].to_numpy()
+            result.append(coordinates[column].to_numpy() + noise * spread)
+        return result
+
+    def _sample_facilities(self, rows, rng):
+        # Jumlah fasilitas dari distribusi empiris, nama fasilitas dipilih
+        # tanpa pengembalian sesuai frekuensinya (trik Gumbel top-k)
+        counts = rng.choice(self.facility_counts, rows)
+        keys = np.log(self.facility_weights) + rng.gumbel(
+            size=(rows, len(self.vocabulary))
+        )
+        order = np.argsort(-keys, axis=1)
+        vocabulary = np.asarray(self.vocabulary, dtype=object)
+        return pd.Series(
+            [
+                ", ".join(vocabulary[order[row, :count]])
+                for row, count in enumerate(counts)
+            ],
+            dtype="str",
+        )
+
+
+def least_squares(design, values):
+    coefficients = np.linalg.lstsq(design, values, rcond=None)[0]
+    sigma = float(np.std(values - design @ coefficients))
+    return coefficients, sigma
+
+
+def generate(model, rows, chunk_rows=CHUNK_ROWS, seed=0):
+    # Listing sintetis per potongan, tidak pernah seluruhnya di memori
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        yield model.sample(min(chunk_rows, rows - start), rng, start)
+
+
+def write_chunks(chunks, path):
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    elif path.endswith(".csv") or path.endswith(".csv.gz"):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8", newline="") as output:
+            for position, chunk in enumerate(chunks):
+                chunk.to_csv(output, index=False, header=position == 0)
+    else:
+        raise ValueError(f"Format output tidak dikenal: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Buat dataset listing sintetis dari statistik dataset asli"
+    )
+    parser.add_argument("--rows", type=int, required=True, help="Jumlah listing")
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="File tujuan: .parquet, .csv atau .csv.gz (ditulis per potongan)",
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET,
+        help=f"Dataset asli untuk dipelajari (default: {DEFAULT_DATASET})",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=CHUNK_ROWS,
+        help=f"Baris per potongan (default: {CHUNK_ROWS})",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model = ListingModel(load_dataset(args.dataset).frame)
+    write_chunks(generate(model, args.rows, args.chunk_rows, args.seed), args.output)
+    size = os.path.getsize(args.output) / 1024**2
+    print(f"{args.rows} listing sintetis ditulis ke {args.output} ({size:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps, colors
+
+GRADIENT_BINS = 16
+PAGE_SIZES = [25, 50, 100, 200]
+
+
+def page_sizes(default):
+    return sorted(set(PAGE_SIZES) | {default})
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+@lru_cache(maxsize=None)
+def gradient_palette(cmap="Blues", bins=GRADIENT_BINS):
+    # CSS per bin warna dihitung sekali; teks putih di atas warna gelap
+    # (ambang luminans sama dengan Styler.background_gradient)
+    styles = []
+    for rgba in colormaps[cmap](np.linspace(0, 1, bins)):
+        luminance = 0.2126 * rgba[0] + 0.7152 * rgba[1] + 0.0722 * rgba[2]
+        text = "#f1f1f1" if luminance < 0.408 else "#000000"
+        styles.append(f"background-color: {colors.to_hex(rgba)}; color: {text};")
+    return np.array(styles + [""], dtype=object)
+
+
+def gradient_styles(page, cmap="Blues"):
+    # Setiap kolom numerik dibagi ke bin warna sesuai min/max di halaman ini
+    palette = gradient_palette(cmap)
+    bins = len(palette) - 1
+    styles = pd.DataFrame("", index=page.index, columns=page.columns)
+    for column in page.select_dtypes("number").columns:
+        values = page[column].to_numpy(dtype="float64", na_value=np.nan)
+        missing = np.isnan(values)
+        if missing.all():
+            continue
+        low, high = np.nanmin(values), np.nanmax(values)
+        scaled = (values - low) / (high - low) if high > low else values * 0
+        index = np.clip(np.nan_to_num(scaled) * (bins - 1), 0, bins - 1).round()
+        index = np.where(missing, bins, index).astype(int)
+        styles[column] = palette[index]
+    return styles
+
+
+def style_page(page, cmap="Blues"):
+    return page.style.apply(lambda _: gradient_styles(page, cmap), axis=None)
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import settings
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = str(ROOT / "Visualisasi_Data.py")
+
+
+@pytest.mark.parametrize("threads", [0, 4])
+def test_every_plot_renders_a_chart(monkeypatch, threads):
+    # Semua tab dirender sekaligus; setiap plot() mengisi placeholder
+    # st.empty miliknya, jadi tidak boleh ada placeholder yang tersisa kosong
+    monkeypatch.setattr(settings, "LAZY_TABS", False)
+    monkeypatch.setattr(settings, "CHART_THREADS", threads)
+    at = AppTest.from_file(SCRIPT, default_timeout=300).run()
+    assert not at.exception
+    assert len(at.get("plotly_chart")) > 0
+    assert len(at.get("empty")) == 0
+
+
+# Dijalankan di proses baru: setiap builder chart mencatat thread pemanggilnya
+FRESH_RUN = """
+import threading
+import charts
+from streamlit.testing.v1 import AppTest
+
+threads = set()
+for chart_id, build in list(charts.CHARTS.items()):
+    def record(*args, _build=build):
+        threads.add(threading.current_thread().name)
+        return _build(*args)
+    charts.CHARTS[chart_id] = record
+
+at = AppTest.from_file(SCRIPT, default_timeout=300).run()
+assert not at.exception, at.exception
+assert len(at.get("plotly_chart")) > 0
+assert len(at.get("empty")) == 0
+assert threads and not any(name.startswith("chart") for name in threads), threads
+"""
+
+
+def test_figures_built_off_the_chart_pool():
+    # Plotly Express tidak thread-safe: di proses baru, figure yang dibangun
+    # bersamaan bisa gagal membaca template default (ValueError: Invalid
+    # value). Semua chart dijadwalkan sekaligus di 16 thread; hanya agregat
+    # yang boleh jalan di pool, figure dibangun di thread script
+    env = dict(os.environ, VISDAT_LAZY_TABS="0", VISDAT_CHART_THREADS="16")
+    result = subprocess.run(
+        [sys.executable, "-c", f"SCRIPT = {SCRIPT!r}\n" + FRESH_RUN],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,32 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from data_loader import load_dataset, read_snapshot, write_snapshot
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return load_dataset().frame.head(500).reset_index(drop=True)
+
+
+def test_concurrent_snapshot_writers(frame, tmp_path):
+    # Penulis bersamaan memakai nama sementara masing-masing; hasil akhirnya
+    # salah satu snapshot utuh dan tidak ada file sementara yang tertinggal
+    path = str(tmp_path / "listing.feather")
+    frames = [frame.head(rows) for rows in (100, 200, 300, 400)]
+    with ThreadPoolExecutor(len(frames)) as pool:
+        hashes = list(pool.map(lambda part: write_snapshot(part, path), frames * 4))
+    loaded, content_hash = read_snapshot(path)
+    assert content_hash in hashes
+    assert len(loaded) in {len(part) for part in frames}
+    assert os.listdir(tmp_path) == ["listing.feather"]
+
+
+def test_snapshot_in_working_directory(frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_snapshot(frame, "listing.feather")
+    loaded, _ = read_snapshot("listing.feather")
+    pd.testing.assert_frame_equal(loaded, frame)
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import Aggregator
+from data_loader import load_dataset
+from filters import FilterEngine
+import sql_backend
+from test_sql_backend import SPECS, apply
+
+COLUMNS = ["city", "land_size_m2", "price_in_rp"]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    # File Parquet eksternal: DuckDB meng-query file, bukan dataset pandas
+    dataset = load_dataset()
+    aggregator = Aggregator(FilterEngine(dataset.frame), dataset.content_hash)
+    path = str(tmp_path_factory.mktemp("duckdb") / "listing.parquet")
+    sql_backend.write_parquet(dataset.frame, path, dataset.content_hash)
+    duckdb = sql_backend.connect("duckdb", path).refresh(None)
+    return aggregator, duckdb
+
+
+def test_describe(backends):
+    aggregator, duckdb = backends
+    assert duckdb.row_count == aggregator.summary(aggregator.start())["count"]
+    assert f"{duckdb.row_count:,} baris" in duckdb.describe()
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_rows(backends, values):
+    expected, actual = [
+        backend.rows(apply(backend, values)[0], COLUMNS) for backend in backends
+    ]
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_address_counts(backends, values):
+    expected, actual = [
+        backend.address_counts(apply(backend, values)[0]) for backend in backends
+    ]
+    np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_summary(backends, values):
+    expected, actual = [
+        backend.summary(apply(backend, values)[0]) for backend in backends
+    ]
+    assert actual["count"] == expected["count"]
+    assert actual["distinct"] == expected["distinct"]
+    for key in ["price_mean", "price_min", "price_max"]:
+        assert actual[key] == pytest.approx(expected[key], nan_ok=True), key
+
+
+def test_write_parquet_leaves_no_temp_files(tmp_path):
+    dataset = load_dataset()
+    path = str(tmp_path / "listing.parquet")
+    sql_backend.write_parquet(dataset.frame, path, dataset.content_hash)
+    assert sql_backend.parquet_hash(path) == dataset.content_hash
+    assert os.listdir(tmp_path) == ["listing.parquet"]
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from export import ExportCache, export_bytes
+
+
+def frame(rows):
+    return pd.DataFrame({"city": [" Bekasi"] * rows, "price_in_rp": range(rows)})
+
+
+def test_small_export_is_cached():
+    cache = ExportCache(1024**2, 64 * 1024)
+    payload = cache.get("a", lambda: frame(10), "CSV")
+    assert payload == export_bytes(frame(10), "CSV")
+
+    def frame_fn():
+        raise AssertionError("export dibangun ulang saat hit")
+
+    assert cache.get("a", frame_fn, "CSV") is payload
+    assert cache.bytes == len(payload)
+
+
+def test_large_export_is_not_cached():
+    cache = ExportCache(1024**2, 64 * 1024)
+    small = cache.get("small", lambda: frame(10), "CSV")
+    large = cache.get("large", lambda: frame(20_000), "CSV")
+    assert len(large) > 64 * 1024
+    # File besar tidak disimpan dan tidak membuang entri kecil
+    assert list(cache._entries) == ["small"]
+    assert cache.bytes == len(small)
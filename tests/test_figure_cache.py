@@ -0,0 +1,42 @@
+import plotly.graph_objects as go
+import pytest
+
+from figure_cache import FigureCache
+
+
+def figure(values):
+    return go.Figure(go.Bar(y=values))
+
+
+def test_hit_returns_cached_figure_without_building():
+    cache = FigureCache(1024**2)
+    fig = cache.get("a", lambda: figure([1, 2, 3]))
+
+    def build():
+        raise AssertionError("builder dipanggil saat hit")
+
+    assert cache.get("a", build) is fig
+    assert cache.lookup("a") is fig
+    assert cache.lookup("b") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.parametrize("count", [2, 3])
+def test_evicts_oldest_by_size(count):
+    figures = [figure(list(range(i, i + 50))) for i in range(count + 1)]
+    size = max(len(fig.to_json()) for fig in figures)
+    cache = FigureCache(size * count)
+    for key, fig in enumerate(figures):
+        cache.put(key, fig)
+    # Entri terlama dibuang sampai total ukuran muat lagi
+    assert cache.lookup(0) is None
+    assert all(cache.lookup(key) is figures[key] for key in range(1, count + 1))
+    assert cache.stats()["bytes"] <= size * count
+
+
+def test_figure_larger_than_cache_is_not_kept():
+    fig = figure(list(range(100)))
+    cache = FigureCache(len(fig.to_json()) - 1)
+    assert cache.get("a", lambda: fig) is fig
+    assert cache.stats()["entries"] == 0
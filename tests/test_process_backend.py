@@ -0,0 +1,91 @@
+import os
+import signal
+import time
+
+import pytest
+
+from aggregates import Aggregator
+from data_loader import load_dataset
+from filters import FilterEngine
+from process_backend import ProcessBackend
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return load_dataset()
+
+
+@pytest.fixture
+def backend(dataset):
+    backend = ProcessBackend(2, timeout=30).sync(dataset.frame, dataset.content_hash)
+    yield backend
+    backend.close()
+
+
+def wait_idle(backend):
+    # Semua worker sudah terhubung dan menunggu permintaan
+    deadline = time.monotonic() + 30
+    while backend._pool._idle.qsize() < backend.workers:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def bekasi(backend):
+    return backend.start().add("city", "isin", [" Bekasi"])
+
+
+def test_matches_aggregator(dataset, backend):
+    aggregator = Aggregator(FilterEngine(dataset.frame), dataset.content_hash)
+    assert backend.summary(bekasi(backend)) == aggregator.summary(bekasi(aggregator))
+    assert list(bekasi(backend).options("district")) == list(
+        bekasi(aggregator).options("district")
+    )
+
+
+def test_dead_worker_is_replaced(backend):
+    expected = backend.rows(bekasi(backend), ["price_in_rp"])
+    wait_idle(backend)
+    for process in list(backend._pool._processes.values()):
+        process.kill()
+        process.wait()
+    # Permintaan diulang di worker pengganti, tidak menggantung
+    assert backend.rows(bekasi(backend), ["price_in_rp"]).equals(expected)
+
+
+def test_stuck_workers_time_out(dataset):
+    backend = ProcessBackend(2, timeout=2).sync(dataset.frame, dataset.content_hash)
+    try:
+        expected = backend.rows(bekasi(backend), ["price_in_rp"])
+        wait_idle(backend)
+        for pid in list(backend._pool._processes):
+            os.kill(pid, signal.SIGSTOP)
+        with pytest.raises(RuntimeError):
+            backend.rows(bekasi(backend), ["price_in_rp"])
+        # Worker yang macet sudah diganti
+        assert backend.rows(bekasi(backend), ["price_in_rp"]).equals(expected)
+    finally:
+        backend.close()
+
+
+def test_sync_replaces_pool_and_snapshot(dataset, backend):
+    old_path = backend.path
+    frame = dataset.frame.head(100)
+    backend.sync(frame, "head-100")
+    assert not os.path.exists(old_path)
+    assert os.path.exists(backend.path)
+    assert backend.summary(backend.start())["count"] == len(frame)
+    backend.close()
+    assert not os.path.exists(backend.path)
+
+
+def test_result_from_replaced_dataset_is_not_cached(dataset, backend):
+    frame = dataset.frame.head(100)
+
+    def build():
+        # sync() mengganti dataset selagi agregasi ini berjalan
+        backend.sync(frame, "head-100")
+        return "stale"
+
+    assert backend._cached("cube", build) == "stale"
+    assert not backend._entries
+    assert backend.summary(backend.start())["count"] == len(frame)
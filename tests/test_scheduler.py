@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import TaskGraph
+
+
+def test_cancel_skips_queued_tasks():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def blocking():
+        started.set()
+        release.wait(10)
+        return "cube"
+
+    with ThreadPoolExecutor(1) as executor:
+        graph = TaskGraph(executor)
+        cube = graph.add("cube", blocking)
+        started.wait(10)
+        queued = graph.add("summary", lambda: calls.append("summary"))
+        chart = graph.add("chart", lambda: calls.append("chart"), after=["cube"])
+        graph.cancel()
+        release.set()
+        # Tugas yang sedang berjalan tetap selesai, sisanya tidak pernah bekerja
+        assert cube.result(10) == "cube"
+    assert queued.cancelled() and chart.cancelled()
+    assert calls == []
+
+
+def test_without_executor_runs_inline():
+    graph = TaskGraph()
+    cube = graph.add("cube", lambda: 2)
+    assert graph.add("chart", lambda: cube.result() * 3, after=["cube"]).result() == 6
+    graph.cancel()
+    assert not cube.cancelled()
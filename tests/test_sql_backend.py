@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import Aggregator
+from data_loader import load_dataset
+from filters import FILTER_STAGES, FilterEngine
+import sql_backend
+
+# Spesifikasi filter {kolom: nilai} yang dijalankan di kedua backend
+SPECS = [
+    {},
+    {"city": [" Bekasi", " Depok"], "facilities": ["Taman"], "land_size_m2": [50, 300]},
+    {"property_condition": ["bagus"], "price_in_rp": [500_000_000, 3_000_000_000]},
+    {"certificate": ["shm - sertifikat hak milik"], "bedrooms": [3, 5]},
+    {"city": [" Bogor"], "price_in_rp": [1, 2]},
+]
+CUBE_SLICES = [
+    "city",
+    ["city", "district"],
+    ["certificate", "city"],
+    ["property_condition", "furnishing"],
+]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    dataset = load_dataset()
+    aggregator = Aggregator(FilterEngine(dataset.frame), dataset.content_hash)
+    path = str(tmp_path_factory.mktemp("sql") / "visdat.sqlite")
+    sql = sql_backend.connect("sqlite", path).sync(dataset.frame, dataset.content_hash)
+    return aggregator, sql
+
+
+def apply(backend, values):
+    # Tahap filter dalam urutan sidebar; opsi & batas setiap widget dicatat
+    state = backend.start()
+    widgets = []
+    for column, kind in FILTER_STAGES:
+        if kind == "range":
+            widgets.append(state.bounds(column))
+            value = values.get(column) or (None, None)
+        elif kind == "facilities":
+            widgets.append(sorted(state.facility_options()))
+            value = values.get(column, [])
+        else:
+            widgets.append(sorted(pd.Index(state.options(column)).tolist()))
+            value = values.get(column, [])
+        state.add(column, kind, value)
+    return state, widgets
+
+
+def assert_bounds(expected, actual):
+    if expected is None:
+        assert actual is None
+    else:
+        assert actual == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_options_and_bounds(backends, values):
+    (_, expected), (_, actual) = [apply(backend, values) for backend in backends]
+    for (column, kind), left, right in zip(FILTER_STAGES, expected, actual):
+        if kind == "range":
+            assert_bounds(left, right)
+        else:
+            assert left == right, column
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_summary(backends, values):
+    expected, actual = [
+        backend.summary(apply(backend, values)[0]) for backend in backends
+    ]
+    assert actual["count"] == expected["count"]
+    assert actual["distinct"] == expected["distinct"]
+    for key in ["price_mean", "price_min", "price_max"]:
+        assert actual[key] == pytest.approx(expected[key], nan_ok=True), key
+
+
+@pytest.mark.parametrize("values", SPECS)
+@pytest.mark.parametrize("dimensions", CUBE_SLICES)
+def test_cube_slices(backends, values, dimensions):
+    expected, actual = [
+        backend.cube(apply(backend, values)[0]).slice(dimensions)
+        for backend in backends
+    ]
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+@pytest.mark.parametrize("values", SPECS)
+def test_year_cube(backends, values):
+    expected, actual = [
+        backend.cube(apply(backend, values)[0], "year").slice("year_built")
+        for backend in backends
+    ]
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+@pytest.mark.parametrize("values", SPECS)
+@pytest.mark.parametrize(
+    "sort", [("price_in_rp", True, ""), ("land_size_m2", False, "bekasi")]
+)
+def test_page(backends, values, sort):
+    column, descending, search = sort
+    pages = [
+        backend.page(apply(backend, values)[0], column, descending, search, 2, 20)
+        for backend in backends
+    ]
+    (expected, expected_total), (actual, actual_total) = pages
+    assert actual_total == expected_total
+    # Urutan baris dengan nilai sama boleh berbeda; nilai kolom urut harus sama
+    np.testing.assert_allclose(
+        actual[column].to_numpy(dtype="float64"),
+        expected[column].to_numpy(dtype="float64"),
+    )
+
+
+@pytest.mark.parametrize("values", SPECS)
+@pytest.mark.parametrize("level", [8, 12])
+def test_clusters(backends, values, level):
+    expected, actual = [
+        backend.clusters(apply(backend, values)[0], level) for backend in backends
+    ]
+    assert len(actual) == len(expected)
+    assert actual["count"].sum() == expected["count"].sum()
+    for frame in (expected, actual):
+        frame.sort_values(["lat", "long"], inplace=True, ignore_index=True)
+    np.testing.assert_array_equal(actual["count"], expected["count"])
+    np.testing.assert_allclose(actual[["lat", "long"]], expected[["lat", "long"]])
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import Aggregator
+from data_loader import (
+    Dataset,
+    append_update,
+    load_dataset,
+    updates_path,
+    write_snapshot,
+)
+from filters import FilterEngine
+
+
+@pytest.fixture
+def dataset():
+    frame = load_dataset().frame.head(200).reset_index(drop=True)
+    return Dataset(frame, "listing.feather", 0, 0)
+
+
+def test_partial_update_keeps_other_columns(dataset):
+    before = dataset.frame.iloc[[0, 1]].copy()
+    batch = pd.DataFrame(
+        {"ads_id": before["ads_id"].tolist(), "price_in_rp": [123, 456]}
+    )
+    change = dataset.upsert(batch)
+    after = dataset.frame.iloc[[0, 1]]
+    assert change.columns == {"price_in_rp"}
+    assert after["price_in_rp"].tolist() == [123, 456]
+    assert dataset.frame["price_in_rp"].dtype == np.int64
+    others = [column for column in dataset.frame.columns if column != "price_in_rp"]
+    pd.testing.assert_frame_equal(after[others], before[others])
+
+
+def test_empty_cells_keep_old_values(dataset):
+    before = dataset.frame.iloc[0].copy()
+    batch = pd.DataFrame(
+        {
+            "ads_id": [before["ads_id"]],
+            "price_in_rp": [np.nan],
+            "bedrooms": [before["bedrooms"] + 1],
+        }
+    )
+    change = dataset.upsert(batch)
+    assert change.columns == {"bedrooms"}
+    assert dataset.frame.loc[0, "price_in_rp"] == before["price_in_rp"]
+    assert dataset.frame.loc[0, "bedrooms"] == before["bedrooms"] + 1
+
+
+def test_new_listing_needs_price(dataset):
+    rows = len(dataset.frame)
+    batch = pd.DataFrame({"ads_id": ["baru"], "city": [" Bekasi"]})
+    with pytest.raises(ValueError, match="price_in_rp"):
+        dataset.upsert(batch)
+    assert len(dataset.frame) == rows
+
+
+def test_new_listing_with_partial_columns(dataset):
+    dtypes = dataset.frame.dtypes.astype(str)
+    batch = pd.DataFrame(
+        {"ads_id": ["baru"], "price_in_rp": [1_000_000_000], "city": [" Cikarang"]}
+    )
+    change = dataset.upsert(batch)
+    assert change.grown
+    row = dataset.frame.iloc[-1]
+    assert row["ads_id"] == "baru" and row["city"] == " Cikarang"
+    assert pd.isna(row["district"])
+    # Kategori baru ditambahkan, jenis dtype setiap kolom tetap
+    pd.testing.assert_series_equal(dataset.frame.dtypes.astype(str), dtypes)
+
+
+def test_rejected_batch_is_not_journaled(dataset, tmp_path):
+    source = str(tmp_path / "listing.feather")
+    write_snapshot(dataset.frame, source)
+    with pytest.raises(ValueError, match="price_in_rp"):
+        append_update(source, pd.DataFrame({"ads_id": ["baru"], "city": [" Bekasi"]}))
+    directory = updates_path(source)
+    assert not os.path.isdir(directory) or not os.listdir(directory)
+    # Listing lama tetap boleh diperbarui tanpa harga; dataset tetap bisa dimuat
+    first = dataset.frame.loc[0, "ads_id"]
+    append_update(source, pd.DataFrame({"ads_id": [first], "bedrooms": [9]}))
+    loaded = load_dataset(source)
+    assert len(loaded.frame) == len(dataset.frame)
+    assert loaded.frame.loc[0, "bedrooms"] == 9
+
+
+def test_listing_needs_key(dataset):
+    with pytest.raises(ValueError, match="ads_id"):
+        dataset.upsert(pd.DataFrame({"price_in_rp": [1]}))
+
+
+def test_refresh_keeps_old_states_consistent(dataset):
+    backend = Aggregator(FilterEngine(dataset.frame)).track(dataset)
+    old = backend.start().add("city", "isin", [" Bekasi"])
+    before = backend.summary(old)
+    first = dataset.frame.iloc[0]
+    batch = pd.DataFrame(
+        {
+            "ads_id": [first["ads_id"], "baru"],
+            "price_in_rp": [1, 2_000_000_000],
+            "city": [" Bekasi", " Bekasi"],
+        }
+    )
+    dataset.upsert(batch)
+    backend.refresh(dataset)
+    # State dari sebelum upsert tetap membaca versi lama secara utuh
+    assert backend.summary(old) == before
+    assert len(backend.clusters(old, 12)) > 0
+    assert len(backend.address_counts(old)) == old.mask.sum()
+    new = backend.start().add("city", "isin", [" Bekasi"])
+    assert len(new.mask) == len(dataset.frame)
+    expected = dataset.frame[dataset.frame["city"] == " Bekasi"]
+    assert backend.summary(new)["count"] == len(expected)
+    assert backend.summary(new)["price_min"] == expected["price_in_rp"].min()
+
+
+def test_lazy_structures_are_published_copy_on_write(dataset):
+    backend = Aggregator(FilterEngine(dataset.frame)).track(dataset)
+    state = backend.start()
+    index = state.index
+    counts = backend.address_counts(state)
+    # Indeks yang dipegang state tidak diubah; versi baru dipasang di backend
+    assert index.locations is None
+    assert backend.index is not index
+    assert backend.index.locations is not None
+    np.testing.assert_array_equal(backend.address_counts(backend.start()), counts)
+
+    cube = backend.cube(state)
+    matrices = cube._matrices
+    matrix = cube.matrix("certificate", "city")
+    assert not matrices
+    assert cube.matrix("certificate", "city") is matrix